@@ -1,16 +1,405 @@
 # -*- coding: utf-8 -*-
 import jieba
 import jieba.posseg as pseg
-import jieba.analyse
 from collections import Counter
 import re
 import os
+import bisect
+import hashlib
+import math
 import multiprocessing as mp
 from file_utils import FileUtils
+from tokenizer_cache import load_tokenizer, tokenizer_cache_key
+from lexicon_matcher import LexiconMatcher
+from vocabulary import Vocabulary
+
+# 預處理時需要移除的特殊字符和標點
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s\u4e00-\u9fff]')
+
+# 分句使用的句末標點
+SENTENCE_ENDINGS = frozenset('。！？')
+
+# 分析結果格式的版本號，修改結果結構或算法時遞增，使舊的緩存結果失效
+RESULT_VERSION = 7
+
+
+def _numpy():
+    """NumPy（分詞時才導入，避免拖慢命令行的啟動）"""
+    import numpy
+    return numpy
+
+
+class TokenVocabulary:
+    """分析器共用的詞彙表
+    
+    把詞語和詞性標記映射為整數 ID，並記錄每個詞語 ID 在去停用詞和去單字後是否保留。
+    過濾結果按詞語計算一次，不必對每個詞語出現處重複計算。
+    """
+    def __init__(self, stopwords):
+        self.words = Vocabulary()
+        self.flags = Vocabulary()
+        self.stopwords = stopwords
+        self.reset_filter()
+    
+    def reset_filter(self):
+        """停用詞改變後清除過濾結果"""
+        np = _numpy()
+        self._filter = np.zeros(1024, dtype=bool)
+        self._filter_size = 0
+    
+    def keep_mask(self):
+        """返回以詞語 ID 為下標的布爾數組，True 表示該詞語在過濾後保留"""
+        np = _numpy()
+        words = self.words
+        size = self._filter_size
+        if size < len(words):
+            needed = len(words)
+            if needed > len(self._filter):
+                # 按倍數擴容
+                grown = np.zeros(max(needed, len(self._filter) * 2), dtype=bool)
+                grown[:size] = self._filter[:size]
+                self._filter = grown
+            self._filter[size:needed] = [
+                bool(word.strip()) and len(word) > 1 and word not in self.stopwords
+                for word in words.words[size:needed]
+            ]
+            self._filter_size = needed
+        return self._filter[:self._filter_size]
+
+
+class TokenizedDocument:
+    """分詞後的文檔
+    
+    每份文檔有兩種分詞結果，都在首次使用時才計算，並在各項分析之間共用，避免重複調用 jieba：
+        clean - 先去除標點再分詞（與 preprocess_text 的預處理順序相同），
+                用於詞頻、詞性、N-gram 等統計（filtered_*）
+        raw   - 直接對原文分詞，保留標點，用於分句、情感、實體和關鍵詞
+    詞語序列以詞彙表中的整數 ID 數組保存，詞頻等統計直接在數組上向量化計算，
+    只有在生成結果字典時才把 ID 轉換回字符串。
+    """
+    STREAMS = ('raw', 'clean')
+    
+    def __init__(self, text, vocabulary, segment, raw=None, clean=None):
+        """
+        Args:
+            text: 原文
+            vocabulary: 共用的詞彙表（TokenVocabulary）
+            segment: segment(text) -> (word_ids, flag_ids)，用於計算尚未計算的分詞結果
+            raw, clean: 已有的分詞結果 (word_ids, flag_ids)，None 表示需要時再計算
+        """
+        self.text = text
+        self.vocabulary = vocabulary
+        self._segment = segment
+        self._streams = {'raw': raw, 'clean': clean}
+        self._filtered = None
+        self._sentence_spans = None
+        self._token_offsets = None
+    
+    def stream(self, name):
+        """返回 'raw' 或 'clean' 分詞結果 (word_ids, flag_ids)，未計算時先分詞"""
+        if self._streams[name] is None:
+            # clean 不能由 raw 去掉標點詞得到：去除標點後 jieba 會把標點兩側的字合併切分，
+            # 詞頻、詞性和 N-gram 只有對去除標點後的文本重新分詞才與原來的預處理一致，
+            # 因此完整分析需要兩次分詞（基本分析只需要 clean 一次）
+            text = self.text if name == 'raw' else PUNCTUATION_PATTERN.sub('', self.text)
+            self._streams[name] = self._segment(text)
+        return self._streams[name]
+    
+    def segment(self, full=False):
+        """計算分析需要的分詞結果：基本分析只需要 clean，full 為 True 時還需要 raw
+        
+        Returns:
+            bool: 是否有新計算的分詞結果
+        """
+        names = self.STREAMS if full else ('clean',)
+        missing = [name for name in names if self._streams[name] is None]
+        for name in missing:
+            self.stream(name)
+        return bool(missing)
+    
+    def compact(self):
+        """返回不依賴共用詞彙表的分詞結果 (words, flags, streams)
+        
+        words 和 flags 為本文檔出現的詞語和詞性，streams 為 {名稱: (word_index, flag_index)}，
+        包含已計算的每種分詞結果中每個詞在這兩張表中的下標，可用於保存和重建文檔（見 from_compact）
+        """
+        np = _numpy()
+        names = [name for name in self.STREAMS if self._streams[name] is not None]
+        word_ids, word_index = np.unique(
+            np.concatenate([self._streams[name][0] for name in names]), return_inverse=True
+        )
+        flag_ids, flag_index = np.unique(
+            np.concatenate([self._streams[name][1] for name in names]), return_inverse=True
+        )
+        streams = {}
+        start = 0
+        for name in names:
+            end = start + len(self._streams[name][0])
+            streams[name] = (word_index[start:end], flag_index[start:end])
+            start = end
+        words = self.vocabulary.words.words
+        flags = self.vocabulary.flags.words
+        return (
+            [words[i] for i in word_ids.tolist()],
+            [flags[i] for i in flag_ids.tolist()],
+            streams
+        )
+    
+    @classmethod
+    def from_compact(cls, text, compact, vocabulary, segment):
+        """由 compact() 的結果重建文檔，詞語映射到 vocabulary 中的 ID"""
+        np = _numpy()
+        words, flags, streams = compact
+        word_ids = np.array(vocabulary.words.ids(words), dtype=np.int32)
+        flag_ids = np.array(vocabulary.flags.ids(flags), dtype=np.int32)
+        return cls(text, vocabulary, segment, **{
+            name: (word_ids[word_index], flag_ids[flag_index])
+            for name, (word_index, flag_index) in streams.items()
+        })
+    
+    @property
+    def word_ids(self):
+        """原文分詞結果的詞語 ID，保留標點和停用詞"""
+        return self.stream('raw')[0]
+    
+    @property
+    def flag_ids(self):
+        """原文分詞結果的詞性 ID"""
+        return self.stream('raw')[1]
+    
+    def _filter(self):
+        if self._filtered is None:
+            np = _numpy()
+            word_ids, flag_ids = self.stream('clean')
+            # 去除停用詞和單字後保留的詞在 clean 分詞結果中的位置
+            index = np.flatnonzero(self.vocabulary.keep_mask()[word_ids])
+            self._filtered = (index, word_ids[index], flag_ids[index])
+        return self._filtered
+    
+    @property
+    def filtered_index(self):
+        """filtered_ids 中每個詞在 clean 分詞結果中的位置"""
+        return self._filter()[0]
+    
+    @property
+    def filtered_ids(self):
+        """去除標點、停用詞和單字後的詞語 ID，與 preprocess_text 的輸出一致"""
+        return self._filter()[1]
+    
+    @property
+    def filtered_flag_ids(self):
+        """filtered_ids 對應的詞性 ID"""
+        return self._filter()[2]
+    
+    @property
+    def filtered_offsets(self):
+        """filtered_ids 中每個詞在原文中的起始字符位置"""
+        np = _numpy()
+        words = self.vocabulary.words.words
+        clean_ids = self.stream('clean')[0]
+        lengths = np.array([len(words[i]) for i in clean_ids.tolist()], dtype=np.int64)
+        clean_starts = np.cumsum(lengths) - lengths
+        # 去除標點後的文本中每個字符在原文中的位置
+        removed = [match.start() for match in PUNCTUATION_PATTERN.finditer(self.text)]
+        kept = np.delete(np.arange(len(self.text)), removed)
+        return kept[clean_starts[self.filtered_index]]
+    
+    @property
+    def tokens(self):
+        """原文分詞結果 [(word, flag), ...]"""
+        words = self.vocabulary.words.words
+        flags = self.vocabulary.flags.words
+        return [(words[w], flags[f]) for w, f in zip(self.word_ids.tolist(), self.flag_ids.tolist())]
+    
+    @property
+    def filtered(self):
+        """過濾後的分詞結果 [(word, flag), ...]"""
+        words = self.vocabulary.words.words
+        flags = self.vocabulary.flags.words
+        return [(words[w], flags[f]) for w, f in zip(self.filtered_ids.tolist(), self.filtered_flag_ids.tolist())]
+    
+    @property
+    def raw_words(self):
+        """未經過濾的原文詞語列表"""
+        words = self.vocabulary.words.words
+        return [words[w] for w in self.word_ids.tolist()]
+    
+    @property
+    def words(self):
+        """過濾後的詞語列表"""
+        words = self.vocabulary.words.words
+        return [words[w] for w in self.filtered_ids.tolist()]
+    
+    @property
+    def sentence_spans(self):
+        """每個非空句子在 tokens 中的範圍 [(start, end), ...]，句末標點不計入句子"""
+        if self._sentence_spans is None:
+            raw_words = self.raw_words
+            spans = []
+            start = 0
+            for i, word in enumerate(raw_words):
+                if word in SENTENCE_ENDINGS:
+                    spans.append((start, i))
+                    start = i + 1
+            spans.append((start, len(raw_words)))
+            self._sentence_spans = [
+                (start, end) for start, end in spans
+                if any(word.strip() for word in raw_words[start:end])
+            ]
+        return self._sentence_spans
+    
+    @property
+    def token_offsets(self):
+        """每個詞在原文中的起始字符位置，末尾附加文本長度（共 len(word_ids) + 1 項）"""
+        if self._token_offsets is None:
+            offsets = [0]
+            for word in self.raw_words:
+                offsets.append(offsets[-1] + len(word))
+            self._token_offsets = offsets
+        return self._token_offsets
+    
+    @property
+    def sentence_offsets(self):
+        """每個非空句子在原文中的字符範圍 [(start, end), ...]，與 sentence_spans 一一對應"""
+        offsets = self.token_offsets
+        return [(offsets[start], offsets[end]) for start, end in self.sentence_spans]
+    
+    @property
+    def sentences(self):
+        """按句末標點切分的句子列表"""
+        raw_words = self.raw_words
+        return [
+            ''.join(raw_words[start:end]).strip()
+            for start, end in self.sentence_spans
+        ]
+
+
+def _count_ids(ids):
+    """統計 ID 數組中各 ID 的出現次數，返回按首次出現位置排列的 (ids, counts, first_positions)"""
+    np = _numpy()
+    unique, first, counts = np.unique(ids, return_index=True, return_counts=True)
+    order = np.argsort(first)
+    return unique[order], counts[order], first[order]
+
+
+def _most_common(ids):
+    """與 Counter(ids).most_common() 順序相同的 (ids, counts)：按次數降序，同次數時先出現者優先"""
+    unique, counts, _ = _count_ids(ids)
+    order = _numpy().argsort(-counts, kind='stable')
+    return unique[order], counts[order]
+
+
+# 子進程中的分析器實例，由 _init_worker 在每個進程啟動時建立一次
+_worker_analyzer = None
+
+
+def _default_tfidf():
+    """jieba 的默認 TF-IDF 模型（導入時需要載入 IDF 表，因此在首次提取關鍵詞時才導入）"""
+    import jieba.analyse
+    return jieba.analyse.default_tfidf
+
+def _init_worker(analyzer):
+    """進程池初始化函數：每個子進程只載入一次分析器狀態和 jieba 詞典"""
+    global _worker_analyzer
+    # fork 啟動的子進程會繼承主進程已初始化的 jieba 詞典；
+    # spawn 啟動時則需要在這裡初始化並載入自訂詞典
+    if not jieba.dt.initialized:
+        load_tokenizer(analyzer.custom_dict_path)
+        for dict_path in analyzer.user_dict_paths:
+            jieba.load_userdict(dict_path)
+    # 各子進程只統計自己寫入的分詞緩存，由主進程在分析結束後統一按大小上限淘汰
+    if analyzer.token_cache is not None:
+        analyzer.token_cache.auto_evict = False
+    _worker_analyzer = analyzer
+
+
+def _analyze_in_worker(task):
+    """在子進程中使用已初始化的分析器分析單個文件"""
+    return _worker_analyzer._analyze_single_file(task)
+
+
+def _analyze_in_worker_with_path(task):
+    """與 _analyze_in_worker 相同，但連同文件路徑一起返回（用於無序的流式輸出）"""
+    return task[0], _worker_analyzer._analyze_single_file(task)
+
+
+class AnalyzerPool:
+    """常駐的分析進程池
+    
+    每個子進程啟動時通過 initializer 取得一次分析器狀態，之後的任務只需傳遞
+    文件路徑，不再為每個任務塊重複序列化整個分析器。進程池在多次調用之間重用。
+    """
+    def __init__(self, analyzer, processes=None, chunksize=None):
+        self.analyzer = analyzer
+        self.processes = processes or mp.cpu_count()
+        self.chunksize = chunksize
+        self._pool = None
+    
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = mp.Pool(
+                processes=self.processes,
+                initializer=_init_worker,
+                initargs=(self.analyzer,)
+            )
+        return self._pool
+    
+    def _chunksize_for(self, task_count):
+        """未指定塊大小時，按照 Pool.map 的方式估算"""
+        if self.chunksize:
+            return self.chunksize
+        chunksize, extra = divmod(task_count, self.processes * 4)
+        return chunksize + 1 if extra else max(chunksize, 1)
+    
+    def map(self, file_paths, full=False):
+        """並行分析文件，按輸入順序返回結果列表"""
+        tasks = [(file_path, full) for file_path in file_paths]
+        if not tasks:
+            return []
+        return self._get_pool().map(_analyze_in_worker, tasks, self._chunksize_for(len(tasks)))
+    
+    def imap_unordered(self, file_paths, full=False):
+        """並行分析文件，每完成一個文件即產出 (file_path, result)，順序與輸入無關"""
+        tasks = [(file_path, full) for file_path in file_paths]
+        if not tasks:
+            return iter(())
+        return self._get_pool().imap_unordered(
+            _analyze_in_worker_with_path, tasks, self._chunksize_for(len(tasks))
+        )
+    
+    def close(self):
+        """關閉進程池並等待子進程退出"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 
 class ChineseTextAnalyzer:
-    def __init__(self, custom_dict_path=None, stopwords_path=None):
-        """初始化分析器"""
+    def __init__(self, custom_dict_path=None, stopwords_path=None, idf_path=None):
+        """初始化分析器
+        
+        idf_path 為 jieba 格式的 IDF 文件（例如 corpus_tfidf 生成的語料庫 IDF 表），
+        指定時關鍵詞提取使用該表，否則使用 jieba 內置的 IDF 表
+        """
+        # 並行分析使用的常駐進程池（按需建立）
+        self._pool = None
+        # 分析資源的指紋和分詞指紋（按需計算）
+        self._fingerprint = None
+        self._segmentation_fingerprint = None
+        # 分詞結果緩存（TokenCache），設置後 tokenize_file 優先使用緩存的分詞結果
+        self.token_cache = None
+        # 情感詞典和自訂詞典的多模式匹配器（按需建立）
+        self._lexicon_matcher = None
+        # 所有文檔共用的詞彙表（按需建立）
+        self._vocabulary = None
+        
         # 設置資源文件的基礎路徑
         self.resources_path = os.path.join(
             os.path.dirname(os.path.abspath(__file__)), 
@@ -20,10 +409,12 @@ class ChineseTextAnalyzer:
         # 記錄路徑
         self.custom_dict_path = None
         self.stopwords_path = None
+        # 建立分析器後通過 load_user_dict 追加的詞典
+        self.user_dict_paths = []
         
         # 載入自訂詞典或默認詞典
         if custom_dict_path:
-            jieba.load_userdict(custom_dict_path)
+            load_tokenizer(custom_dict_path)
             self.custom_dict_path = custom_dict_path
             # 計算預設詞典詞數
             dict_words = self._count_words_in_dict(custom_dict_path)
@@ -31,7 +422,7 @@ class ChineseTextAnalyzer:
         else:
             default_dict_path = os.path.join(self.resources_path, 'custom_dict.txt')
             if os.path.exists(default_dict_path):
-                jieba.load_userdict(default_dict_path)
+                load_tokenizer(default_dict_path)
                 self.custom_dict_path = default_dict_path
                 # 計算預設詞典詞數
                 dict_words = self._count_words_in_dict(default_dict_path)
@@ -53,6 +444,11 @@ class ChineseTextAnalyzer:
         # 載入情感詞典
         self.positive_words = self._load_sentiment_words('positive_words.txt')
         self.negative_words = self._load_sentiment_words('negative_words.txt')
+        
+        # 載入語料庫 IDF 表
+        self.idf_table = None
+        if idf_path:
+            self.set_idf_table(idf_path)
     
     def _count_words_in_dict(self, dict_path):
         """計算詞典中的詞數（排除註釋行）"""
@@ -78,6 +474,20 @@ class ChineseTextAnalyzer:
             print(f"已載入情感詞典: {filepath}, 共 {len(words)} 個詞")
         return words
     
+    def load_user_dict(self, dict_path):
+        """追加載入自訂詞典
+        
+        詞典會改變分詞結果，因此分詞指紋、結果指紋和詞典匹配器都需要重新計算
+        """
+        jieba.load_userdict(dict_path)
+        self.user_dict_paths.append(dict_path)
+        self.close_pool()
+        self._fingerprint = None
+        self._segmentation_fingerprint = None
+        self._lexicon_matcher = None
+        if self.token_cache is not None:
+            self.token_cache.set_fingerprint(self.segmentation_fingerprint())
+    
     def load_stopwords(self, file_path):
         """載入停用詞表"""
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -87,96 +497,442 @@ class ChineseTextAnalyzer:
                     self.stopwords.add(line)
         # 更新停用詞表路徑
         self.stopwords_path = file_path
+        # 停用詞已改變，子進程中的狀態、結果指紋和詞語的過濾結果都需要重新計算
+        self.close_pool()
+        self._fingerprint = None
+        if self._vocabulary is not None:
+            self._vocabulary.reset_filter()
     
-    def preprocess_text(self, text):
-        """文本預處理：分詞、去除停用詞、標點符號等"""
-        # 移除特殊字符和標點
-        text = re.sub(r'[^\w\s\u4e00-\u9fff]', '', text)
+    def set_idf_table(self, idf_table):
+        """設置關鍵詞提取使用的 IDF 表
         
-        # 分詞和詞性標注
-        words = pseg.cut(text)
+        idf_table 可以是 corpus_tfidf.IdfTable 或 jieba 格式的 IDF 文件路徑，None 表示恢復使用 jieba 內置的 IDF 表
+        """
+        if isinstance(idf_table, str):
+            from corpus_tfidf import IdfTable
+            path = idf_table
+            idf_table = IdfTable.load(path)
+            print(f"已載入 IDF 表: {path}, 共 {len(idf_table)} 個詞")
+        self.idf_table = idf_table
+        # IDF 表已改變，子進程中的狀態和結果指紋都需要重新計算
+        self.close_pool()
+        self._fingerprint = None
+    
+    def segmentation_fingerprint(self):
+        """計算分詞資源的指紋
         
-        # 過濾停用詞和單字
-        filtered = [
-            (word, flag) for word, flag in words 
-            if word not in self.stopwords and len(word) > 1
-        ]
-        return filtered
+        指紋只涵蓋決定分詞和詞性標注結果的 jieba 版本、主詞典和自訂詞典，
+        停用詞表等只影響過濾和統計的資源改變時，基於該指紋的分詞結果緩存（TokenCache）仍然有效。
+        """
+        if self._segmentation_fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update(tokenizer_cache_key(self.custom_dict_path).encode('utf-8'))
+            for dict_path in self.user_dict_paths:
+                digest.update(b'\0')
+                with open(dict_path, 'rb') as f:
+                    digest.update(f.read())
+            self._segmentation_fingerprint = digest.hexdigest()
+        return self._segmentation_fingerprint
+    
+    def fingerprint(self):
+        """計算分析資源的指紋
+        
+        指紋涵蓋分詞指紋、停用詞表、情感詞典、IDF 表和結果格式版本，
+        任何一項改變都會使基於指紋的結果緩存失效。
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update(f"{RESULT_VERSION}:{self.segmentation_fingerprint()}".encode('utf-8'))
+            for words in (self.stopwords, self.positive_words, self.negative_words):
+                digest.update(b'\0')
+                digest.update('\n'.join(sorted(words)).encode('utf-8'))
+            if self.idf_table is not None:
+                digest.update(b'\0')
+                digest.update(self.idf_table.fingerprint().encode('utf-8'))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+    
+    @property
+    def vocabulary(self):
+        """所有文檔共用的詞彙表（TokenVocabulary）"""
+        if self._vocabulary is None:
+            self._vocabulary = TokenVocabulary(self.stopwords)
+        return self._vocabulary
+    
+    def tokenize(self, text):
+        """返回可供各項分析共用的 TokenizedDocument（分詞在各項分析首次需要時才進行）"""
+        if isinstance(text, TokenizedDocument):
+            return text
+        return TokenizedDocument(text, self.vocabulary, self._segment)
+    
+    def _segment(self, text):
+        """對文本進行分詞和詞性標注，返回詞語 ID 和詞性 ID 數組"""
+        np = _numpy()
+        vocabulary = self.vocabulary
+        words = []
+        flags = []
+        for pair in pseg.cut(text):
+            words.append(pair.word)
+            flags.append(pair.flag)
+        return (
+            np.array(vocabulary.words.ids(words), dtype=np.int32),
+            np.array(vocabulary.flags.ids(flags), dtype=np.int32)
+        )
+    
+    def tokenize_file(self, file_path, full=False):
+        """讀取文件並分詞
+        
+        full 為 True 時同時計算完整分析需要的原文分詞結果（見 TokenizedDocument.segment）。
+        設置了 token_cache 時，文件內容和分詞資源均未改變的文件直接使用緩存的分詞結果，
+        不調用 jieba；其餘文件分詞後寫入緩存，緩存中缺少所需的分詞結果時補算後更新緩存
+        """
+        text = FileUtils.read_file(file_path)
+        cache = self.token_cache
+        key = None
+        if cache is not None:
+            try:
+                key = cache.key_for_file(file_path)
+            except OSError:
+                key = None
+        compact = cache.get(key) if key else None
+        if compact is not None:
+            doc = TokenizedDocument.from_compact(text, compact, self.vocabulary, self._segment)
+        else:
+            doc = self.tokenize(text)
+        if doc.segment(full) and key:
+            cache.put(key, doc.compact())
+        return doc
+    
+    def preprocess_text(self, text):
+        """文本預處理：分詞、去除停用詞、標點符號等"""
+        return self.tokenize(text).filtered
     
     def analyze_text(self, text):
-        """分析文本並返回統計結果"""
-        processed = self.preprocess_text(text)
+        """分析文本並返回統計結果
+        
+        text 可以是字符串，也可以是 tokenize() 返回的 TokenizedDocument
+        """
+        doc = self.tokenize(text)
+        words = self.vocabulary.words.words
+        flags = self.vocabulary.flags.words
+        total_words = len(doc.filtered_ids)
         
         # 詞頻統計
-        word_freq = Counter([word for word, _ in processed])
+        word_ids, word_counts = _most_common(doc.filtered_ids)
+        word_ids = word_ids.tolist()
+        word_counts = word_counts.tolist()
         
         # 詞性統計
-        pos_freq = Counter([flag for _, flag in processed])
-        
-        # 詞性-詞對應關係
-        pos_word_mapping = {}
-        for word, pos in processed:
-            if pos not in pos_word_mapping:
-                pos_word_mapping[pos] = set()
-            pos_word_mapping[pos].add(word)
+        flag_ids, flag_counts = _most_common(doc.filtered_flag_ids)
         
         # 計算平均詞長
-        avg_word_len = sum(len(word) for word, _ in processed) / len(processed) if processed else 0
+        total_len = sum(len(words[i]) * count for i, count in zip(word_ids, word_counts))
+        avg_word_len = total_len / total_words if total_words else 0
         
         return {
-            'word_frequency': dict(word_freq.most_common()),
-            'pos_frequency': dict(pos_freq.most_common()),
-            'pos_word_mapping': {k: list(v) for k, v in pos_word_mapping.items()},
+            'word_frequency': dict(zip([words[i] for i in word_ids], word_counts)),
+            'pos_frequency': dict(zip([flags[i] for i in flag_ids.tolist()], flag_counts.tolist())),
+            'pos_word_mapping': self._pos_word_mapping(doc),
             'avg_word_length': round(avg_word_len, 2),
-            'total_words': len(processed)
+            'total_words': total_words
         }
     
-    def analyze_files(self, file_paths):
-        """批量分析多個文件"""
-        results = {}
+    def _pos_word_mapping(self, doc):
+        """詞性-詞對應關係 {pos: [word, ...]}，詞性和詞語均按首次出現的順序排列"""
+        if not len(doc.filtered_ids):
+            return {}
+        words = self.vocabulary.words.words
+        flags = self.vocabulary.flags.words
+        # 把 (詞性 ID, 詞語 ID) 編碼為一個整數，一次找出所有不同的組合
+        pairs = doc.filtered_flag_ids.astype('int64') * len(words) + doc.filtered_ids
+        unique, _, _ = _count_ids(pairs)
+        flag_ids, word_ids = divmod(unique, len(words))
+        mapping = {}
+        for flag_id, word_id in zip(flag_ids.tolist(), word_ids.tolist()):
+            mapping.setdefault(flags[flag_id], []).append(words[word_id])
+        return mapping
+    
+    def analyze_files(self, file_paths, full=False, cache=None):
+        """批量分析多個文件
+        
+        full 為 True 時對每個文件執行完整分析（見 full_analysis）
+        """
+        return dict(self.iter_files(file_paths, full=full, cache=cache))
+    
+    def iter_files(self, file_paths, full=False, cache=None):
+        """逐個分析文件，每完成一個文件即產出 (file_path, result)
+        
+        指定 cache（ResultCache）時，內容和分析資源均未改變的文件直接使用緩存結果
+        """
         for file_path in file_paths:
-            try:
-                text = FileUtils.read_file(file_path)
-                results[file_path] = self.analyze_text(text)
-            except Exception as e:
-                results[file_path] = {"error": str(e)}
-                print(f"Error processing {file_path}: {e}")
-        return results
+            key = self._cache_key(cache, file_path, full)
+            result = cache.get(key) if key else None
+            if result is None:
+                try:
+                    doc = self.tokenize_file(file_path, full=full)
+                    result = self.full_analysis(doc) if full else self.analyze_text(doc)
+                    if key:
+                        cache.put(key, result)
+                except Exception as e:
+                    result = {"error": str(e)}
+                    print(f"Error processing {file_path}: {e}")
+            yield file_path, result
+    
+    def iter_files_parallel(self, file_paths, full=False, processes=None, chunksize=None, cache=None):
+        """使用多進程並行分析多個文件，按完成順序逐個產出 (file_path, result)
+        
+        與 analyze_files_parallel 不同，結果不會等到所有文件完成後才一併返回，
+        調用方可以邊分析邊導出，內存中不必保留全部結果。
+        指定 cache 時，命中緩存的文件在主進程中直接產出，只有其餘文件交給子進程分析。
+        """
+        pending = {}
+        for file_path in file_paths:
+            key = self._cache_key(cache, file_path, full)
+            result = cache.get(key) if key else None
+            if result is not None:
+                yield file_path, result
+            else:
+                pending[file_path] = key
+        
+        if not pending:
+            return
+        
+        pool = self.get_pool(processes, chunksize)
+        try:
+            for file_path, result in pool.imap_unordered(list(pending), full=full):
+                key = pending[file_path]
+                if key and 'error' not in result:
+                    cache.put(key, result)
+                yield file_path, result
+        finally:
+            self._enforce_token_cache_limit()
+    
+    def _cache_key(self, cache, file_path, full):
+        """計算文件的緩存鍵；未啟用緩存或文件無法讀取時返回 None"""
+        if cache is None:
+            return None
+        try:
+            return cache.key_for_file(file_path, variant='full' if full else 'basic')
+        except OSError:
+            return None
     
-    def analyze_files_parallel(self, file_paths):
-        """使用多進程並行分析多個文件"""
-        with mp.Pool(processes=mp.cpu_count()) as pool:
-            results_list = pool.map(self._analyze_single_file, file_paths)
+    def analyze_files_parallel(self, file_paths, full=False, processes=None, chunksize=None):
+        """使用多進程並行分析多個文件
+        
+        full 為 True 時每個子進程執行完整的分析流程並直接返回最終結果，
+        主進程無需再讀取文件或進行高級分析。
+        processes 和 chunksize 分別設置進程數（默認為 CPU 核心數）和任務塊大小，
+        進程池會在後續調用中重用，直到進程數改變或調用 close_pool()。
+        """
+        pool = self.get_pool(processes, chunksize)
+        results_list = pool.map(file_paths, full=full)
+        self._enforce_token_cache_limit()
         
         return {file_path: result for file_path, result in zip(file_paths, results_list)}
     
-    def _analyze_single_file(self, file_path):
+    def _enforce_token_cache_limit(self):
+        """子進程寫入分詞緩存時不淘汰條目，並行分析結束後在主進程中統一檢查大小上限"""
+        if self.token_cache is not None:
+            self.token_cache.enforce_limit()
+    
+    def get_pool(self, processes=None, chunksize=None):
+        """取得（必要時建立）常駐進程池"""
+        processes = processes or mp.cpu_count()
+        if self._pool is not None and self._pool.processes != processes:
+            self.close_pool()
+        if self._pool is None:
+            self._pool = AnalyzerPool(self, processes=processes, chunksize=chunksize)
+        elif chunksize:
+            self._pool.chunksize = chunksize
+        return self._pool
+    
+    def close_pool(self):
+        """關閉常駐進程池"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+    
+    def __getstate__(self):
+        # 進程池不能也不需要傳遞到子進程；匹配器和詞彙表由子進程自行建立
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        state['_lexicon_matcher'] = None
+        state['_vocabulary'] = None
+        return state
+    
+    @property
+    def lexicon_matcher(self):
+        """由情感詞典和自訂詞典建立的多模式匹配器
+        
+        正面詞、負面詞和自訂詞典詞條分別帶有 'positive'、'negative' 和 'term' 標籤。
+        自訂詞典詞條也參與最左最長匹配，可以避免把較長詞語中的情感字誤判為情感詞。
+        """
+        if self._lexicon_matcher is None:
+            matcher = LexiconMatcher()
+            matcher.add_words(self.positive_words, 'positive')
+            matcher.add_words(self.negative_words, 'negative')
+            for dict_path in self._dict_paths():
+                matcher.add_words(self._load_dict_words(dict_path), 'term')
+            matcher.build()
+            self._lexicon_matcher = matcher
+        return self._lexicon_matcher
+    
+    def _dict_paths(self):
+        """已載入的全部自訂詞典路徑"""
+        paths = [self.custom_dict_path] if self.custom_dict_path else []
+        return [path for path in paths + self.user_dict_paths if os.path.exists(path)]
+    
+    def _load_dict_words(self, dict_path):
+        """讀取詞典文件中的詞條（每行第一列）"""
+        words = []
+        with open(dict_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    words.append(line.split()[0])
+        return words
+    
+    def _analyze_single_file(self, task):
         """分析單個文件（用於並行處理）"""
+        file_path, full = task
         try:
-            text = FileUtils.read_file(file_path)
-            return self.analyze_text(text)
+            doc = self.tokenize_file(file_path, full=full)
+            return self.full_analysis(doc) if full else self.analyze_text(doc)
         except Exception as e:
             return {"error": str(e)}
     
+    def full_analysis(self, text):
+        """對文本進行基本統計、字符統計和全部高級分析
+        
+        每種分詞結果只計算一次，所有分析共用同一個 TokenizedDocument
+        """
+        doc = self.tokenize(text)
+        
+        results = self.analyze_text(doc)
+        results.update(self.character_statistics(doc.text))
+        results['sentiment'] = self.analyze_sentiment(doc)
+        results['keywords'] = self.keyword_extraction(doc)
+        results['entities'] = self.extract_entities(doc)
+        results['ngrams'] = self.extract_ngrams(doc)
+        results['summary'] = self.generate_summary(doc)
+        return results
+    
+    def analyze_file_streaming(self, file_path, chunk_size=FileUtils.DEFAULT_CHUNK_SIZE, n=2):
+        """以流式方式分析大文件
+        
+        文件按句子邊界分塊讀取，每塊分詞後只累加到詞頻、詞性、N-gram、
+        情感和實體等計數器中，不保留全文或完整的分詞結果，內存佔用與文件大小無關。
+        返回的結果與 full_analysis 相同，但不包含需要全文的摘要。
+        """
+        word_freq = Counter()
+        pos_freq = Counter()
+        pos_word_mapping = {}
+        ngrams = Counter()
+        keyword_freq = Counter()
+        entities = {'person': {}, 'location': {}, 'organization': {}}
+        total_word_len = 0
+        total_chars = 0
+        chinese_chars = 0
+        positive_count = 0
+        negative_count = 0
+        np = _numpy()
+        words = self.vocabulary.words.words
+        flags = self.vocabulary.flags.words
+        # 上一塊末尾的 n-1 個詞語 ID，用於拼接跨塊的 n-gram（各塊共用同一詞彙表，ID 保持不變）
+        tail = np.zeros(0, dtype=np.int32)
+        
+        for chunk in FileUtils.iter_text_chunks(file_path, chunk_size=chunk_size):
+            doc = self.tokenize(chunk)
+            
+            # 每塊在 ID 數組上計數，再按首次出現的順序累加，與逐詞累加的結果和順序相同
+            word_ids, word_counts, _ = _count_ids(doc.filtered_ids)
+            word_counts = word_counts.tolist()
+            chunk_words = [words[i] for i in word_ids.tolist()]
+            word_freq.update(dict(zip(chunk_words, word_counts)))
+            total_word_len += sum(len(word) * count for word, count in zip(chunk_words, word_counts))
+            flag_ids, flag_counts, _ = _count_ids(doc.filtered_flag_ids)
+            pos_freq.update(dict(zip([flags[i] for i in flag_ids.tolist()], flag_counts.tolist())))
+            for pos, pos_words in self._pos_word_mapping(doc).items():
+                pos_word_mapping.setdefault(pos, {}).update(dict.fromkeys(pos_words))
+            
+            joined = np.concatenate([tail, doc.filtered_ids])
+            ngrams.update(self._ngram_counts(joined, n))
+            tail = joined[len(joined) - (n - 1):] if n > 1 else joined[:0]
+            
+            keyword_freq.update(self._keyword_candidates(doc))
+            
+            for entity_type, entity_list in self.extract_entities(doc).items():
+                entities[entity_type].update(dict.fromkeys(entity_list))
+            
+            sentiment = self.analyze_sentiment(doc)
+            positive_count += sentiment['positive_count']
+            negative_count += sentiment['negative_count']
+            
+            total_chars += len(chunk)
+            chinese_chars += self.count_chinese_characters(chunk)
+        
+        total_words = sum(word_freq.values())
+        return {
+            'word_frequency': dict(word_freq.most_common()),
+            'pos_frequency': dict(pos_freq.most_common()),
+            'pos_word_mapping': {k: list(v) for k, v in pos_word_mapping.items()},
+            'avg_word_length': round(total_word_len / total_words, 2) if total_words else 0,
+            'total_words': total_words,
+            'total_characters': total_chars,
+            'chinese_characters': chinese_chars,
+            'chinese_character_ratio': round(chinese_chars / total_chars * 100, 2) if total_chars else 0,
+            'sentiment': self._sentiment_result(positive_count, negative_count),
+            'keywords': {word: float(weight) for word, weight in self._score_tfidf(keyword_freq)},
+            'entities': {k: list(v) for k, v in entities.items()},
+            'ngrams': ngrams
+        }
+    
     def analyze_sentiment(self, text):
         """分析文本情感傾向 (positive, negative, neutral)
         
         使用載入的情感詞典來分析文本的情感傾向
         """
-        words = [word for word, _ in self.preprocess_text(text)]
+        doc = self.tokenize(text)
+        matcher = self.lexicon_matcher
         
-        # 將未分詞的文本也進行分析，可能有些情感詞在預處理中被過濾掉了
-        raw_words = jieba.cut(text)
+        # 用詞典自動機掃描原文，只保留與分詞邊界對齊的匹配（單字詞條不會命中較長詞語的一部分）；
+        # 再按句子的字符範圍把每個匹配歸入所在句子
+        sentence_offsets = doc.sentence_offsets
+        sentence_starts = [start for start, _ in sentence_offsets]
+        sentence_positive = [0] * len(sentence_offsets)
+        sentence_negative = [0] * len(sentence_offsets)
+        positive_count = 0
+        negative_count = 0
+        for start, _, word in matcher.find_all(doc.text, boundaries=set(doc.token_offsets)):
+            labels = matcher.labels(word)
+            is_positive = 'positive' in labels
+            is_negative = 'negative' in labels
+            if not (is_positive or is_negative):
+                continue
+            positive_count += is_positive
+            negative_count += is_negative
+            index = bisect.bisect_right(sentence_starts, start) - 1
+            if index >= 0 and start < sentence_offsets[index][1]:
+                sentence_positive[index] += is_positive
+                sentence_negative[index] += is_negative
         
-        # 計算正面詞和負面詞的出現次數
-        positive_count = sum(1 for word in words if word in self.positive_words)
-        positive_count += sum(1 for word in raw_words if word in self.positive_words and word not in words)
+        sentence_scores = [p - n for p, n in zip(sentence_positive, sentence_negative)]
         
-        negative_count = sum(1 for word in words if word in self.negative_words)
-        negative_count += sum(1 for word in raw_words if word in self.negative_words and word not in words)
+        result = self._sentiment_result(positive_count, negative_count)
+        # 每個句子的情感得分，順序與 TokenizedDocument.sentences 一致
+        result['sentence_scores'] = sentence_scores
+        return result
+    
+    def _sentiment_result(self, positive_count, negative_count):
+        """根據正面詞和負面詞的數量計算情感得分和標籤
         
+        normalized_score 為 (正面 - 負面) / (正面 + 負面)，範圍 [-1, 1]，
+        不受文本長度影響，可用於比較不同長度的文檔
+        """
         # 計算情感得分
         sentiment_score = positive_count - negative_count
+        sentiment_total = positive_count + negative_count
+        normalized_score = round(sentiment_score / sentiment_total, 4) if sentiment_total else 0.0
         
         # 確定情感標籤
         if sentiment_score > 0:
@@ -188,16 +944,24 @@ class ChineseTextAnalyzer:
         
         return {
             'sentiment_score': sentiment_score,
+            'normalized_score': normalized_score,
             'sentiment_label': sentiment_label,
             'positive_count': positive_count,
             'negative_count': negative_count
         }
     
-    def generate_summary(self, text, sentence_count=3):
-        """生成文本摘要"""
+    def generate_summary(self, text, sentence_count=3, method='keyword'):
+        """生成文本摘要
+        
+        method 可選:
+            'keyword'  - 按句子包含的關鍵詞數量評分（默認）
+            'textrank' - 以句子間的詞語重疊度建圖，按 TextRank 得分選句
+        選出的句子按其在原文中的位置排序，重複的句子不會被錯排。
+        """
+        doc = self.tokenize(text)
+        
         # 分句
-        sentences = re.split(r'[。！？]', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        sentences = doc.sentences
         
         if not sentences:
             return "無法生成摘要：文本為空或不包含完整句子"
@@ -205,46 +969,108 @@ class ChineseTextAnalyzer:
         if len(sentences) <= sentence_count:
             return '。'.join(sentences) + '。'
         
-        # 提取關鍵詞
-        keywords = jieba.analyse.extract_tags(text, topK=10)
+        # 句子位置 -> 詞語集合的索引
+        sentence_words = self._sentence_word_sets(doc)
         
-        # 根據關鍵詞對句子評分
-        sentence_scores = []
-        for sentence in sentences:
-            score = sum(1 for kw in keywords if kw in sentence)
-            sentence_scores.append((sentence, score))
+        if method == 'textrank':
+            scores = self._textrank_scores(sentence_words)
+        else:
+            # 根據關鍵詞對句子評分
+            vocabulary = self.vocabulary.words
+            keywords = set(vocabulary.get(word) for word, _ in self._tfidf_keywords(doc, top_k=10))
+            scores = [len(keywords & words) for words in sentence_words]
         
-        # 獲取得分最高的句子
-        top_sentences = sorted(sentence_scores, key=lambda x: x[1], reverse=True)[:sentence_count]
+        # 獲取得分最高的句子（同分時位置靠前者優先）
+        ranked = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))[:sentence_count]
+        selected = [i for i in ranked if scores[i] > 0] or ranked
         
-        # 按照原文順序排列句子
-        original_order = sorted(
-            [s for s in top_sentences if s[1] > 0],
-            key=lambda x: sentences.index(x[0])
-        )
+        # 按照原文位置排列句子
+        summary = '。'.join(sentences[i] for i in sorted(selected)) + '。'
+        return summary
+    
+    def _sentence_word_sets(self, doc):
+        """返回每個句子中（過濾後）詞語 ID 的集合，順序與 doc.sentences 一致"""
+        np = _numpy()
+        offsets = np.array(doc.sentence_offsets, dtype=np.int64).reshape(-1, 2)
+        # 過濾後的詞語來自去除標點後的分詞結果，按其在原文中的位置一次查出所有句子的範圍
+        bounds = np.searchsorted(doc.filtered_offsets, offsets).tolist()
+        return [set(doc.filtered_ids[lo:hi].tolist()) for lo, hi in bounds]
+    
+    def _textrank_scores(self, sentence_words, damping=0.85, max_iter=50, tol=1e-6):
+        """計算句子的 TextRank 得分
+        
+        兩個句子的相似度為共同詞語數 / (log|Si| + log|Sj|)。
+        通過詞語到句子的倒排索引只計算至少共享一個詞的句子對，避免枚舉所有句子對。
+        """
+        count = len(sentence_words)
         
-        if not original_order:
-            original_order = top_sentences
+        # 詞語 -> 包含該詞的句子位置
+        postings = {}
+        for i, words in enumerate(sentence_words):
+            for word in words:
+                postings.setdefault(word, []).append(i)
         
-        summary = '。'.join(s[0] for s in original_order) + '。'
-        return summary
+        # 統計句子對的共同詞語數
+        overlaps = Counter()
+        for positions in postings.values():
+            for a in range(len(positions)):
+                for b in range(a + 1, len(positions)):
+                    overlaps[(positions[a], positions[b])] += 1
+        
+        # 構建加權無向圖
+        edges = [[] for _ in range(count)]
+        out_weight = [0.0] * count
+        for (i, j), overlap in overlaps.items():
+            norm = math.log(len(sentence_words[i])) + math.log(len(sentence_words[j]))
+            if norm <= 0:
+                continue
+            weight = overlap / norm
+            edges[i].append((j, weight))
+            edges[j].append((i, weight))
+            out_weight[i] += weight
+            out_weight[j] += weight
+        
+        # 冪迭代
+        scores = [1.0] * count
+        for _ in range(max_iter):
+            new_scores = [
+                (1 - damping) + damping * sum(
+                    weight / out_weight[j] * scores[j] for j, weight in edges[i]
+                )
+                for i in range(count)
+            ]
+            delta = max(abs(a - b) for a, b in zip(new_scores, scores))
+            scores = new_scores
+            if delta < tol:
+                break
+        
+        # 與其他句子沒有任何關聯的句子不參與排名
+        return [score if edges[i] else 0.0 for i, score in enumerate(scores)]
     
     def extract_ngrams(self, text, n=2):
         """提取文本中的n-gram詞組"""
-        words = [word for word, _ in self.preprocess_text(text)]
-        
-        if len(words) < n:
-            return Counter()
-        
-        ngrams = []
-        for i in range(len(words) - n + 1):
-            ngrams.append(''.join(words[i:i+n]))
+        return self._ngram_counts(self.tokenize(text).filtered_ids, n)
+    
+    def _ngram_counts(self, ids, n):
+        """統計詞語 ID 數組中的 n-gram，返回以拼接後的詞組為鍵、按首次出現順序排列的 Counter"""
+        ngrams = Counter()
+        if len(ids) < n:
+            return ngrams
         
-        return Counter(ngrams)
+        # 所有長度為 n 的窗口（不複製數據），按行找出不同的 n-gram 及其次數
+        np = _numpy()
+        windows = np.lib.stride_tricks.sliding_window_view(ids, n)
+        unique, first, counts = np.unique(windows, axis=0, return_index=True, return_counts=True)
+        order = np.argsort(first)
+        words = self.vocabulary.words.words
+        # 不同的詞語組合可能拼接出相同的詞組，因此按詞組累加
+        for row, count in zip(unique[order].tolist(), counts[order].tolist()):
+            ngrams[''.join([words[i] for i in row])] += count
+        return ngrams
     
     def extract_entities(self, text):
         """提取命名實體（人名、地名、機構名等）"""
-        words = pseg.cut(text)
+        doc = self.tokenize(text)
         
         entities = {
             'person': [],      # 人名
@@ -258,11 +1084,18 @@ class ChineseTextAnalyzer:
             'nt': 'organization'
         }
         
-        for word, flag in words:
-            if flag in pos_mapping and len(word) > 1:
-                entities[pos_mapping[flag]].append(word)
+        # 只逐個檢查詞性為實體類型的位置
+        np = _numpy()
+        flags = self.vocabulary.flags
+        words = self.vocabulary.words.words
+        flag_types = {flags.get(flag): entity_type for flag, entity_type in pos_mapping.items() if flag in flags}
+        positions = np.flatnonzero(np.isin(doc.flag_ids, list(flag_types)))
+        for word_id, flag_id in zip(doc.word_ids[positions].tolist(), doc.flag_ids[positions].tolist()):
+            word = words[word_id]
+            if len(word) > 1:
+                entities[flag_types[flag_id]].append(word)
         
-        return {k: list(Counter(v).keys()) for k, v in entities.items()}
+        return {k: list(dict.fromkeys(v)) for k, v in entities.items()}
     
     def convert_text(self, text, to_traditional=True):
         """繁簡體中文轉換"""
@@ -280,7 +1113,57 @@ class ChineseTextAnalyzer:
         chinese_chars = re.findall(r'[\u4e00-\u9fff]', text)
         return len(chinese_chars)
     
+    def character_statistics(self, text):
+        """計算文本的字符統計信息（總字符數、中文字符數及比例）"""
+        total_chars = len(text)
+        chinese_chars = self.count_chinese_characters(text)
+        return {
+            'total_characters': total_chars,
+            'chinese_characters': chinese_chars,
+            'chinese_character_ratio': round(chinese_chars / total_chars * 100, 2) if total_chars else 0
+        }
+    
     def keyword_extraction(self, text, top_k=20):
         """提取文本關鍵詞"""
-        keywords = jieba.analyse.extract_tags(text, topK=top_k, withWeight=True)
-        return {word: float(weight) for word, weight in keywords}
\ No newline at end of file
+        keywords = self._tfidf_keywords(self.tokenize(text), top_k=top_k)
+        return {word: float(weight) for word, weight in keywords}
+    
+    def _tfidf_keywords(self, doc, top_k=20):
+        """基於已有分詞結果計算 TF-IDF 關鍵詞
+        
+        與 jieba.analyse.extract_tags 使用相同的停用詞和 IDF 表（設置了 idf_table 時使用該表和 word_frequency 的詞語），但不再重新分詞
+        """
+        return self._score_tfidf(self._keyword_candidates(doc), top_k=top_k)
+    
+    def _keyword_candidates(self, doc):
+        """統計可作為關鍵詞的詞語的詞頻
+        
+        使用 jieba 內置的 IDF 表時，候選詞為長度至少為2且不在 jieba 停用詞表中的詞語（與 extract_tags 相同）；
+        設置了語料庫 IDF 表時，候選詞與 word_frequency 相同（即去除分析器停用詞後的詞語），
+        與 corpus_tfidf 統計文檔頻率時使用的詞語一致，表中沒有的停用詞不會以 median_idf 排到前面
+        """
+        words = self.vocabulary.words.words
+        if self.idf_table is not None:
+            word_ids, counts, _ = _count_ids(doc.filtered_ids)
+            return Counter(dict(zip([words[i] for i in word_ids.tolist()], counts.tolist())))
+        stop_words = _default_tfidf().stop_words
+        word_ids, counts, _ = _count_ids(doc.word_ids)
+        return Counter({
+            words[word_id]: count
+            for word_id, count in zip(word_ids.tolist(), counts.tolist())
+            if len(words[word_id].strip()) >= 2 and words[word_id].lower() not in stop_words
+        })
+    
+    def _score_tfidf(self, freq, top_k=20):
+        """根據詞頻和 IDF 表計算 TF-IDF 權重，返回按權重降序排列的 (word, weight) 列表"""
+        tfidf = self.idf_table if self.idf_table is not None else _default_tfidf()
+        total = sum(freq.values())
+        if not total:
+            return []
+        
+        weights = [
+            (word, count * tfidf.idf_freq.get(word, tfidf.median_idf) / total)
+            for word, count in freq.items()
+        ]
+        weights.sort(key=lambda x: x[1], reverse=True)
+        return weights[:top_k] if top_k else weights
\ No newline at end of file
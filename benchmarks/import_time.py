@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+啟動時間基準測試
+
+在全新的 Python 進程中導入命令行入口模塊，測量導入耗時，並確認繪圖庫等重型依賴沒有被提前載入。
+任一檢查失敗時以非零狀態碼退出，可直接用於持續集成中防止啟動時間退化。
+
+用法:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --modules main,menu --repeat 5 --limit 1.0
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只應在生成圖表或提取關鍵詞時才載入的模塊
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'wordcloud', 'numpy', 'pandas', 'visualization', 'jieba.analyse']
+
+# 子進程中執行的腳本：導入模塊並輸出耗時和已載入的重型模塊
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure_import(module, repeat=3):
+    """在新進程中導入模塊 repeat 次，返回 (耗時中位數, 提前載入的重型模塊列表)"""
+    timings = []
+    loaded = set()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['elapsed'])
+        loaded.update(result['loaded'])
+    return statistics.median(timings), sorted(loaded)
+
+def main():
+    parser = argparse.ArgumentParser(description='測量命令行入口的導入耗時')
+    parser.add_argument('--modules', default='main,menu', help='要測量的模塊，逗號分隔')
+    parser.add_argument('--repeat', type=int, default=3, help='每個模塊的測量次數（取中位數）')
+    parser.add_argument('--limit', type=float, default=1.0, help='導入耗時上限（秒）')
+
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules.split(','):
+        elapsed, loaded = measure_import(module, args.repeat)
+        status = 'OK'
+        if elapsed > args.limit:
+            status = f'超過上限 {args.limit:.2f}s'
+            failed = True
+        if loaded:
+            status = f'提前載入了 {", ".join(loaded)}'
+            failed = True
+        print(f"import {module}: {elapsed:.3f}s  {status}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
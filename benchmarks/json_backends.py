@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 序列化後端基準測試
+
+構造一個包含大量不同詞語的分析結果（或讀取已有的結果 JSON 文件），
+分別用標準庫和 orjson 後端以緊湊和縮進模式編碼，比較耗時並確認兩者輸出逐字節相同。
+輸出不一致時以非零狀態碼退出。
+
+用法:
+    python benchmarks/json_backends.py
+    python benchmarks/json_backends.py --words 500000 --repeat 5
+    python benchmarks/json_backends.py --input results/sample.json
+"""
+
+import os
+import sys
+import random
+import argparse
+import statistics
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_serializer
+
+# 構造詞語用的常用漢字
+CHARACTERS = '的一是在不了有和人這中大為上個國我以要他時來用們生到作地於出就分對成會可主發年動同工也能下過子說產種面而方後多定行學法所民得經十三之進著等部度家電力裡如水化高自二理起小物現實加量都兩體制機當使點從業本去把性好應開它合還因由其些然前外天政四日那社義事平形相全表間樣與關各重新線內數正心反你明看原又麼利比或但質氣第向道命此變條只沒結解問意建月公無系軍很情者最立代想已通並提直題黨程展五果料象員革位入常文總次品式活設及管特件長求老頭基資邊流路級少圖山統接知較將組見計別她手角期根論運農指幾九區強放決西被幹做必戰先回則任取據處府研質'
+POS_TAGS = ['n', 'v', 'a', 'd', 'nr', 'ns', 'nt', 'vn', 'an', 'eng', 'm', 'q']
+
+def synthetic_result(num_words, seed=0):
+    """構造一個有 num_words 個不同詞語的完整分析結果"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < num_words:
+        words.add(''.join(rng.choice(CHARACTERS) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    word_frequency = {word: rng.randint(1, 5000) for word in words}
+    pos_word_mapping = {}
+    for word in words:
+        pos_word_mapping.setdefault(rng.choice(POS_TAGS), []).append(word)
+    return {
+        'text_stats': {'total_chars': num_words * 40, 'total_words': num_words * 12,
+                       'unique_words': num_words, 'avg_word_length': 2.87, 'lexical_diversity': 0.0833},
+        'word_frequency': word_frequency,
+        'pos_frequency': {tag: len(pos_word_mapping.get(tag, [])) for tag in POS_TAGS},
+        'pos_word_mapping': pos_word_mapping,
+        'keywords': {word: rng.random() for word in words[:200]},
+        'sentiment': {'score': 0.62, 'positive': 0.7, 'negative': 0.08},
+        'entities': {'person': words[:50], 'location': words[50:100]}
+    }
+
+def measure(func, repeat):
+    """返回 repeat 次運行的耗時中位數（秒）"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON 序列化後端基準測試')
+    parser.add_argument('--input', help='分析結果 JSON 文件（默認使用構造的數據）')
+    parser.add_argument('--words', type=int, default=200000, help='構造數據中的不同詞語數')
+    parser.add_argument('--repeat', type=int, default=3, help='每項測試的重複次數')
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, 'rb') as f:
+            result = json_serializer.load(f)
+    else:
+        result = synthetic_result(args.words)
+
+    backends = json_serializer.available_backends()
+    if 'orjson' not in backends:
+        print("未安裝 orjson，只測試標準庫後端（pip install orjson）")
+
+    failed = False
+    for pretty in (False, True):
+        mode = '縮進' if pretty else '緊湊'
+        outputs = {}
+        for backend in backends:
+            outputs[backend] = json_serializer.dumps(result, pretty, backend)
+            elapsed = measure(lambda: json_serializer.dumps(result, pretty, backend), args.repeat)
+            print(f"{mode} {backend:<7} {elapsed * 1000:9.1f} ms  {len(outputs[backend]) / 1024 / 1024:.1f} MB")
+        if len(set(outputs.values())) > 1:
+            print(f"{mode}模式下各後端的輸出不一致")
+            failed = True
+
+    if not failed:
+        print("各後端輸出逐字節相同")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+語料庫列式導出（Parquet / Arrow IPC）
+
+把批量分析的結果展開為長格式表，供分析引擎直接載入：
+    words:    (doc_id, word, count)
+    pos:      (doc_id, pos, count)
+    keywords: (doc_id, keyword, weight)
+    entities: (doc_id, entity_type, entity)
+每個文件的結果只追加到各表的列緩衝區中，累積到 row_group_size 行時寫出一個行組，
+內存佔用與語料庫大小無關，也不需要為每個文件建立 pandas DataFrame。
+"""
+
+import os
+
+FORMAT_SUFFIXES = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# 默認每個行組的行數
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+
+def _pyarrow():
+    """導入可選依賴 pyarrow"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("列式導出需要安裝 pyarrow: pip install pyarrow")
+    return pyarrow
+
+def _table_schemas(pa):
+    """各表的列定義"""
+    return {
+        'words': pa.schema([('doc_id', pa.string()), ('word', pa.string()), ('count', pa.int64())]),
+        'pos': pa.schema([('doc_id', pa.string()), ('pos', pa.string()), ('count', pa.int64())]),
+        'keywords': pa.schema([('doc_id', pa.string()), ('keyword', pa.string()), ('weight', pa.float64())]),
+        'entities': pa.schema([('doc_id', pa.string()), ('entity_type', pa.string()), ('entity', pa.string())])
+    }
+
+class ColumnarExporter:
+    """按行組把語料庫的長格式表寫入 Parquet 或 Arrow IPC 文件"""
+    def __init__(self, output_dir, format='parquet', prefix='corpus', row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        """
+        Args:
+            output_dir: 輸出目錄，每個表寫入 {prefix}_{表名}.parquet / .arrow
+            format: 'parquet' 或 'arrow'
+            prefix: 文件名前綴
+            row_group_size: 每個行組（Arrow 為記錄批次）的行數
+        """
+        if format not in FORMAT_SUFFIXES:
+            raise ValueError(f"不支持的列式格式: {format}，可選: parquet, arrow")
+        self._pa = _pyarrow()
+        self.output_dir = output_dir
+        self.format = format
+        self.prefix = prefix
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._schemas = _table_schemas(self._pa)
+        self._columns = {name: {field.name: [] for field in schema} for name, schema in self._schemas.items()}
+        self._writers = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def path_for(self, table):
+        """返回表的輸出文件路徑"""
+        return os.path.join(self.output_dir, f"{self.prefix}_{table}{FORMAT_SUFFIXES[self.format]}")
+
+    @property
+    def paths(self):
+        return [self.path_for(table) for table in self._schemas]
+
+    def _extend(self, table, doc_id, items):
+        columns = self._columns[table]
+        names = list(columns)
+        start = len(columns['doc_id'])
+        for key, value in items:
+            columns[names[1]].append(key)
+            columns[names[2]].append(value)
+        columns['doc_id'].extend([doc_id] * (len(columns[names[1]]) - start))
+        if len(columns['doc_id']) >= self.row_group_size:
+            self._flush(table)
+
+    def write(self, doc_id, result):
+        """追加一個文件的分析結果；分析失敗的文件（包含 'error' 的結果）不寫入，也不計入 count"""
+        if 'error' in result:
+            return
+        self._extend('words', doc_id, result.get('word_frequency', {}).items())
+        self._extend('pos', doc_id, result.get('pos_frequency', {}).items())
+        self._extend('keywords', doc_id, result.get('keywords', {}).items())
+        self._extend('entities', doc_id, (
+            (entity_type, entity)
+            for entity_type, entity_list in result.get('entities', {}).items()
+            for entity in entity_list
+        ))
+        self.count += 1
+
+    def _writer(self, table):
+        writer = self._writers.get(table)
+        if writer is None:
+            schema = self._schemas[table]
+            if self.format == 'parquet':
+                import pyarrow.parquet as pq
+                writer = pq.ParquetWriter(self.path_for(table), schema)
+            else:
+                import pyarrow.ipc as ipc
+                writer = ipc.new_file(self.path_for(table), schema)
+            self._writers[table] = writer
+        return writer
+
+    def _flush(self, table):
+        """把表的緩衝區寫出為一個行組"""
+        columns = self._columns[table]
+        if not columns['doc_id']:
+            return
+        batch = self._pa.table(columns, schema=self._schemas[table])
+        writer = self._writer(table)
+        if self.format == 'parquet':
+            writer.write_table(batch, row_group_size=self.row_group_size)
+        else:
+            writer.write_table(batch, max_chunksize=self.row_group_size)
+        for values in columns.values():
+            values.clear()
+
+    def close(self):
+        """寫出剩餘的數據並關閉所有文件；沒有數據的表也會寫出空文件"""
+        for table in self._schemas:
+            self._flush(table)
+            self._writer(table).close()
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+語料庫統計匯總
+
+把每個文件的分析結果累加到整個語料庫的總計中，而不是在內存中保留每個文件的結果字典：
+    words:    詞頻（word_frequency）
+    pos:      詞性頻率（pos_frequency）
+    ngrams:   N-gram 頻率（ngrams）
+    entities: 各類命名實體（entities），按出現的文件數計數
+每張計數表由一個 Vocabulary（詞語 -> 整數 ID）和以 ID 為下標的 NumPy 計數數組組成，
+同時記錄總次數和出現的文件數。不同進程或機器產生的部分匯總可以通過 merge() 合併，
+也可以用 save() 寫入 .npz 文件後在其他地方 load() 再合併。
+
+用法:
+    python corpus_aggregator.py merge -o total.npz part1.npz part2.npz
+    python corpus_aggregator.py summary total.npz --top 20
+"""
+
+import argparse
+import numpy as np
+import json_serializer
+from vocabulary import Vocabulary
+
+# 匯總文件格式的版本號
+AGGREGATE_VERSION = 1
+
+# 各計數表對應的分析結果字段
+COUNT_FIELDS = {
+    'words': 'word_frequency',
+    'pos': 'pos_frequency',
+    'ngrams': 'ngrams'
+}
+
+class CountTable:
+    """以整數 ID 為下標的計數表，記錄每個詞語的總次數和出現的文件數"""
+    def __init__(self, vocab=None, counts=None, doc_counts=None):
+        self.vocab = vocab if vocab is not None else Vocabulary()
+        self._counts = counts if counts is not None else np.zeros(1024, dtype=np.int64)
+        self._doc_counts = doc_counts if doc_counts is not None else np.zeros(len(self._counts), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.vocab)
+
+    @property
+    def counts(self):
+        """按 ID 排列的總次數"""
+        return self._counts[:len(self.vocab)]
+
+    @property
+    def doc_counts(self):
+        """按 ID 排列的出現文件數"""
+        return self._doc_counts[:len(self.vocab)]
+
+    def _reserve(self, size):
+        """確保計數數組至少有 size 個元素（按倍數擴容）"""
+        capacity = len(self._counts)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2)
+        for name in ('_counts', '_doc_counts'):
+            grown = np.zeros(capacity, dtype=np.int64)
+            old = getattr(self, name)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def _add_ids(self, ids, counts, doc_counts):
+        self._reserve(len(self.vocab))
+        # 同一次調用中的 ID 互不重複，可以直接用花式索引累加
+        self._counts[ids] += counts
+        self._doc_counts[ids] += doc_counts
+
+    def add(self, mapping):
+        """累加一個文件的計數 {word: count}，每個詞語的出現文件數加 1，返回各詞語的 ID 數組"""
+        if not mapping:
+            return np.zeros(0, dtype=np.int64)
+        ids = np.array(self.vocab.ids(mapping), dtype=np.int64)
+        counts = np.fromiter(mapping.values(), dtype=np.int64, count=len(mapping))
+        self._add_ids(ids, counts, 1)
+        return ids
+
+    def add_items(self, items):
+        """累加一個文件中出現的詞語（每個詞語計 1 次），重複的詞語只計一次"""
+        self.add(dict.fromkeys(items, 1))
+
+    def merge(self, other):
+        """把另一個計數表合併到本表中"""
+        if not len(other):
+            return
+        ids = np.array(self.vocab.ids(other.vocab.words), dtype=np.int64)
+        self._add_ids(ids, other.counts, other.doc_counts)
+
+    def get(self, word):
+        """返回詞語的 (總次數, 出現文件數)"""
+        word_id = self.vocab.get(word)
+        if word_id is None:
+            return 0, 0
+        return int(self._counts[word_id]), int(self._doc_counts[word_id])
+
+    def top(self, n=None, by='count'):
+        """返回計數最高的 n 個詞語 [(word, count), ...]，同分時先出現的詞語優先
+
+        by 為 'count' 時按總次數排序，為 'docs' 時按出現文件數排序
+        """
+        if n is not None and n <= 0:
+            return []
+        values = self.counts if by == 'count' else self.doc_counts
+        size = len(values)
+        if n is None or n >= size:
+            ids = np.arange(size)
+        else:
+            # 先用 argpartition 選出候選，只對候選排序
+            ids = np.argpartition(-values, n - 1)[:n]
+            # 與第 n 名同分的詞語也納入候選，保證同分時按 ID 排序的結果穩定
+            ids = np.union1d(ids, np.flatnonzero(values == values[ids].min()))
+        order = np.lexsort((ids, -values[ids]))
+        words = self.vocab.words
+        return [(words[i], int(values[i])) for i in ids[order][:n]]
+
+    def to_dict(self, n=None, by='count'):
+        """返回 {word: count}，按計數降序排列"""
+        return dict(self.top(n, by))
+
+class CorpusAggregator:
+    """整個語料庫的詞頻、詞性、N-gram 和實體統計"""
+    def __init__(self):
+        self.documents = 0
+        self.total_words = 0
+        self.tables = {name: CountTable() for name in COUNT_FIELDS}
+        self.entities = {}
+
+    @property
+    def words(self):
+        return self.tables['words']
+
+    @property
+    def pos(self):
+        return self.tables['pos']
+
+    @property
+    def ngrams(self):
+        return self.tables['ngrams']
+
+    def add(self, result):
+        """累加一個文件的分析結果（analyze_text 或 full_analysis 的輸出），出錯的結果會被忽略"""
+        if 'error' in result:
+            return
+        for name, field in COUNT_FIELDS.items():
+            self.tables[name].add(result.get(field))
+        for entity_type, entity_list in result.get('entities', {}).items():
+            self._entity_table(entity_type).add_items(entity_list)
+        self.documents += 1
+        self.total_words += result.get('total_words', 0)
+
+    def _entity_table(self, entity_type):
+        table = self.entities.get(entity_type)
+        if table is None:
+            table = self.entities[entity_type] = CountTable()
+        return table
+
+    def merge(self, other):
+        """把另一個（例如其他進程或機器產生的）部分匯總合併到本匯總中"""
+        for name, table in other.tables.items():
+            self.tables[name].merge(table)
+        for entity_type, table in other.entities.items():
+            self._entity_table(entity_type).merge(table)
+        self.documents += other.documents
+        self.total_words += other.total_words
+        return self
+
+    def summary(self, top_n=50):
+        """返回可直接導出為 JSON 的統計摘要"""
+        return {
+            'documents': self.documents,
+            'total_words': self.total_words,
+            'vocabulary_size': len(self.words),
+            'word_frequency': self.words.to_dict(top_n),
+            'document_frequency': self.words.to_dict(top_n, by='docs'),
+            'pos_frequency': self.pos.to_dict(),
+            'ngrams': self.ngrams.to_dict(top_n),
+            'entities': {
+                entity_type: table.to_dict(top_n, by='docs')
+                for entity_type, table in self.entities.items()
+            }
+        }
+
+    def _all_tables(self):
+        tables = dict(self.tables)
+        for entity_type, table in self.entities.items():
+            tables[f'entities.{entity_type}'] = table
+        return tables
+
+    def save(self, path):
+        """保存為 .npz 文件（不使用 pickle，詞彙表以 JSON 字節保存）"""
+        arrays = {}
+        meta = {'version': AGGREGATE_VERSION, 'documents': self.documents,
+                'total_words': self.total_words, 'tables': []}
+        for name, table in self._all_tables().items():
+            meta['tables'].append(name)
+            arrays[f'{name}.vocab'] = np.frombuffer(json_serializer.dumps(table.vocab.words), dtype=np.uint8)
+            arrays[f'{name}.counts'] = table.counts
+            arrays[f'{name}.doc_counts'] = table.doc_counts
+        arrays['meta'] = np.frombuffer(json_serializer.dumps(meta), dtype=np.uint8)
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """讀取 save() 保存的匯總"""
+        aggregator = cls()
+        with np.load(path, allow_pickle=False) as data:
+            meta = json_serializer.loads(data['meta'].tobytes())
+            if meta.get('version') != AGGREGATE_VERSION:
+                raise ValueError(f"不支持的匯總文件版本: {meta.get('version')}")
+            aggregator.documents = meta['documents']
+            aggregator.total_words = meta['total_words']
+            for name in meta['tables']:
+                table = CountTable(
+                    Vocabulary(json_serializer.loads(data[f'{name}.vocab'].tobytes())),
+                    data[f'{name}.counts'].astype(np.int64),
+                    data[f'{name}.doc_counts'].astype(np.int64)
+                )
+                if name.startswith('entities.'):
+                    aggregator.entities[name[len('entities.'):]] = table
+                else:
+                    aggregator.tables[name] = table
+        return aggregator
+
+def main():
+    parser = argparse.ArgumentParser(description='合併和查看語料庫統計匯總')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    merge_parser = subparsers.add_parser('merge', help='合併多個部分匯總')
+    merge_parser.add_argument('parts', nargs='+', help='部分匯總文件（.npz）')
+    merge_parser.add_argument('--output', '-o', required=True, help='合併後的匯總文件路徑')
+
+    summary_parser = subparsers.add_parser('summary', help='輸出匯總的統計摘要（JSON）')
+    summary_parser.add_argument('path', help='匯總文件（.npz）')
+    summary_parser.add_argument('--top', type=int, default=20, help='每項統計顯示的詞語數')
+
+    args = parser.parse_args()
+
+    if args.command == 'merge':
+        total = CorpusAggregator()
+        for part in args.parts:
+            total.merge(CorpusAggregator.load(part))
+        total.save(args.output)
+        print(f"已合併 {len(args.parts)} 個匯總（共 {total.documents} 個文件）到: {args.output}")
+    else:
+        aggregator = CorpusAggregator.load(args.path)
+        print(json_serializer.dumps(aggregator.summary(args.top), pretty=True).decode('utf-8'))
+
+if __name__ == "__main__":
+    main()
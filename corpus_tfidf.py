@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+語料庫 TF-IDF
+
+jieba 的關鍵詞提取使用其內置的通用 IDF 表。本模塊在一次遍歷中統計本批文檔的文檔頻率，
+生成語料庫自己的 IDF 表，並以 jieba 的 IDF 文件格式（每行「詞語 IDF」）保存，
+之後的分析可以用 ChineseTextAnalyzer(idf_path=...) 按該表提取領域相關的關鍵詞。
+詞頻直接取自分析結果中的 word_frequency，不需要重新分詞。
+
+整批文檔的 TF-IDF 矩陣以 CSR 格式的稀疏數組保存（文檔 x 詞語），
+文件格式與 scipy.sparse.save_npz 相同，可用 scipy.sparse.load_npz 直接讀取。
+
+用法:
+    python corpus_tfidf.py build results/results.jsonl --idf corpus_idf.txt --matrix tfidf_matrix.npz
+"""
+
+import os
+import hashlib
+import argparse
+import statistics
+import numpy as np
+import json_serializer
+from corpus_aggregator import CountTable
+from jsonl_exporter import iter_jsonl
+
+class IdfTable:
+    """IDF 表，提供與 jieba TFIDF 對象相同的 idf_freq 和 median_idf 屬性"""
+    def __init__(self, idf_freq, median_idf=None):
+        self.idf_freq = idf_freq
+        if median_idf is None:
+            median_idf = statistics.median(idf_freq.values()) if idf_freq else 0.0
+        self.median_idf = median_idf
+        self._fingerprint = None
+
+    def __len__(self):
+        return len(self.idf_freq)
+
+    @classmethod
+    def load(cls, path):
+        """讀取 jieba 格式的 IDF 文件"""
+        idf_freq = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().rsplit(' ', 1)
+                if len(parts) == 2:
+                    idf_freq[parts[0]] = float(parts[1])
+        return cls(idf_freq)
+
+    def save(self, path):
+        """以 jieba 的 IDF 文件格式保存（包含空白字符的詞語無法用該格式表示，會被略過）"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for word, idf in self.idf_freq.items():
+                if word and not any(c.isspace() for c in word):
+                    f.write(f"{word} {idf:.9f}\n")
+        os.replace(tmp_path, path)
+
+    def fingerprint(self):
+        """IDF 表內容的哈希，用於結果緩存的失效判斷"""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for word, idf in self.idf_freq.items():
+                digest.update(f"{word} {idf:.9f}\n".encode('utf-8'))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+class CorpusTfidf:
+    """逐個加入文檔的詞頻，統計文檔頻率並累積稀疏的詞頻矩陣"""
+    def __init__(self):
+        self.table = CountTable()
+        self.doc_ids = []
+        self._indices = []
+        self._counts = []
+        self._row_lengths = []
+        # _indices 和 _counts 開頭已合併的塊數
+        self._blocks = 0
+
+    @property
+    def documents(self):
+        return len(self.doc_ids)
+
+    @property
+    def vocab(self):
+        return self.table.vocab
+
+    def add(self, doc_id, term_counts):
+        """加入一個文檔的詞頻 {word: count}（例如分析結果中的 word_frequency）"""
+        ids = self.table.add(term_counts)
+        self.doc_ids.append(doc_id)
+        self._indices.append(ids.astype(np.int32))
+        self._counts.append(np.fromiter(term_counts.values(), dtype=np.int32, count=len(term_counts)))
+        self._row_lengths.append(len(ids))
+        # 每 1024 個文檔的小數組合併為一塊，避免為每個文檔保留一個 NumPy 對象；
+        # 只合併尚未合併的部分，已合併的塊不再複製，總耗時與文檔數成線性
+        if len(self._indices) - self._blocks >= 1024:
+            self._indices[self._blocks:] = [np.concatenate(self._indices[self._blocks:])]
+            self._counts[self._blocks:] = [np.concatenate(self._counts[self._blocks:])]
+            self._blocks += 1
+
+    def idf_values(self):
+        """按詞語 ID 排列的平滑 IDF：ln((1 + N) / (1 + df)) + 1
+
+        平滑後出現在所有文檔中的詞語 IDF 為 1 而不是 0，只有一個文檔時也能得到非零權重
+        """
+        return np.log((1 + self.documents) / (1 + self.table.doc_counts)) + 1
+
+    def idf(self):
+        """返回本語料庫的 IdfTable"""
+        return IdfTable(dict(zip(self.vocab.words, self.idf_values().tolist())))
+
+    def _csr(self):
+        """返回詞頻矩陣的 CSR 數組 (counts, indices, indptr)"""
+        indptr = np.zeros(len(self._row_lengths) + 1, dtype=np.int64)
+        np.cumsum(self._row_lengths, out=indptr[1:])
+        if not self._indices:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), indptr
+        return np.concatenate(self._counts), np.concatenate(self._indices), indptr
+
+    def weights(self, idf=None):
+        """計算 TF-IDF 矩陣的 CSR 數組 (data, indices, indptr)
+
+        TF 為詞頻除以文檔的總詞數（與 jieba 相同）；idf 為 IdfTable 時使用該表，
+        不在表中的詞語使用其 median_idf，默認使用本語料庫的 IDF
+        """
+        counts, indices, indptr = self._csr()
+        if idf is None:
+            idf_values = self.idf_values()
+        else:
+            idf_values = np.array([idf.idf_freq.get(word, idf.median_idf) for word in self.vocab.words])
+        rows = np.repeat(np.arange(self.documents), np.diff(indptr))
+        totals = np.bincount(rows, weights=counts, minlength=self.documents)
+        data = counts / totals[rows] * idf_values[indices]
+        return data, indices, indptr
+
+    def save_matrix(self, path, idf=None):
+        """保存 TF-IDF 矩陣（scipy.sparse.save_npz 格式），同時保存詞語和文檔標識"""
+        data, indices, indptr = self.weights(idf)
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f, format=np.array(b'csr'), shape=np.array([self.documents, len(self.vocab)]),
+                data=data, indices=indices, indptr=indptr,
+                vocabulary=np.frombuffer(json_serializer.dumps(self.vocab.words), dtype=np.uint8),
+                doc_ids=np.frombuffer(json_serializer.dumps(self.doc_ids), dtype=np.uint8)
+            )
+
+    def matrix(self, idf=None):
+        """返回 scipy.sparse.csr_matrix 形式的 TF-IDF 矩陣"""
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError("稀疏矩陣需要安裝 scipy: pip install scipy")
+        data, indices, indptr = self.weights(idf)
+        return csr_matrix((data, indices, indptr), shape=(self.documents, len(self.vocab)))
+
+    def keywords(self, top_k=20, idf=None):
+        """逐個產出 (doc_id, {keyword: weight})，按權重降序排列"""
+        data, indices, indptr = self.weights(idf)
+        words = self.vocab.words
+        for row, doc_id in enumerate(self.doc_ids):
+            start, end = indptr[row], indptr[row + 1]
+            row_weights = data[start:end]
+            order = np.argsort(-row_weights, kind='stable')[:top_k]
+            yield doc_id, {
+                words[word_id]: weight
+                for word_id, weight in zip(indices[start:end][order].tolist(), row_weights[order].tolist())
+            }
+
+def main():
+    parser = argparse.ArgumentParser(description='從 JSONL 分析結果生成語料庫 IDF 表和 TF-IDF 矩陣')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='統計文檔頻率並生成 IDF 表')
+    build_parser.add_argument('inputs', nargs='+', help='JSONL 結果文件（jsonl 格式導出，可為 .gz 或 .zst）')
+    build_parser.add_argument('--idf', required=True, help='IDF 表的輸出路徑（jieba 格式）')
+    build_parser.add_argument('--matrix', help='TF-IDF 稀疏矩陣的輸出路徑（.npz）')
+
+    args = parser.parse_args()
+
+    corpus = CorpusTfidf()
+    for path in args.inputs:
+        for record in iter_jsonl(path):
+            if 'error' not in record:
+                corpus.add(record.get('doc_id'), record.get('word_frequency', {}))
+
+    corpus.idf().save(args.idf)
+    print(f"已從 {corpus.documents} 個文件生成 IDF 表（{len(corpus.vocab)} 個詞語）: {args.idf}")
+    if args.matrix:
+        corpus.save_matrix(args.matrix)
+        print(f"已保存 TF-IDF 矩陣: {args.matrix}")
+
+if __name__ == "__main__":
+    main()
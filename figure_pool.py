@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+基於 Agg 後端面向對象接口的 Figure 重用池
+
+圖表直接在 matplotlib.figure.Figure 上繪製，不經過 pyplot 的全局狀態機，
+因此可以在多個線程中同時繪圖。用完的 Figure 清空後按尺寸放回池中供下次使用，
+避免每張圖表都重新建立 Figure、畫布和佈局引擎。
+佈局由 constrained 佈局引擎在保存時一次完成，不再需要 tight_layout 和 bbox_inches='tight' 的額外繪製。
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+import matplotlib
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+class FigurePool:
+    """按尺寸分組的 Figure 重用池（線程安全）
+
+    每次通過 figure() 取得的 Figure 由調用者獨佔，使用完畢後自動清空並放回池中。
+    """
+    def __init__(self, max_per_size=4):
+        # 每種尺寸最多保留的空閒 Figure 數量
+        self.max_per_size = max_per_size
+        self._free = {}
+        self._lock = threading.Lock()
+
+    def _new_figure(self, figsize):
+        fig = Figure(figsize=figsize, layout='constrained')
+        FigureCanvasAgg(fig)
+        return fig
+
+    @contextmanager
+    def figure(self, figsize):
+        """取得一個指定尺寸的空白 Figure"""
+        figsize = tuple(figsize)
+        with self._lock:
+            free = self._free.get(figsize)
+            fig = free.pop() if free else None
+        if fig is None:
+            fig = self._new_figure(figsize)
+        try:
+            yield fig
+        finally:
+            fig.clear()
+            with self._lock:
+                free = self._free.setdefault(figsize, [])
+                if len(free) < self.max_per_size:
+                    free.append(fig)
+
+    @contextmanager
+    def axes(self, figsize):
+        """取得一個只包含單個 Axes 的 Figure，返回 (fig, ax)"""
+        with self.figure(figsize) as fig:
+            yield fig, fig.add_subplot()
+
+    def clear(self):
+        """釋放池中所有空閒的 Figure"""
+        with self._lock:
+            self._free.clear()
+
+def save_figure(fig, save_path, dpi=300):
+    """保存 Figure，必要時先建立目錄"""
+    directory = os.path.dirname(os.path.abspath(save_path))
+    os.makedirs(directory, exist_ok=True)
+    fig.savefig(save_path, dpi=dpi)
+
+def use_fast_style():
+    """全局啟用 matplotlib 'fast' 樣式的路徑簡化設置
+
+    只在初始化時設置一次，代替每張圖表都進入 plt.style.context('fast')（修改全局 rcParams，並非線程安全）
+    """
+    matplotlib.rcParams.update(matplotlib.style.library['fast'])
@@ -1,10 +1,23 @@
 # -*- coding: utf-8 -*-
 import os
-import json
 import csv
+import codecs
 import shutil
+import json_serializer
+
+# 分塊讀取時用作切分點的句末字符
+SENTENCE_ENDINGS = '。！？!?\n'
+
+# 各種緩存（分詞器、詞雲佈局等）的默認目錄，可通過環境變量 CHINESE_TEXT_ANALYZER_CACHE 修改
+DEFAULT_CACHE_DIR = os.environ.get(
+    'CHINESE_TEXT_ANALYZER_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'chinese_text_analyzer')
+)
 
 class FileUtils:
+    # 流式讀取大文件時每塊的默認字符數
+    DEFAULT_CHUNK_SIZE = 1024 * 1024
+    
     @staticmethod
     def read_file(file_path, encoding='utf-8'):
         """讀取文本文件"""
@@ -15,11 +28,60 @@ class FileUtils:
             with open(file_path, 'r', encoding='gbk') as f:
                 return f.read()
     
+    @staticmethod
+    def guess_encoding(file_path, encoding='utf-8', block_size=1024 * 1024):
+        """判斷應使用 encoding 還是 gbk 讀取文件（與 read_file 的回退規則一致）
+
+        逐塊解碼整個文件進行檢查，避免文件開頭可以解碼、後面才出現無法解碼的字節時，
+        流式讀取到一半才拋出 UnicodeDecodeError。
+        """
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(block_size), b''):
+                    decoder.decode(block)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return 'gbk'
+        return encoding
+    
+    @staticmethod
+    def iter_text_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+        """按句子邊界分塊讀取文本文件
+        
+        每次讀取約 chunk_size 個字符，並在最後一個句末標點或換行處切分，
+        剩餘部分併入下一塊，避免把一個句子拆到兩塊中。
+        找不到句末字符時（例如超長的單行文本）直接按 chunk_size 切分。
+        """
+        encoding = FileUtils.guess_encoding(file_path, encoding)
+        buffer = ''
+        with open(file_path, 'r', encoding=encoding) as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                buffer += data
+                cut = max(buffer.rfind(c) for c in SENTENCE_ENDINGS)
+                if cut < 0:
+                    if len(buffer) < chunk_size:
+                        continue
+                    cut = len(buffer) - 1
+                yield buffer[:cut + 1]
+                buffer = buffer[cut + 1:]
+        if buffer:
+            yield buffer
+    
     @staticmethod
     def save_results(results, output_path):
         """保存分析結果為JSON文件"""
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        with open(output_path, 'wb') as f:
+            json_serializer.dump(results, f, pretty=True)
+    
+    @staticmethod
+    def save_results_as_jsonl(results, output_path):
+        """以緊湊格式把分析結果追加為JSONL文件中的一行"""
+        with open(output_path, 'ab') as f:
+            f.write(json_serializer.dumps(results) + b'\n')
     
     @staticmethod
     def save_results_as_csv(results, output_path):
@@ -114,6 +176,26 @@ class FileUtils:
             print(f"保存Excel時出錯: {e}")
             return False
     
+    @staticmethod
+    def save_results_as_columnar(results, output_path, format='parquet'):
+        """保存分析結果為 Parquet 或 Arrow IPC 長格式表
+        
+        表結構與批量模式的語料庫導出相同（見 columnar_exporter），
+        每個表寫入 {output_path}_{表名}.parquet / .arrow
+        """
+        try:
+            from columnar_exporter import ColumnarExporter
+            name = os.path.basename(output_path)
+            with ColumnarExporter(os.path.dirname(output_path) or '.', format=format, prefix=name) as exporter:
+                exporter.write(name, results)
+            return True
+        except ImportError as e:
+            print(e)
+            return False
+        except Exception as e:
+            print(f"保存{format}時出錯: {e}")
+            return False
+    
     @staticmethod
     def export_results(results, output_path, formats=None):
         """導出分析結果為多種格式
@@ -121,7 +203,7 @@ class FileUtils:
         Args:
             results: 分析結果字典
             output_path: 輸出文件路徑（不包含擴展名）
-            formats: 導出格式列表，例如 ['json', 'csv', 'excel']
+            formats: 導出格式列表，例如 ['json', 'jsonl', 'csv', 'excel', 'parquet', 'arrow']
         """
         if formats is None:
             formats = ['json']
@@ -141,12 +223,17 @@ class FileUtils:
             if fmt == 'json':
                 json_path = f"{output_path}.json"
                 success['json'] = FileUtils.save_results(results, json_path)
+            elif fmt == 'jsonl':
+                jsonl_path = f"{output_path}.jsonl"
+                success['jsonl'] = FileUtils.save_results_as_jsonl(results, jsonl_path)
             elif fmt == 'csv':
                 csv_path = f"{output_path}.csv"
                 success['csv'] = FileUtils.save_results_as_csv(results, csv_path)
             elif fmt == 'excel':
                 excel_path = f"{output_path}.xlsx"
                 success['excel'] = FileUtils.save_results_as_excel(results, excel_path)
+            elif fmt in ('parquet', 'arrow'):
+                success[fmt] = FileUtils.save_results_as_columnar(results, output_path, fmt)
         
         return success
     
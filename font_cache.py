@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+中文字體解析緩存
+
+依次檢查各平台常見的中文字體路徑（macOS、Linux 的 Noto CJK / 文泉驛、Windows），
+都不存在時才掃描系統字體目錄。解析結果寫入緩存文件，之後的進程直接讀取，
+字體查找每台機器只需進行一次；matplotlib 和詞雲共用同一個結果。
+"""
+
+import os
+import sys
+import json
+import time
+from file_utils import DEFAULT_CACHE_DIR
+
+FONT_CACHE_FILE = 'font_cache.json'
+
+# 沒有找到中文字體時，結果在這段時間（秒）內有效，之後重新查找（例如期間安裝了新字體）
+NEGATIVE_TTL = 24 * 60 * 60
+
+# 各平台常見的中文字體路徑（按優先順序）
+MACOS_FONTS = [
+    "/System/Library/Fonts/STHeiti Light.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/STHeiti Medium.ttc",
+    "/System/Library/Fonts/Hiragino Sans GB.ttc",
+    "/System/Library/Fonts/Songti.ttc",
+    "/Library/Fonts/Arial Unicode.ttf"
+]
+
+LINUX_FONTS = [
+    # Noto Sans CJK（Debian/Ubuntu、Fedora、Arch 等發行版的路徑）
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/opentype/noto/NotoSerifCJK-Regular.ttc",
+    # 文泉驛
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/usr/share/fonts/wqy-microhei/wqy-microhei.ttc",
+    "/usr/share/fonts/wqy-zenhei/wqy-zenhei.ttc",
+    "/usr/share/fonts/wenquanyi/wqy-microhei/wqy-microhei.ttc",
+    "/usr/share/fonts/wenquanyi/wqy-zenhei/wqy-zenhei.ttc",
+    # 其他
+    "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf",
+    "/usr/share/fonts/truetype/arphic/uming.ttc"
+]
+
+WINDOWS_FONTS = [
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/simhei.ttf",
+    "C:/Windows/Fonts/simsun.ttc"
+]
+
+# 掃描系統字體時，文件名包含以下關鍵字的字體視為可能的中文字體
+CHINESE_FONT_KEYWORDS = [
+    'notosanscjk', 'notoserifcjk', 'sourcehansans', 'sourcehanserif', 'wqy', 'wenquanyi',
+    'droidsansfallback', 'pingfang', 'stheiti', 'hiragino', 'songti', 'msyh', 'yahei',
+    'simhei', 'simsun', 'uming', 'ukai'
+]
+
+def candidate_fonts(platform=None):
+    """返回當前平台的常見中文字體路徑列表"""
+    platform = platform or sys.platform
+    if platform == 'darwin':
+        return list(MACOS_FONTS)
+    if platform.startswith('win'):
+        return list(WINDOWS_FONTS)
+    return list(LINUX_FONTS)
+
+def _has_chinese_glyphs(font_path):
+    """檢查字體是否包含中文字形"""
+    from matplotlib.ft2font import FT2Font
+    try:
+        return FT2Font(font_path).get_char_index(ord('中')) != 0
+    except (OSError, RuntimeError, ValueError):
+        return False
+
+def find_chinese_font():
+    """查找系統中可用的中文字體（不使用緩存），找不到時返回 None"""
+    for font_path in candidate_fonts():
+        if os.path.exists(font_path):
+            return font_path
+
+    # 常見路徑都不存在時，掃描系統字體目錄
+    import matplotlib.font_manager as fm
+    for font_path in sorted(fm.findSystemFonts()):
+        name = os.path.basename(font_path).lower().replace(' ', '').replace('-', '')
+        if any(keyword in name for keyword in CHINESE_FONT_KEYWORDS) and _has_chinese_glyphs(font_path):
+            return font_path
+    return None
+
+def _cache_path(cache_dir):
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, FONT_CACHE_FILE)
+
+def _load_cached(cache_file):
+    """讀取緩存的字體，緩存無效時返回 (False, None)"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return False, None
+
+    font_path = cached.get('font_path')
+    if font_path:
+        # 字體文件被刪除後重新查找
+        return os.path.exists(font_path), font_path
+    return time.time() - cached.get('resolved_at', 0) < NEGATIVE_TTL, None
+
+def resolve_chinese_font(preferred=None, cache_dir=None, refresh=False):
+    """返回要使用的中文字體路徑，找不到時返回 None
+
+    Args:
+        preferred: 用戶指定的字體路徑，存在時直接使用
+        cache_dir: 緩存目錄，默認為 DEFAULT_CACHE_DIR
+        refresh: 忽略緩存，重新查找
+    """
+    if preferred and os.path.exists(preferred):
+        return preferred
+
+    cache_file = _cache_path(cache_dir)
+    if not refresh:
+        valid, font_path = _load_cached(cache_file)
+        if valid:
+            return font_path
+
+    font_path = find_chinese_font()
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'font_path': font_path, 'resolved_at': time.time()}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_file)
+    except OSError as e:
+        print(f"無法寫入字體緩存 {cache_file}: {e}")
+    return font_path
+
+def configure_matplotlib_font(font_path):
+    """讓 matplotlib 使用指定的中文字體，返回字體名稱"""
+    if not font_path:
+        return None
+    import matplotlib
+    import matplotlib.font_manager as fm
+    # 把字體加入字體管理器，之後按名稱查找時不必再搜索字體文件
+    fm.fontManager.addfont(font_path)
+    name = fm.FontProperties(fname=font_path).get_name()
+    matplotlib.rcParams['font.family'] = name
+    matplotlib.rcParams['axes.unicode_minus'] = False  # Correctly display minus sign
+    return name
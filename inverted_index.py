@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+分析結果的倒排索引
+
+把每個文件分析結果中的詞語（word_frequency）、詞性（pos_frequency）和命名實體（entities）
+寫入 SQLite 數據庫中的倒排表：每個 (字段, 詞語) 對應一個按文檔排列的倒排列表，記錄出現次數。
+倒排表以 (term_id, doc) 為聚簇主鍵，查詢一個詞語只需讀取一段連續的記錄，
+無需讀取或掃描任何結果 JSON 文件。
+
+查詢語法:
+    香港 美食              同時包含兩個詞語（AND）
+    香港 OR 上海           包含任一詞語
+    香港 -上海             包含香港但不包含上海
+    pos:nr person:張三     指定字段（word、pos、person、location、organization），默認為 word
+
+用法:
+    python inverted_index.py build index.db results/results.jsonl
+    python inverted_index.py search index.db "香港 美食 -上海" --limit 10
+    python inverted_index.py term index.db person:張三 --limit 10
+    python inverted_index.py top index.db --field location --limit 20
+"""
+
+import os
+import sqlite3
+import argparse
+from jsonl_exporter import iter_jsonl
+
+# 可查詢的字段：詞語、詞性和各類命名實體
+ENTITY_FIELDS = ('person', 'location', 'organization')
+FIELDS = ('word', 'pos') + ENTITY_FIELDS
+DEFAULT_FIELD = 'word'
+
+# SQLite 頁緩存大小（KB）：倒排表按 (term_id, doc) 排列，建索引時的插入分散在整張表中，
+# 默認的 2MB 緩存會導致大量頁面換入換出
+CACHE_SIZE_KB = 256 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    total_words INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    field TEXT NOT NULL,
+    term TEXT NOT NULL,
+    doc_freq INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (field, term)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+CREATE INDEX IF NOT EXISTS terms_rank ON terms (field, doc_freq DESC);
+"""
+
+def parse_term(token):
+    """把 'field:term' 解析為 (field, term)，沒有字段前綴時使用默認字段"""
+    field, sep, term = token.partition(':')
+    if sep and field in FIELDS and term:
+        return field, term
+    return DEFAULT_FIELD, token
+
+def parse_query(query):
+    """把查詢解析為 OR 連接的子句列表 [(包含的詞語, 排除的詞語), ...]"""
+    groups = []
+    include, exclude = [], []
+    for token in query.split():
+        if token == 'OR':
+            groups.append((include, exclude))
+            include, exclude = [], []
+        elif token == 'AND':
+            continue
+        elif token.startswith('-') and len(token) > 1:
+            exclude.append(parse_term(token[1:]))
+        else:
+            include.append(parse_term(token))
+    groups.append((include, exclude))
+    return [(include, exclude) for include, exclude in groups if include]
+
+class InvertedIndex:
+    """基於 SQLite 的倒排索引，支持逐個加入文檔和詞語、布爾、Top-K 查詢"""
+    def __init__(self, path, commit_every=1000):
+        """
+        Args:
+            path: 數據庫文件路徑，已存在時在原有索引上繼續加入文檔
+            commit_every: 每加入多少個文檔提交一次事務
+        """
+        self.path = path
+        self.commit_every = commit_every
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(f'PRAGMA cache_size={-CACHE_SIZE_KB}')
+        self.conn.executescript(SCHEMA)
+        # 寫入時使用的詞語 ID 緩存和尚未寫入的文檔頻率增量（按需載入）
+        self._terms = None
+        self._next_term_id = None
+        self._doc_freq_delta = {}
+        self._pending = 0
+
+    # ---- 建立索引 ----
+
+    def _load_terms(self):
+        self._terms = {
+            (field, term): term_id
+            for term_id, field, term in self.conn.execute('SELECT id, field, term FROM terms')
+        }
+        self._next_term_id = max(self._terms.values(), default=0) + 1
+
+    @staticmethod
+    def _fields(result):
+        """返回分析結果中各字段的 {term: count}"""
+        yield 'word', result.get('word_frequency', {})
+        yield 'pos', result.get('pos_frequency', {})
+        for entity_type, entity_list in result.get('entities', {}).items():
+            if entity_type in ENTITY_FIELDS:
+                yield entity_type, dict.fromkeys(entity_list, 1)
+
+    def add(self, doc_id, result):
+        """加入一個文檔的分析結果（analyze_text 或 full_analysis 的輸出）
+
+        同一 doc_id 已在索引中時替換原有的記錄；出錯的結果會被忽略
+        """
+        if 'error' in result:
+            return
+        if self._terms is None:
+            self._load_terms()
+
+        cursor = self.conn.cursor()
+        row = cursor.execute('SELECT id FROM documents WHERE doc_id = ?', (doc_id,)).fetchone()
+        if row:
+            self._remove(row[0])
+        cursor.execute('INSERT INTO documents (doc_id, total_words) VALUES (?, ?)',
+                       (doc_id, result.get('total_words', 0)))
+        doc = cursor.lastrowid
+
+        new_terms = []
+        postings = []
+        delta = self._doc_freq_delta
+        for field, counts in self._fields(result):
+            for term, count in counts.items():
+                term_id = self._terms.get((field, term))
+                if term_id is None:
+                    term_id = self._terms[(field, term)] = self._next_term_id
+                    self._next_term_id += 1
+                    new_terms.append((term_id, field, term))
+                postings.append((term_id, doc, count))
+                delta[term_id] = delta.get(term_id, 0) + 1
+        cursor.executemany('INSERT INTO terms (id, field, term) VALUES (?, ?, ?)', new_terms)
+        cursor.executemany('INSERT INTO postings (term_id, doc, count) VALUES (?, ?, ?)', postings)
+
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def _flush_doc_freq(self):
+        if self._doc_freq_delta:
+            self.conn.executemany(
+                'UPDATE terms SET doc_freq = doc_freq + ? WHERE id = ?',
+                [(count, term_id) for term_id, count in self._doc_freq_delta.items()]
+            )
+            self._doc_freq_delta = {}
+
+    def _remove(self, doc):
+        self._flush_doc_freq()
+        self.conn.execute(
+            'UPDATE terms SET doc_freq = doc_freq - 1 WHERE id IN (SELECT term_id FROM postings WHERE doc = ?)',
+            (doc,)
+        )
+        self.conn.execute('DELETE FROM postings WHERE doc = ?', (doc,))
+        self.conn.execute('DELETE FROM documents WHERE id = ?', (doc,))
+
+    def remove(self, doc_id):
+        """從索引中刪除文檔，返回是否存在該文檔"""
+        row = self.conn.execute('SELECT id FROM documents WHERE doc_id = ?', (doc_id,)).fetchone()
+        if row:
+            self._remove(row[0])
+        return row is not None
+
+    def commit(self):
+        """寫入文檔頻率並提交事務"""
+        self._flush_doc_freq()
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # ---- 查詢 ----
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def _term_id(self, field, term):
+        row = self.conn.execute('SELECT id FROM terms WHERE field = ? AND term = ?', (field, term)).fetchone()
+        return row[0] if row else None
+
+    def doc_freq(self, term, field=DEFAULT_FIELD):
+        """包含該詞語的文檔數"""
+        row = self.conn.execute(
+            'SELECT doc_freq FROM terms WHERE field = ? AND term = ?', (field, term)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def postings(self, term, field=DEFAULT_FIELD, limit=None):
+        """返回包含該詞語的文檔 [(doc_id, count), ...]，按出現次數降序排列
+
+        limit 指定時只返回出現次數最多的前 limit 個文檔
+        """
+        term_id = self._term_id(field, term)
+        if term_id is None:
+            return []
+        sql = ('SELECT d.doc_id, p.count FROM postings p JOIN documents d ON d.id = p.doc '
+               'WHERE p.term_id = ? ORDER BY p.count DESC, p.doc')
+        params = [term_id]
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
+
+    def top_terms(self, field=DEFAULT_FIELD, limit=20):
+        """返回該字段中文檔頻率最高的詞語 [(term, doc_freq), ...]"""
+        return self.conn.execute(
+            'SELECT term, doc_freq FROM terms WHERE field = ? AND doc_freq > 0 ORDER BY doc_freq DESC LIMIT ?',
+            (field, limit)
+        ).fetchall()
+
+    def search(self, query, limit=20):
+        """執行布爾查詢，返回 [(doc_id, score), ...]
+
+        score 為文檔中所有查詢詞語（不含排除的詞語）的出現次數之和，結果按 score 降序排列
+        """
+        selects = []
+        params = []
+        scored_ids = set()
+        for include, exclude in parse_query(query):
+            include_ids = [self._term_id(field, term) for field, term in include]
+            if None in include_ids:
+                # 子句中有不存在的詞語，該子句不匹配任何文檔
+                continue
+            exclude_ids = [term_id for term_id in (self._term_id(field, term) for field, term in exclude)
+                           if term_id is not None]
+            clause = ' INTERSECT '.join(['SELECT doc FROM postings WHERE term_id = ?'] * len(include_ids))
+            clause += ''.join([' EXCEPT SELECT doc FROM postings WHERE term_id = ?'] * len(exclude_ids))
+            selects.append(f'SELECT doc FROM ({clause})')
+            params.extend(include_ids + exclude_ids)
+            scored_ids.update(include_ids)
+        if not selects:
+            return []
+
+        placeholders = ', '.join('?' * len(scored_ids))
+        sql = (
+            f'WITH matched (doc) AS ({" UNION ".join(selects)}) '
+            'SELECT d.doc_id, SUM(p.count) AS score FROM matched m '
+            'JOIN documents d ON d.id = m.doc '
+            f'JOIN postings p ON p.doc = m.doc AND p.term_id IN ({placeholders}) '
+            'GROUP BY m.doc ORDER BY score DESC, m.doc LIMIT ?'
+        )
+        return self.conn.execute(sql, params + list(scored_ids) + [limit]).fetchall()
+
+def _print_rows(rows):
+    for name, value in rows:
+        print(f"{value}\t{name}")
+
+def main():
+    parser = argparse.ArgumentParser(description='建立和查詢分析結果的倒排索引')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='從 JSONL 分析結果建立（或更新）索引')
+    build_parser.add_argument('index', help='索引數據庫路徑')
+    build_parser.add_argument('inputs', nargs='+', help='JSONL 結果文件（jsonl 格式導出，可為 .gz 或 .zst）')
+
+    search_parser = subparsers.add_parser('search', help='布爾查詢（空格表示 AND，支持 OR 和 -排除）')
+    search_parser.add_argument('index', help='索引數據庫路徑')
+    search_parser.add_argument('query', help='查詢，例如 "香港 美食 -上海"')
+    search_parser.add_argument('--limit', type=int, default=20, help='最多返回的文檔數')
+
+    term_parser = subparsers.add_parser('term', help='列出包含某個詞語的文檔（按出現次數排序）')
+    term_parser.add_argument('index', help='索引數據庫路徑')
+    term_parser.add_argument('term', help='詞語，可帶字段前綴，例如 person:張三')
+    term_parser.add_argument('--limit', type=int, default=20, help='最多返回的文檔數')
+
+    top_parser = subparsers.add_parser('top', help='列出文檔頻率最高的詞語')
+    top_parser.add_argument('index', help='索引數據庫路徑')
+    top_parser.add_argument('--field', choices=FIELDS, default=DEFAULT_FIELD, help='字段')
+    top_parser.add_argument('--limit', type=int, default=20, help='返回的詞語數')
+
+    args = parser.parse_args()
+
+    with InvertedIndex(args.index) as index:
+        if args.command == 'build':
+            for path in args.inputs:
+                for record in iter_jsonl(path):
+                    index.add(record.get('doc_id'), record)
+            index.commit()
+            print(f"索引 {args.index} 共包含 {len(index)} 個文檔")
+        elif args.command == 'search':
+            _print_rows(index.search(args.query, limit=args.limit))
+        elif args.command == 'term':
+            field, term = parse_term(args.term)
+            print(f"{index.doc_freq(term, field)} 個文檔包含 {args.term}")
+            _print_rows(index.postings(term, field, limit=args.limit))
+        else:
+            _print_rows(index.top_terms(args.field, limit=args.limit))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 序列化後端
+
+安裝了 orjson 時使用 orjson 編碼，否則使用標準庫 json。兩個後端的輸出逐字節相同：
+    緊湊模式: json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+    縮進模式: json.dumps(obj, ensure_ascii=False, indent=2)
+orjson 與標準庫只在浮點數的科學計數法（例如 1e-05 與 0.00001）和 NaN/Infinity 上不同，
+對象中含有這類浮點數、超出 64 位的整數或 orjson 不支持的類型時，自動改用標準庫編碼。
+可通過環境變量 CHINESE_TEXT_ANALYZER_JSON=json 強制使用標準庫。
+"""
+
+import os
+import json
+import math
+
+BACKENDS = ('orjson', 'json')
+
+# orjson 輸出與標準庫 repr 相同的浮點數範圍：[1e-4, 1e16)
+_FLOAT_MIN = 1e-4
+_FLOAT_MAX = 1e16
+
+def _load_orjson():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+_orjson = _load_orjson()
+
+def available_backends():
+    """返回當前環境中可用的後端"""
+    return [name for name in BACKENDS if name == 'json' or _orjson is not None]
+
+def _default_backend():
+    backend = os.environ.get('CHINESE_TEXT_ANALYZER_JSON')
+    if backend in available_backends():
+        return backend
+    return 'orjson' if _orjson is not None else 'json'
+
+_backend = _default_backend()
+
+def get_backend():
+    """返回當前使用的後端名稱"""
+    return _backend
+
+def set_backend(name):
+    """切換後端（'orjson' 或 'json'）"""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"未知的 JSON 後端: {name}，可選: {', '.join(BACKENDS)}")
+    if name not in available_backends():
+        raise ImportError("orjson 後端需要安裝 orjson: pip install orjson")
+    _backend = name
+
+def _float_safe(value):
+    """orjson 對該浮點數的輸出是否與標準庫相同"""
+    if not math.isfinite(value):
+        return False
+    value = abs(value)
+    return value == 0 or _FLOAT_MIN <= value < _FLOAT_MAX
+
+def _orjson_options(obj):
+    """返回用 orjson 編碼該對象所需的選項，輸出會與標準庫不同時返回 None
+
+    逐層收集容器中元素的類型（map 和 set 在 C 層面完成），只有含浮點數或子容器時才進一步檢查，
+    詞頻等只含字符串和整數的大字典幾乎不產生額外開銷。只有出現非字符串鍵時才啟用
+    OPT_NON_STR_KEYS，該選項會明顯拖慢編碼。
+    """
+    option = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if set(map(type, item)) - {str}:
+                if not all(_float_safe(key) for key in item if type(key) is float):
+                    return None
+                option = _orjson.OPT_NON_STR_KEYS
+            values = item.values()
+        elif isinstance(item, (list, tuple)):
+            values = item
+        else:
+            if type(item) is float and not _float_safe(item):
+                return None
+            continue
+
+        types = set(map(type, values))
+        if float in types:
+            if not all(_float_safe(value) for value in values if type(value) is float):
+                return None
+        if types - {str, int, float, bool, type(None)}:
+            stack.extend(value for value in values if isinstance(value, (dict, list, tuple)))
+    return option
+
+def _stdlib_dumps(obj, pretty):
+    if pretty:
+        text = json.dumps(obj, ensure_ascii=False, indent=2)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+    return text.encode('utf-8')
+
+def dumps(obj, pretty=False, backend=None):
+    """把對象編碼為 UTF-8 的 JSON 字節串
+
+    Args:
+        obj: 要編碼的對象
+        pretty: True 時使用 2 空格縮進，否則使用緊湊格式
+        backend: 指定後端，默認為 get_backend()
+    """
+    option = None
+    if (backend or _backend) == 'orjson' and _orjson is not None:
+        option = _orjson_options(obj)
+    if option is not None:
+        if pretty:
+            option |= _orjson.OPT_INDENT_2
+        try:
+            return _orjson.dumps(obj, option=option)
+        except TypeError:
+            # 超出 64 位的整數、無效的 Unicode 字符串或 orjson 不支持的類型
+            pass
+    return _stdlib_dumps(obj, pretty)
+
+def dump(obj, fp, pretty=False, backend=None):
+    """把對象編碼後寫入以二進制模式打開的文件"""
+    fp.write(dumps(obj, pretty, backend))
+
+def loads(data):
+    """解析 JSON 字節串或字符串"""
+    if _orjson is not None and _backend == 'orjson':
+        try:
+            return _orjson.loads(data)
+        except ValueError:
+            # orjson 不接受 NaN/Infinity，交給標準庫處理
+            pass
+    return json.loads(data)
+
+def load(fp):
+    """從文件中讀取並解析 JSON"""
+    return loads(fp.read())
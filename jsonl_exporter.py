@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+JSON Lines 結果導出
+
+批量分析時每得到一個文件的結果，就以緊湊格式追加一行到 JSONL 文件中，
+不再為每個文件生成一個縮進格式的 JSON 文件。支持按記錄數分片、gzip/zstd 壓縮，
+以及每寫入一定數量的記錄才執行一次 fsync。iter_jsonl 按擴展名讀回導出的文件。
+默認每次運行取代之前的輸出（先寫入臨時文件，寫完後再替換），append 為 True 時追加到已有的輸出。
+"""
+
+import io
+import os
+import glob
+import gzip
+import json_serializer
+
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+def _zstandard():
+    """導入可選依賴 zstandard"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd 壓縮需要安裝 zstandard: pip install zstandard")
+    return zstandard
+
+class JsonlExporter:
+    """把分析結果逐行寫入（分片的）JSONL 文件
+
+    每行是一個 JSON 對象：{"doc_id": 文檔標識, ...分析結果}
+    """
+    def __init__(self, output_dir, prefix='results', shard_size=None, compression=None, fsync_every=0,
+                 append=False):
+        """
+        Args:
+            output_dir: 輸出目錄
+            prefix: 文件名前綴
+            shard_size: 每個分片的記錄數，None 表示只寫一個文件
+            compression: None、'gzip' 或 'zstd'
+            fsync_every: 每寫入多少條記錄執行一次 fsync，0 表示只在關閉時執行
+            append: True 時把記錄追加到已有的文件（分片從已有的分片之後開始編號），
+                    False 時取代之前的輸出，重新運行同一批文件不會產生重複記錄
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"不支持的壓縮方式: {compression}，可選: gzip, zstd")
+        if compression == 'zstd':
+            # 提前檢查依賴，避免分析完第一個文件才報錯
+            _zstandard()
+
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.compression = compression
+        self.fsync_every = fsync_every
+        self.append = append
+        self.count = 0
+        self.paths = []
+        self._raw = None
+        self._stream = None
+        self._path = None
+        self._tmp_path = None
+        self._shard_count = 0
+        self._unsynced = 0
+
+        os.makedirs(output_dir, exist_ok=True)
+        old_shards = glob.glob(os.path.join(output_dir, f"{prefix}-*.jsonl*"))
+        if append:
+            # 分片文件從已有的分片之後開始編號，不會覆蓋之前的結果
+            self._shard_index = len(old_shards)
+            self._stale = []
+        else:
+            # 之前運行留下的分片在本次輸出寫完後刪除（被同名新分片替換的除外）
+            self._shard_index = 0
+            self._stale = old_shards if shard_size else []
+
+    def _next_path(self):
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+        if self.shard_size:
+            path = os.path.join(self.output_dir, f"{self.prefix}-{self._shard_index:05d}.jsonl{suffix}")
+            self._shard_index += 1
+            return path
+        return os.path.join(self.output_dir, f"{self.prefix}.jsonl{suffix}")
+
+    def _open(self):
+        path = self._next_path()
+        if self.append:
+            # 以追加方式打開：gzip 和 zstd 都允許多個壓縮段直接拼接
+            self._tmp_path = None
+            self._raw = open(path, 'ab')
+        else:
+            # 寫入臨時文件，關閉時再替換目標文件，中斷時之前的輸出保持完整
+            self._tmp_path = f"{path}.{os.getpid()}.tmp"
+            self._raw = open(self._tmp_path, 'wb')
+        self._path = path
+        if self.compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='ab')
+        elif self.compression == 'zstd':
+            self._stream = _zstandard().ZstdCompressor().stream_writer(self._raw)
+        else:
+            self._stream = self._raw
+        self._shard_count = 0
+        self.paths.append(path)
+
+    def write(self, doc_id, result):
+        """追加一條記錄"""
+        if self._stream is None:
+            self._open()
+        elif self.shard_size and self._shard_count >= self.shard_size:
+            self._close_file()
+            self._open()
+
+        record = {'doc_id': doc_id}
+        record.update(result)
+        self._stream.write(json_serializer.dumps(record) + b'\n')
+        self.count += 1
+        self._shard_count += 1
+        self._unsynced += 1
+
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        """把已寫入的記錄刷新到磁盤"""
+        if self._stream is None:
+            return
+        if self._stream is not self._raw:
+            # 輸出壓縮器中緩衝的數據（gzip 為 Z_SYNC_FLUSH，zstd 為結束當前塊）
+            self._stream.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._unsynced = 0
+
+    def _close_file(self):
+        if self._stream is not self._raw:
+            # 結束壓縮流（寫入 gzip 尾部 / zstd 幀結尾），但保留底層文件以便 fsync
+            if self.compression == 'zstd':
+                self._stream.flush(_zstandard().FLUSH_FRAME)
+            else:
+                self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        if self._tmp_path is not None:
+            os.replace(self._tmp_path, self._path)
+        self._raw = None
+        self._stream = None
+        self._unsynced = 0
+
+    def close(self):
+        """寫完所有記錄並關閉文件，刪除被本次輸出取代的舊分片"""
+        if self._stream is not None:
+            self._close_file()
+        for path in self._stale:
+            if path not in self.paths and os.path.exists(path):
+                os.remove(path)
+        self._stale = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def iter_jsonl(path):
+    """逐條讀取 JSONL 結果文件，按擴展名（.gz / .zst）自動解壓
+
+    導出時以追加方式寫入，文件可能由多個壓縮段拼接而成，這裡會依次讀取所有段。
+    """
+    with open(path, 'rb') as raw:
+        if path.endswith(COMPRESSION_SUFFIXES['gzip']):
+            stream = gzip.GzipFile(fileobj=raw, mode='rb')
+        elif path.endswith(COMPRESSION_SUFFIXES['zstd']):
+            reader = _zstandard().ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+            stream = io.BufferedReader(reader)
+        else:
+            stream = raw
+        with stream:
+            for line in stream:
+                if line.strip():
+                    yield json_serializer.loads(line)
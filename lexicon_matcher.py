@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+基於 Aho-Corasick 自動機的多模式詞典匹配
+
+自動機由情感詞典、自訂詞典等詞表一次性建立，之後在原始文本上進行線性時間掃描，
+不依賴分詞結果，因此 jieba 切分方式與詞典不一致的詞條也能被找到。
+"""
+
+from collections import Counter, deque
+
+class LexiconMatcher:
+    """Aho-Corasick 多模式匹配器
+
+    每個詞條可以帶有一個或多個標籤（例如 'positive'、'negative'、'term'），
+    匹配結果會附帶該詞條的全部標籤。
+    """
+    def __init__(self, words=None, label=None):
+        # 轉移表：每個節點一個 {字符: 子節點}
+        self._goto = [{}]
+        # 失敗指針
+        self._fail = [0]
+        # 在該節點結束的詞條
+        self._word = [None]
+        # 沿失敗指針可到達的最近一個有詞條結束的節點（0 表示沒有）
+        self._output_link = [0]
+        # 詞條 -> 標籤集合
+        self._labels = {}
+        self._built = False
+        if words:
+            self.add_words(words, label)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __contains__(self, word):
+        return word in self._labels
+
+    def add(self, word, label=None):
+        """添加一個詞條"""
+        if not word:
+            return
+        labels = self._labels.get(word)
+        if labels is None:
+            labels = self._labels[word] = set()
+            node = 0
+            for char in word:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._word.append(None)
+                    self._output_link.append(0)
+                node = next_node
+            self._word[node] = word
+            self._built = False
+        if label is not None:
+            labels.add(label)
+
+    def add_words(self, words, label=None):
+        """批量添加詞條"""
+        for word in words:
+            self.add(word, label)
+
+    def labels(self, word):
+        """返回詞條的標籤集合"""
+        return self._labels.get(word, set())
+
+    def build(self):
+        """按廣度優先順序計算失敗指針和輸出鏈接"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._output_link[child] = 0
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                if fail == child:
+                    fail = 0
+                self._fail[child] = fail
+                self._output_link[child] = fail if self._word[fail] is not None else self._output_link[fail]
+        self._built = True
+
+    def iter_matches(self, text):
+        """掃描文本，逐個產出所有（可重疊的）匹配 (start, end, word)"""
+        if not self._built:
+            self.build()
+        goto = self._goto
+        fail = self._fail
+        word_at = self._word
+        output_link = self._output_link
+
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            match = node if word_at[node] is not None else output_link[node]
+            while match:
+                word = word_at[match]
+                yield i + 1 - len(word), i + 1, word
+                match = output_link[match]
+
+    def find_all(self, text, overlapping=False, boundaries=None):
+        """返回所有匹配 [(start, end, word), ...]，按起始位置排序
+
+        overlapping 為 False 時採用最左最長原則，只保留互不重疊的匹配，
+        例如詞典中同時有「不滿」和「不滿意」時，「不滿意」只計一次。
+        指定 boundaries（分詞邊界的字符位置集合）時，只保留起止位置都落在邊界上的匹配，
+        避免把「好像」中的「好」這類較長詞語中的單字當成詞條。
+        """
+        matches = self.iter_matches(text)
+        if boundaries is not None:
+            matches = (m for m in matches if m[0] in boundaries and m[1] in boundaries)
+        matches = sorted(matches, key=lambda m: (m[0], m[0] - m[1]))
+        if overlapping:
+            return matches
+
+        selected = []
+        last_end = 0
+        for start, end, word in matches:
+            if start >= last_end:
+                selected.append((start, end, word))
+                last_end = end
+        return selected
+
+    def count(self, text, overlapping=False):
+        """統計文本中每個詞條的出現次數"""
+        return Counter(word for _, _, word in self.find_all(text, overlapping))
+
+    def positions(self, text, overlapping=False):
+        """返回每個詞條在文本中出現的起始位置 {word: [start, ...]}"""
+        positions = {}
+        for start, _, word in self.find_all(text, overlapping):
+            positions.setdefault(word, []).append(start)
+        return positions
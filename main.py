@@ -2,91 +2,98 @@
 import os
 import argparse
 import sys
+import json_serializer
 from analyzer import ChineseTextAnalyzer
 from file_utils import FileUtils
-from visualization import Visualizer
+from result_cache import ResultCache
+from viz_queue import VizQueue, DEFAULT_QUEUE_NAME
+from output_profiles import OUTPUT_PROFILES, DEFAULT_PROFILE, resolve_profile
+from jsonl_exporter import JsonlExporter
+from columnar_exporter import ColumnarExporter, FORMAT_SUFFIXES, DEFAULT_ROW_GROUP_SIZE
 
-def analyze_single_file(file_path, analyzer, output_folder, export_formats, visualize=True, font_path=None, advanced_viz=None):
-    """分析單個文件並保存結果"""
+def analyze_single_file(file_path, analyzer, output_folder, export_formats, visualize=True, font_path=None, advanced_viz=None, chunk_size=None, render_pool=None, profile=None, dpi=None):
+    """分析單個文件並保存結果
+    
+    指定 chunk_size 時使用流式模式分塊分析文件（適用於超大文件，不生成摘要）；
+    指定 render_pool 時圖表在進程池中並行渲染；
+    profile 和 dpi 決定圖表的輸出格式和解析度
+    """
     try:
-        # 讀取文件
-        text = FileUtils.read_file(file_path)
         filename = os.path.basename(file_path)
         base_name = os.path.splitext(filename)[0]
         
-        # 進行基本分析
-        results = analyzer.analyze_text(text)
-        
-        # 添加高級分析
-        # 情感分析
-        results['sentiment'] = analyzer.analyze_sentiment(text)
-        
-        # 關鍵詞提取
-        results['keywords'] = analyzer.keyword_extraction(text)
-        
-        # 命名實體識別
-        results['entities'] = analyzer.extract_entities(text)
-        
-        # N-gram分析
-        results['ngrams'] = analyzer.extract_ngrams(text)
-        
-        # 文本摘要
-        results['summary'] = analyzer.generate_summary(text)
+        if chunk_size:
+            results = analyzer.analyze_file_streaming(file_path, chunk_size=chunk_size)
+        else:
+            # 讀取文件
+            text = FileUtils.read_file(file_path)
+            
+            # 進行基本分析和高級分析（情感、關鍵詞、命名實體、N-gram、摘要），文本只分詞一次
+            results = analyzer.full_analysis(text)
         
         # 導出結果
         output_path = os.path.join(output_folder, base_name)
         FileUtils.export_results(results, output_path, export_formats)
         print(f"已分析 {filename} 並保存結果")
         
-        # 可視化
+        # 可視化（繪圖庫只在需要生成圖表時才載入）
         if visualize:
+            from visualization import Visualizer
             viz_folder = os.path.join(output_folder, 'visualizations')
             Visualizer.create_visualization_report(
                 results, 
                 output_dir=viz_folder, 
                 prefix=base_name,
-                font_path=font_path
+                font_path=font_path,
+                dpi=dpi,
+                pool=render_pool,
+                profile=profile
             )
             
             # 進階詞頻可視化
             if advanced_viz and 'word_frequency' in results:
+                output = resolve_profile(profile, dpi)
+                ext = output['format']
                 # 創建高級詞頻視覺化目錄
                 advanced_viz_folder = os.path.join(viz_folder, 'advanced')
                 os.makedirs(advanced_viz_folder, exist_ok=True)
                 
                 # 詞頻統計餅圖
                 if 'pie' in advanced_viz:
-                    pie_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_pie.png")
+                    pie_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_pie.{ext}")
                     Visualizer.plot_advanced_word_frequency(
                         results['word_frequency'],
                         top_n=15,
                         title='詞頻分布餅圖',
                         save_path=pie_path,
-                        plot_type='pie'
+                        plot_type='pie',
+                        dpi=output['dpi']
                     )
                     print(f"已生成詞頻餅圖: {pie_path}")
                 
                 # 詞頻垂直條形圖
                 if 'vertical' in advanced_viz:
-                    vert_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_vertical.png")
+                    vert_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_vertical.{ext}")
                     Visualizer.plot_advanced_word_frequency(
                         results['word_frequency'],
                         title='詞頻垂直條形圖',
                         save_path=vert_path,
                         plot_type='vertical',
-                        color_map='plasma'
+                        color_map='plasma',
+                        dpi=output['dpi']
                     )
                     print(f"已生成詞頻垂直條形圖: {vert_path}")
                 
                 # 按詞長度排序的詞頻圖
                 if 'length' in advanced_viz:
-                    len_path = os.path.join(advanced_viz_folder, f"{base_name}_word_by_length.png")
+                    len_path = os.path.join(advanced_viz_folder, f"{base_name}_word_by_length.{ext}")
                     Visualizer.plot_advanced_word_frequency(
                         results['word_frequency'],
                         title='按詞長度排序的詞頻圖',
                         save_path=len_path,
                         sort_by='length',
-                        color_map='magma'
+                        color_map='magma',
+                        dpi=output['dpi']
                     )
                     print(f"已生成按詞長度排序的詞頻圖: {len_path}")
         
@@ -102,13 +109,32 @@ def main():
     parser.add_argument('--output', '-o', default='results', help='輸出目錄路徑')
     parser.add_argument('--dict', '-d', help='自定義詞典路徑')
     parser.add_argument('--stopwords', '-s', help='停用詞表路徑')
-    parser.add_argument('--formats', '-f', default='json', help='輸出格式，逗號分隔 (json,csv,excel)')
+    parser.add_argument('--formats', '-f', default='json', help='輸出格式，逗號分隔 (json,jsonl,csv,excel,parquet,arrow)')
+    parser.add_argument('--jsonl-shard-size', type=int, help='批量模式下每個 JSONL 分片的記錄數（默認寫入單個文件）')
+    parser.add_argument('--compress', choices=['gzip', 'zstd'], help='JSONL 文件的壓縮方式')
+    parser.add_argument('--fsync-every', type=int, default=0, help='每寫入多少條 JSONL 記錄執行一次 fsync（默認只在結束時執行）')
+    parser.add_argument('--append', action='store_true', help='把 JSONL 記錄追加到已有的輸出（默認取代之前運行的 JSONL 文件）')
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE, help='Parquet/Arrow 導出時每個行組的行數')
+    parser.add_argument('--corpus-stats', action='store_true', help='批量模式下匯總整個語料庫的詞頻、詞性、N-gram 和實體統計')
+    parser.add_argument('--idf', help='關鍵詞提取使用的 IDF 表（jieba 格式，例如 --build-idf 生成的語料庫 IDF 表）')
+    parser.add_argument('--build-idf', help='批量模式下統計本批文件的文檔頻率，把語料庫 IDF 表寫入此路徑，並導出 TF-IDF 矩陣和關鍵詞')
+    parser.add_argument('--index', help='批量模式下把詞語、詞性和命名實體寫入此路徑的倒排索引（SQLite），可用 inverted_index.py 查詢')
     parser.add_argument('--no-viz', action='store_true', help='不生成可視化圖表')
     parser.add_argument('--batch', '-b', action='store_true', help='批量處理模式')
     parser.add_argument('--parallel', '-p', action='store_true', help='使用並行處理（對於大量文件）')
+    parser.add_argument('--workers', '-w', type=int, help='並行處理的進程數（默認為CPU核心數）')
+    parser.add_argument('--chunksize', type=int, help='並行處理時每個任務塊包含的文件數')
+    parser.add_argument('--stream', action='store_true', help='流式分塊分析單個大文件（內存佔用固定，不生成摘要）')
+    parser.add_argument('--chunk-size', type=int, default=FileUtils.DEFAULT_CHUNK_SIZE, help='流式分析時每塊的字符數')
+    parser.add_argument('--cache', help='分析結果緩存目錄（批量模式下跳過內容未改變的文件；只改了停用詞表時重用緩存的分詞結果）')
+    parser.add_argument('--cache-size', type=int, default=1024, help='結果緩存的大小上限（MB）')
     parser.add_argument('--extensions', '-e', default='.txt,.csv,.html,.md', help='要處理的文件擴展名（批量模式下），逗號分隔')
     parser.add_argument('--font', help='中文字體路徑 (用於詞雲圖生成)')
     parser.add_argument('--debug', action='store_true', help='啟用調試模式，顯示詳細錯誤信息')
+    parser.add_argument('--profile', choices=list(OUTPUT_PROFILES), default=DEFAULT_PROFILE, help='圖表輸出配置 (thumbnail,web,print,svg,webp)')
+    parser.add_argument('--dpi', type=int, help='圖表解析度（默認使用輸出配置中的解析度）')
+    parser.add_argument('--viz-workers', type=int, default=1, help='並行渲染圖表的進程數（大於1時啟用）')
+    parser.add_argument('--defer-viz', action='store_true', help=f'批量模式下只把圖表任務寫入隊列（輸出目錄下的 {DEFAULT_QUEUE_NAME}），稍後用 viz_queue.py 批量渲染')
     parser.add_argument('--advanced-viz', '-av', help='進階詞頻可視化選項，逗號分隔 (pie,vertical,length)')
     
     # 顯示幫助
@@ -121,7 +147,8 @@ def main():
     # 初始化分析器
     analyzer = ChineseTextAnalyzer(
         custom_dict_path=args.dict,
-        stopwords_path=args.stopwords
+        stopwords_path=args.stopwords,
+        idf_path=args.idf
     )
     
     # 創建輸出目錄
@@ -136,21 +163,18 @@ def main():
     # 解析進階詞頻可視化選項
     advanced_viz = args.advanced_viz.split(',') if args.advanced_viz else None
     
+    # 圖表渲染進程池（可在批量處理的多個文件間重用）
+    render_pool = None
+    if not args.no_viz and not args.defer_viz and args.viz_workers and args.viz_workers > 1:
+        from visualization import ChartRenderPool
+        render_pool = ChartRenderPool(processes=args.viz_workers)
+    
     # 判斷輸入是文件還是目錄
     if os.path.isfile(args.input):
         # 處理單個文件
-        results = analyze_single_file(args.input, analyzer, args.output, export_formats, not args.no_viz, args.font, advanced_viz)
-        
-        # 可視化（如果需要）
-        if not args.no_viz and 'error' not in results:
-            viz_folder = os.path.join(args.output, 'visualizations')
-            # 使用用戶指定的字體（如果有）
-            Visualizer.create_visualization_report(
-                results, 
-                output_dir=viz_folder, 
-                prefix=os.path.basename(os.path.splitext(args.input)[0]),
-                font_path=args.font
-            )
+        # 圖表已在 analyze_single_file 中生成，無需再次渲染
+        chunk_size = args.chunk_size if args.stream else None
+        analyze_single_file(args.input, analyzer, args.output, export_formats, not args.no_viz, args.font, advanced_viz, chunk_size, render_pool, args.profile, args.dpi)
     elif os.path.isdir(args.input) and args.batch:
         # 批量處理目錄中的文件
         file_list = FileUtils.get_file_list(args.input, extensions=file_extensions)
@@ -161,48 +185,173 @@ def main():
         
         print(f"找到 {len(file_list)} 個待分析的文件")
         
-        # 根據參數選擇串行或並行處理
+        # 結果緩存
+        cache = None
+        if args.cache:
+            cache = ResultCache(
+                args.cache,
+                analyzer.fingerprint(),
+                max_size=args.cache_size * 1024 * 1024
+            )
+            # 分詞結果緩存：只改了停用詞表等資源時，重新分析無需再次分詞
+            from token_cache import TokenCache
+            analyzer.token_cache = TokenCache(
+                os.path.join(args.cache, 'tokens'),
+                analyzer.segmentation_fingerprint(),
+                max_size=args.cache_size * 1024 * 1024
+            )
+        
+        # JSONL 格式：所有文件的結果逐行寫入同一個（或分片的）文件，而不是每個文件單獨導出
+        jsonl = None
+        if 'jsonl' in export_formats:
+            try:
+                jsonl = JsonlExporter(
+                    args.output,
+                    shard_size=args.jsonl_shard_size,
+                    compression=args.compress,
+                    fsync_every=args.fsync_every,
+                    append=args.append
+                )
+            except ImportError as e:
+                print(e)
+                return
+            export_formats = [fmt for fmt in export_formats if fmt != 'jsonl']
+        
+        # Parquet / Arrow 格式：把整個語料庫寫入長格式的列式表
+        columnar = []
+        for fmt in FORMAT_SUFFIXES:
+            if fmt in export_formats:
+                try:
+                    columnar.append(ColumnarExporter(args.output, format=fmt, row_group_size=args.row_group_size))
+                except ImportError as e:
+                    print(e)
+                    return
+        export_formats = [fmt for fmt in export_formats if fmt not in FORMAT_SUFFIXES]
+        
+        # 語料庫統計：每個文件的結果只累加到計數數組中
+        aggregator = None
+        if args.corpus_stats:
+            from corpus_aggregator import CorpusAggregator
+            aggregator = CorpusAggregator()
+        
+        # 語料庫 TF-IDF：記錄每個文件的詞頻，全部完成後統一計算 IDF
+        corpus_tfidf = None
+        if args.build_idf:
+            from corpus_tfidf import CorpusTfidf
+            corpus_tfidf = CorpusTfidf()
+        
+        # 倒排索引：詞語、詞性和實體 -> 文件列表
+        index = None
+        if args.index:
+            from inverted_index import InvertedIndex
+            index = InvertedIndex(args.index)
+        
+        # 延遲可視化：渲染時需要從 JSON 結果文件讀回分析結果
+        viz_queue = None
+        if args.defer_viz and not args.no_viz:
+            viz_queue = VizQueue(os.path.join(args.output, DEFAULT_QUEUE_NAME))
+            if 'json' not in export_formats:
+                export_formats.append('json')
+        elif not args.no_viz:
+            # 繪圖庫只在需要生成圖表時才載入
+            from visualization import Visualizer
+        
+        # 根據參數選擇串行或並行處理，每個文件都執行完整的分析流程
         if args.parallel:
-            results = analyzer.analyze_files_parallel(file_list)
+            results = analyzer.iter_files_parallel(
+                file_list, full=True, processes=args.workers, chunksize=args.chunksize, cache=cache
+            )
         else:
-            results = analyzer.analyze_files(file_list)
+            results = analyzer.iter_files(file_list, full=True, cache=cache)
         
-        # 保存結果
-        for file_path, result in results.items():
+        # 每完成一個文件就保存結果並生成圖表
+        for file_path, result in results:
             filename = os.path.basename(file_path)
             base_name = os.path.splitext(filename)[0]
             output_path = os.path.join(args.output, base_name)
             
-            # 添加高級分析結果（如果沒有錯誤）
-            if 'error' not in result:
-                try:
-                    # 讀取文件
-                    text = FileUtils.read_file(file_path)
-                    
-                    # 添加高級分析
-                    result['sentiment'] = analyzer.analyze_sentiment(text)
-                    result['keywords'] = analyzer.keyword_extraction(text)
-                    result['entities'] = analyzer.extract_entities(text)
-                    result['ngrams'] = analyzer.extract_ngrams(text)
-                    result['summary'] = analyzer.generate_summary(text)
-                except Exception as e:
-                    print(f"為 {file_path} 添加高級分析時出錯: {str(e)}")
-            
             # 導出結果
+            doc_id = os.path.relpath(file_path, args.input)
+            if jsonl is not None:
+                jsonl.write(doc_id, result)
+            for exporter in columnar:
+                exporter.write(doc_id, result)
+            if aggregator is not None:
+                aggregator.add(result)
+            if corpus_tfidf is not None and 'error' not in result:
+                corpus_tfidf.add(doc_id, result['word_frequency'])
+            if index is not None:
+                index.add(doc_id, result)
             FileUtils.export_results(result, output_path, export_formats)
             print(f"已保存分析結果到: {output_path}")
             
             # 生成可視化
             if not args.no_viz and 'error' not in result:
                 viz_folder = os.path.join(args.output, 'visualizations')
+                if viz_queue is not None:
+                    # 只記錄圖表任務，不在分析循環中繪圖
+                    viz_queue.enqueue(f"{output_path}.json", viz_folder, prefix=base_name, font_path=args.font,
+                                      profile=args.profile, dpi=args.dpi)
+                    continue
+                # 使用渲染進程池時不等待圖表完成，繼續處理下一個文件
                 Visualizer.create_visualization_report(
                     result, 
                     output_dir=viz_folder, 
                     prefix=base_name,
-                    font_path=args.font
+                    font_path=args.font,
+                    dpi=args.dpi,
+                    pool=render_pool,
+                    wait=False,
+                    profile=args.profile
                 )
+        
+        analyzer.close_pool()
+        
+        if jsonl is not None:
+            jsonl.close()
+            print(f"已將 {jsonl.count} 個文件的結果寫入: {', '.join(jsonl.paths)}")
+        for exporter in columnar:
+            exporter.close()
+            print(f"已將 {exporter.count} 個文件的結果寫入: {', '.join(exporter.paths)}")
+        
+        if aggregator is not None:
+            stats_path = os.path.join(args.output, 'corpus_stats.npz')
+            summary_path = os.path.join(args.output, 'corpus_summary.json')
+            aggregator.save(stats_path)
+            FileUtils.save_results(aggregator.summary(), summary_path)
+            print(f"語料庫共 {aggregator.documents} 個文件、{aggregator.total_words} 個詞、{len(aggregator.words)} 個不同詞語")
+            print(f"已保存語料庫統計到: {stats_path}, {summary_path}")
+        
+        if corpus_tfidf is not None:
+            idf = corpus_tfidf.idf()
+            idf.save(args.build_idf)
+            matrix_path = os.path.join(args.output, 'tfidf_matrix.npz')
+            corpus_tfidf.save_matrix(matrix_path)
+            keywords_path = os.path.join(args.output, 'corpus_keywords.jsonl')
+            with open(keywords_path, 'wb') as f:
+                for doc_id, keywords in corpus_tfidf.keywords():
+                    f.write(json_serializer.dumps({'doc_id': doc_id, 'keywords': keywords}) + b'\n')
+            print(f"已生成語料庫 IDF 表（{len(idf)} 個詞語）: {args.build_idf}")
+            print(f"已保存 TF-IDF 矩陣和語料庫關鍵詞到: {matrix_path}, {keywords_path}")
+        
+        if index is not None:
+            index.commit()
+            print(f"已將 {len(index)} 個文件寫入倒排索引: {args.index}")
+            index.close()
+        
+        if cache:
+            print(f"緩存命中 {cache.hits} 個文件，重新分析 {cache.misses} 個文件")
+            if not args.parallel:
+                print(f"其中 {analyzer.token_cache.hits} 個文件使用了緩存的分詞結果")
+        
+        if viz_queue is not None:
+            print(f"圖表任務已寫入 {viz_queue.queue_path}，可稍後執行 python viz_queue.py {viz_queue.queue_path} 生成圖表")
     else:
         print(f"錯誤: 輸入路徑 {args.input} 不存在或不是有效的文件/目錄，或者未指定批量處理模式")
+    
+    # 等待背景中的圖表全部生成
+    if render_pool:
+        render_pool.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
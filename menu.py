@@ -4,7 +4,11 @@ import sys
 import time
 from analyzer import ChineseTextAnalyzer
 from file_utils import FileUtils
-from visualization import Visualizer
+from viz_queue import VizQueue, DEFAULT_QUEUE_NAME
+from output_profiles import OUTPUT_PROFILES, DEFAULT_PROFILE
+from font_cache import candidate_fonts
+from jsonl_exporter import JsonlExporter
+from columnar_exporter import ColumnarExporter, FORMAT_SUFFIXES
 from convert_chinese import convert_text
 
 class TextAnalyzerMenu:
@@ -14,8 +18,12 @@ class TextAnalyzerMenu:
         self.export_formats = ['json']
         self.visualize = True
         self.advanced_viz = []
-        self.dpi = 300
+        self.output_profile = DEFAULT_PROFILE
+        self.dpi = OUTPUT_PROFILES[DEFAULT_PROFILE]['dpi']
         self.font_path = None
+        self.viz_workers = 1
+        self.defer_viz = False
+        self._render_pool = None
         
     def clear_screen(self):
         """清除屏幕"""
@@ -52,6 +60,7 @@ class TextAnalyzerMenu:
         print("5. 設置中文字體")
         print("6. 設置自定義詞典")
         print("7. 設置停用詞表")
+        print("8. 設置圖表渲染進程數")
         print("0. 返回主菜單")
         print()
         
@@ -61,6 +70,9 @@ class TextAnalyzerMenu:
         print("視覺化設置:")
         print("1. 啟用/禁用視覺化 (當前: {})".format("啟用" if self.visualize else "禁用"))
         print("2. 設置進階詞頻視覺化選項")
+        print("3. 批量分析時延遲生成圖表 (當前: {})".format("啟用" if self.defer_viz else "禁用"))
+        print("4. 渲染延遲隊列中的圖表")
+        print("5. 設置圖表輸出配置 (當前: {})".format(self.output_profile))
         print("0. 返回設置菜單")
         print()
         
@@ -86,6 +98,8 @@ class TextAnalyzerMenu:
             
             if choice == '0':
                 print("感謝使用中文文本分析工具！")
+                self.analyzer.close_pool()
+                self.close_render_pool()
                 sys.exit(0)
             elif choice == '1':
                 self.analyze_single_file()
@@ -104,7 +118,7 @@ class TextAnalyzerMenu:
         """處理設置菜單選項"""
         while True:
             self.display_settings_menu()
-            choice = input("請選擇設置選項 [0-7]: ").strip()
+            choice = input("請選擇設置選項 [0-8]: ").strip()
             
             if choice == '0':
                 return
@@ -122,6 +136,8 @@ class TextAnalyzerMenu:
                 self.set_custom_dict()
             elif choice == '7':
                 self.set_stopwords()
+            elif choice == '8':
+                self.set_viz_workers()
             else:
                 input("無效選項，請重新選擇。按Enter繼續...")
                 
@@ -129,7 +145,7 @@ class TextAnalyzerMenu:
         """處理視覺化菜單選項"""
         while True:
             self.display_visualization_menu()
-            choice = input("請選擇視覺化設置 [0-2]: ").strip()
+            choice = input("請選擇視覺化設置 [0-5]: ").strip()
             
             if choice == '0':
                 return
@@ -137,6 +153,12 @@ class TextAnalyzerMenu:
                 self.toggle_visualization()
             elif choice == '2':
                 self.handle_advanced_viz_menu()
+            elif choice == '3':
+                self.toggle_defer_viz()
+            elif choice == '4':
+                self.render_viz_queue()
+            elif choice == '5':
+                self.set_output_profile()
             else:
                 input("無效選項，請重新選擇。按Enter繼續...")
                 
@@ -182,6 +204,35 @@ class TextAnalyzerMenu:
         print(message)
         input("按Enter繼續...")
         
+    def toggle_defer_viz(self):
+        """切換批量分析時是否延遲生成圖表"""
+        self.defer_viz = not self.defer_viz
+        if self.defer_viz:
+            print(f"批量分析時只記錄圖表任務到 {self.viz_queue().queue_path}，稍後再統一渲染")
+            print("（延遲模式下不生成進階詞頻圖表）")
+        else:
+            print("批量分析時立即生成圖表")
+        input("按Enter繼續...")
+        
+    def viz_queue(self):
+        """當前輸出目錄下的延遲可視化隊列"""
+        return VizQueue(os.path.join(self.output_dir, DEFAULT_QUEUE_NAME))
+        
+    def render_viz_queue(self):
+        """批量渲染延遲隊列中的全部圖表"""
+        self.display_header()
+        queue = self.viz_queue()
+        total = len(queue)
+        if not total:
+            print(f"隊列 {queue.queue_path} 中沒有待渲染的任務")
+        else:
+            print(f"開始渲染 {total} 個文件的圖表...")
+            start_time = time.time()
+            rendered, failed = queue.drain(pool=self.get_render_pool())
+            print(f"已生成 {rendered} 張圖表，{failed} 個任務失敗（已保留在隊列中）")
+            print(f"總耗時: {time.time() - start_time:.2f} 秒")
+        input("按Enter繼續...")
+        
     def set_output_directory(self):
         """設置輸出目錄"""
         self.display_header()
@@ -196,7 +247,8 @@ class TextAnalyzerMenu:
     def set_export_formats(self):
         """設置輸出格式"""
         self.display_header()
-        print("可用格式: json, csv, excel")
+        print("可用格式: json, jsonl, csv, excel, parquet, arrow")
+        print("（jsonl、parquet、arrow 在批量分析時把所有文件的結果寫入同一組文件）")
         print("當前格式: {}".format(", ".join(self.export_formats)))
         
         formats = input("請輸入輸出格式（用逗號分隔，例如 json,csv）: ").strip()
@@ -205,6 +257,28 @@ class TextAnalyzerMenu:
             print(f"輸出格式已設置為: {', '.join(self.export_formats)}")
         input("按Enter繼續...")
         
+    def set_output_profile(self):
+        """設置圖表輸出配置（解析度和文件格式）"""
+        self.display_header()
+        print("圖表輸出配置決定圖表的解析度和文件格式:")
+        names = list(OUTPUT_PROFILES)
+        for i, name in enumerate(names, 1):
+            profile = OUTPUT_PROFILES[name]
+            print(f"{i}. {name} ({profile['format'].upper()}, {profile['dpi']} DPI)")
+        print(f"當前設置: {self.output_profile}")
+        
+        choice = input(f"請選擇輸出配置 [1-{len(names)}] (留空使用當前設置): ").strip()
+        if choice:
+            try:
+                self.output_profile = names[int(choice) - 1]
+                # 解析度隨配置改變，之後仍可單獨設置 DPI
+                self.dpi = OUTPUT_PROFILES[self.output_profile]['dpi']
+                print(f"圖表輸出配置已設置為: {self.output_profile}")
+            except (ValueError, IndexError):
+                print("錯誤：請輸入有效的選項")
+        
+        input("按Enter繼續...")
+        
     def set_dpi(self):
         """設置圖像解析度"""
         self.display_header()
@@ -222,40 +296,62 @@ class TextAnalyzerMenu:
         
         input("按Enter繼續...")
         
+    def set_viz_workers(self):
+        """設置並行渲染圖表的進程數"""
+        self.display_header()
+        print("每個文件的各個圖表互不依賴，可以使用多個進程同時渲染")
+        print("設置為 1 時按順序逐個生成圖表")
+        print(f"當前設置: {self.viz_workers}")
+        
+        try:
+            new_workers = input("請輸入新的進程數 (留空使用當前設置): ").strip()
+            if new_workers:
+                self.viz_workers = max(1, int(new_workers))
+                # 進程數改變後重新建立進程池
+                self.close_render_pool()
+                print(f"圖表渲染進程數已設置為: {self.viz_workers}")
+        except ValueError:
+            print("錯誤：請輸入有效的數字")
+        
+        input("按Enter繼續...")
+        
+    def get_render_pool(self):
+        """取得圖表渲染進程池，進程數為 1 時返回 None（按順序渲染）"""
+        if self.viz_workers <= 1:
+            return None
+        if self._render_pool is None:
+            from visualization import ChartRenderPool
+            self._render_pool = ChartRenderPool(processes=self.viz_workers)
+        return self._render_pool
+        
+    def close_render_pool(self):
+        """關閉圖表渲染進程池（等待未完成的圖表）"""
+        if self._render_pool is not None:
+            self._render_pool.close()
+            self._render_pool = None
+        
     def set_font_path(self):
         """設置中文字體路徑"""
         self.display_header()
         print("中文字體路徑用於生成包含中文的視覺化圖表")
         print(f"當前設置: {self.font_path or '默認系統字體'}")
         
-        macOS_fonts = [
-            "/System/Library/Fonts/PingFang.ttc",
-            "/System/Library/Fonts/STHeiti Light.ttc",
-            "/System/Library/Fonts/STHeiti Medium.ttc",
-            "/System/Library/Fonts/Hiragino Sans GB.ttc",
-            "/System/Library/Fonts/Songti.ttc"
-        ]
-        
-        if sys.platform == 'darwin':  # macOS
-            print("\n以下是常見的macOS中文字體路徑:")
-            for i, font in enumerate(macOS_fonts, 1):
-                exists = "✓" if os.path.exists(font) else "✗"
-                print(f"{i}. {font} {exists}")
-            
-            print("\n輸入數字選擇上述字體，或輸入完整的字體路徑:")
-            font_choice = input("選擇 (留空使用當前設置): ").strip()
-            
-            if font_choice.isdigit() and 1 <= int(font_choice) <= len(macOS_fonts):
-                self.font_path = macOS_fonts[int(font_choice) - 1]
-                print(f"字體路徑已設置為: {self.font_path}")
-            elif font_choice:
-                self.font_path = font_choice
-                print(f"字體路徑已設置為: {self.font_path}")
-        else:
-            new_font = input("請輸入中文字體路徑 (留空使用當前設置): ").strip()
-            if new_font:
-                self.font_path = new_font
-                print(f"字體路徑已設置為: {self.font_path}")
+        # 列出當前平台常見的中文字體路徑（macOS、Linux 的 Noto CJK / 文泉驛、Windows）
+        fonts = candidate_fonts()
+        print("\n以下是常見的中文字體路徑:")
+        for i, font in enumerate(fonts, 1):
+            exists = "✓" if os.path.exists(font) else "✗"
+            print(f"{i}. {font} {exists}")
+        
+        print("\n輸入數字選擇上述字體，或輸入完整的字體路徑:")
+        font_choice = input("選擇 (留空使用當前設置): ").strip()
+        
+        if font_choice.isdigit() and 1 <= int(font_choice) <= len(fonts):
+            self.font_path = fonts[int(font_choice) - 1]
+            print(f"字體路徑已設置為: {self.font_path}")
+        elif font_choice:
+            self.font_path = font_choice
+            print(f"字體路徑已設置為: {self.font_path}")
         
         input("按Enter繼續...")
         
@@ -312,7 +408,9 @@ class TextAnalyzerMenu:
         
         adv_viz = "無" if not self.advanced_viz else ", ".join(self.advanced_viz)
         print(f"進階詞頻視覺化: {adv_viz}")
+        print(f"圖表輸出配置: {self.output_profile}")
         print(f"圖像解析度: {self.dpi} DPI")
+        print(f"圖表渲染進程數: {self.viz_workers}")
         print(f"中文字體: {self.font_path or '默認系統字體'}")
         
         # 使用預設路徑顯示，而不是嘗試訪問不存在的屬性
@@ -373,7 +471,9 @@ class TextAnalyzerMenu:
         
         # 進行基本分析
         try:
-            results = self.analyzer.analyze_text(text)
+            # 只分詞一次，後續各項分析共用分詞結果
+            doc = self.analyzer.tokenize(text)
+            results = self.analyzer.analyze_text(doc)
             
             # 添加文本字符統計信息
             results['total_characters'] = total_chars
@@ -382,19 +482,19 @@ class TextAnalyzerMenu:
             
             # 添加高級分析
             print("正在進行情感分析...")
-            results['sentiment'] = self.analyzer.analyze_sentiment(text)
+            results['sentiment'] = self.analyzer.analyze_sentiment(doc)
             
             print("正在提取關鍵詞...")
-            results['keywords'] = self.analyzer.keyword_extraction(text)
+            results['keywords'] = self.analyzer.keyword_extraction(doc)
             
             print("正在識別命名實體...")
-            results['entities'] = self.analyzer.extract_entities(text)
+            results['entities'] = self.analyzer.extract_entities(doc)
             
             print("正在分析詞組 (N-grams)...")
-            results['ngrams'] = self.analyzer.extract_ngrams(text)
+            results['ngrams'] = self.analyzer.extract_ngrams(doc)
             
             print("正在生成文本摘要...")
-            results['summary'] = self.analyzer.generate_summary(text)
+            results['summary'] = self.analyzer.generate_summary(doc)
             
             # 導出結果
             output_path = os.path.join(self.output_dir, base_name)
@@ -406,13 +506,17 @@ class TextAnalyzerMenu:
             # 可視化
             if self.visualize:
                 print("\n正在生成視覺化圖表...")
+                # 繪圖庫只在需要生成圖表時才載入
+                from visualization import Visualizer
                 viz_folder = os.path.join(self.output_dir, 'visualizations')
                 viz_path = Visualizer.create_visualization_report(
                     results, 
                     output_dir=viz_folder, 
                     prefix=base_name,
                     font_path=self.font_path,
-                    dpi=self.dpi
+                    dpi=self.dpi,
+                    pool=self.get_render_pool(),
+                    profile=self.output_profile
                 )
                 print(f"已將視覺化圖表保存至: {viz_folder}")
                 
@@ -422,11 +526,12 @@ class TextAnalyzerMenu:
                     
                     # 創建高級詞頻視覺化目錄
                     advanced_viz_folder = os.path.join(viz_folder, 'advanced')
+                    ext = OUTPUT_PROFILES[self.output_profile]['format']
                     os.makedirs(advanced_viz_folder, exist_ok=True)
                     
                     # 詞頻統計餅圖
                     if 'pie' in self.advanced_viz:
-                        pie_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_pie.png")
+                        pie_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_pie.{ext}")
                         Visualizer.plot_advanced_word_frequency(
                             results['word_frequency'],
                             top_n=15,
@@ -439,7 +544,7 @@ class TextAnalyzerMenu:
                     
                     # 詞頻垂直條形圖
                     if 'vertical' in self.advanced_viz:
-                        vert_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_vertical.png")
+                        vert_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_vertical.{ext}")
                         Visualizer.plot_advanced_word_frequency(
                             results['word_frequency'],
                             title='詞頻垂直條形圖',
@@ -452,7 +557,7 @@ class TextAnalyzerMenu:
                     
                     # 按詞長度排序的詞頻圖
                     if 'length' in self.advanced_viz:
-                        len_path = os.path.join(advanced_viz_folder, f"{base_name}_word_by_length.png")
+                        len_path = os.path.join(advanced_viz_folder, f"{base_name}_word_by_length.{ext}")
                         Visualizer.plot_advanced_word_frequency(
                             results['word_frequency'],
                             title='按詞長度排序的詞頻圖',
@@ -521,69 +626,93 @@ class TextAnalyzerMenu:
         # 創建輸出目錄
         os.makedirs(self.output_dir, exist_ok=True)
         
-        # 根據參數選擇串行或並行處理
+        # JSONL 格式：所有文件的結果逐行寫入同一個文件，而不是每個文件單獨導出
+        export_formats = self.export_formats
+        jsonl = None
+        if 'jsonl' in export_formats:
+            jsonl = JsonlExporter(self.output_dir)
+            export_formats = [fmt for fmt in export_formats if fmt != 'jsonl']
+        
+        # Parquet / Arrow 格式：把整個語料庫寫入長格式的列式表
+        columnar = []
+        for fmt in FORMAT_SUFFIXES:
+            if fmt in export_formats:
+                try:
+                    columnar.append(ColumnarExporter(self.output_dir, format=fmt))
+                except ImportError as e:
+                    print(e)
+                    return
+        export_formats = [fmt for fmt in export_formats if fmt not in FORMAT_SUFFIXES]
+        
+        # 延遲可視化：渲染時需要從 JSON 結果文件讀回分析結果
+        viz_queue = None
+        if self.visualize and self.defer_viz:
+            viz_queue = self.viz_queue()
+            if 'json' not in export_formats:
+                export_formats = export_formats + ['json']
+        elif self.visualize:
+            # 繪圖庫只在需要生成圖表時才載入
+            from visualization import Visualizer
+        
+        # 根據參數選擇串行或並行處理，每個文件都執行完整的分析流程
         start_time = time.time()
         if use_parallel:
             print("使用並行處理模式...")
-            results = self.analyzer.analyze_files_parallel(file_list)
+            results = self.analyzer.iter_files_parallel(file_list, full=True)
         else:
             print("使用串行處理模式...")
-            results = self.analyzer.analyze_files(file_list)
+            results = self.analyzer.iter_files(file_list, full=True)
         
-        # 保存結果
-        for file_path, result in results.items():
+        # 每完成一個文件就保存結果並生成圖表
+        for file_path, result in results:
             filename = os.path.basename(file_path)
             base_name = os.path.splitext(filename)[0]
             output_path = os.path.join(self.output_dir, base_name)
             
-            # 添加高級分析結果（如果沒有錯誤）
-            if 'error' not in result:
-                try:
-                    # 讀取文件
-                    text = FileUtils.read_file(file_path)
-                    
-                    # 計算文本字符統計信息
-                    total_chars = len(text)
-                    chinese_chars = self.analyzer.count_chinese_characters(text)
-                    result['total_characters'] = total_chars
-                    result['chinese_characters'] = chinese_chars
-                    result['chinese_character_ratio'] = round(chinese_chars/total_chars*100, 2)
-                    
-                    print(f"{filename}: 總字符 {total_chars}, 中文字符 {chinese_chars} ({result['chinese_character_ratio']}%)")
-                    
-                    # 添加高級分析
-                    result['sentiment'] = self.analyzer.analyze_sentiment(text)
-                    result['keywords'] = self.analyzer.keyword_extraction(text)
-                    result['entities'] = self.analyzer.extract_entities(text)
-                    result['ngrams'] = self.analyzer.extract_ngrams(text)
-                    result['summary'] = self.analyzer.generate_summary(text)
-                except Exception as e:
-                    print(f"為 {filename} 添加高級分析時出錯: {str(e)}")
+            if 'error' in result:
+                print(f"分析 {filename} 時出錯: {result['error']}")
+            else:
+                print(f"{filename}: 總字符 {result['total_characters']}, 中文字符 {result['chinese_characters']} ({result['chinese_character_ratio']}%)")
             
             # 導出結果
-            FileUtils.export_results(result, output_path, self.export_formats)
+            doc_id = os.path.relpath(file_path, dir_path)
+            if jsonl is not None:
+                jsonl.write(doc_id, result)
+            for exporter in columnar:
+                exporter.write(doc_id, result)
+            FileUtils.export_results(result, output_path, export_formats)
             print(f"已保存 {filename} 分析結果")
             
             # 生成可視化
             if self.visualize and 'error' not in result:
                 viz_folder = os.path.join(self.output_dir, 'visualizations')
+                if viz_queue is not None:
+                    # 只記錄圖表任務，不在分析循環中繪圖
+                    viz_queue.enqueue(f"{output_path}.json", viz_folder, prefix=base_name, font_path=self.font_path,
+                                      profile=self.output_profile, dpi=self.dpi)
+                    continue
+                # 使用渲染進程池時不等待圖表完成，繼續處理下一個文件
                 Visualizer.create_visualization_report(
                     result, 
                     output_dir=viz_folder, 
                     prefix=base_name,
                     font_path=self.font_path,
-                    dpi=self.dpi
+                    dpi=self.dpi,
+                    pool=self.get_render_pool(),
+                    wait=False,
+                    profile=self.output_profile
                 )
                 
                 # 進階詞頻可視化
                 if self.advanced_viz and 'word_frequency' in result:
                     # 創建高級詞頻視覺化目錄
                     advanced_viz_folder = os.path.join(viz_folder, 'advanced')
+                    ext = OUTPUT_PROFILES[self.output_profile]['format']
                     os.makedirs(advanced_viz_folder, exist_ok=True)
                     
                     # 詞頻統計餅圖
                     if 'pie' in self.advanced_viz:
-                        pie_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_pie.png")
+                        pie_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_pie.{ext}")
                         Visualizer.plot_advanced_word_frequency(
                             result['word_frequency'],
                             top_n=15,
@@ -595,7 +724,7 @@ class TextAnalyzerMenu:
                     
                     # 詞頻垂直條形圖
                     if 'vertical' in self.advanced_viz:
-                        vert_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_vertical.png")
+                        vert_path = os.path.join(advanced_viz_folder, f"{base_name}_word_freq_vertical.{ext}")
                         Visualizer.plot_advanced_word_frequency(
                             result['word_frequency'],
                             title='詞頻垂直條形圖',
@@ -607,7 +736,7 @@ class TextAnalyzerMenu:
                     
                     # 按詞長度排序的詞頻圖
                     if 'length' in self.advanced_viz:
-                        len_path = os.path.join(advanced_viz_folder, f"{base_name}_word_by_length.png")
+                        len_path = os.path.join(advanced_viz_folder, f"{base_name}_word_by_length.{ext}")
                         Visualizer.plot_advanced_word_frequency(
                             result['word_frequency'],
                             title='按詞長度排序的詞頻圖',
@@ -617,6 +746,16 @@ class TextAnalyzerMenu:
                             dpi=self.dpi
                         )
         
+        # 等待背景中的圖表全部生成（進程池在下次批量分析時重新建立）
+        self.close_render_pool()
+        
+        if jsonl is not None:
+            jsonl.close()
+            print(f"已將 {jsonl.count} 個文件的結果寫入: {', '.join(jsonl.paths)}")
+        for exporter in columnar:
+            exporter.close()
+            print(f"已將 {exporter.count} 個文件的結果寫入: {', '.join(exporter.paths)}")
+        
         end_time = time.time()
         duration = end_time - start_time
         
@@ -625,6 +764,8 @@ class TextAnalyzerMenu:
         print(f"總耗時: {duration:.2f} 秒")
         print(f"平均每個文件: {duration/len(file_list):.2f} 秒")
         print(f"結果已保存到: {self.output_dir}")
+        if viz_queue is not None:
+            print(f"圖表任務已寫入 {viz_queue.queue_path}，可在視覺化設置中選擇「渲染延遲隊列中的圖表」")
         
         input("\n按Enter返回主菜單...")
         
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+圖表輸出配置
+
+每個配置決定圖表的解析度和文件格式。300 DPI 的 PNG 編碼耗時且佔用大量磁盤空間，
+只在需要印刷時使用；儀表板等網頁場景使用 web 或 thumbnail 即可。
+SVG 為矢量格式，dpi 只影響詞雲等嵌入的點陣圖像。
+wordcloud_preview 為 True 的配置使用低解析度畫布計算詞雲佈局。
+"""
+
+OUTPUT_PROFILES = {
+    'thumbnail': {'dpi': 48, 'format': 'png', 'wordcloud_preview': True},
+    'web': {'dpi': 96, 'format': 'png'},
+    'print': {'dpi': 300, 'format': 'png'},
+    'svg': {'dpi': 150, 'format': 'svg'},
+    'webp': {'dpi': 96, 'format': 'webp'}
+}
+
+DEFAULT_PROFILE = 'print'
+
+def resolve_profile(profile=None, dpi=None):
+    """返回輸出配置 {'dpi': ..., 'format': ...}
+
+    Args:
+        profile: 配置名稱（見 OUTPUT_PROFILES），None 表示使用默認配置
+        dpi: 指定時覆蓋配置中的解析度
+    """
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if profile not in OUTPUT_PROFILES:
+        raise ValueError(f"未知的輸出配置: {profile}，可選: {', '.join(OUTPUT_PROFILES)}")
+    resolved = dict(OUTPUT_PROFILES[profile])
+    if dpi:
+        resolved['dpi'] = dpi
+    return resolved
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import os
+import json_serializer
+import hashlib
+
+# 緩存默認大小上限（字節）
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+
+class ResultCache:
+    """以文件內容哈希為鍵的分析結果磁盤緩存
+
+    鍵由文件內容的 SHA-256 和分析器指紋（詞典、停用詞表和情感詞典）共同決定，
+    只要文件內容和分析資源不變，重新分析時即可直接取回上次的結果。
+    緩存總大小超過 max_size 時，按最近使用時間淘汰最舊的條目。
+    多個進程寫入同一目錄時，可把子進程中的 auto_evict 設為 False，
+    由主進程在子進程結束後調用 enforce_limit() 統一淘汰。
+    子類可以通過 SUFFIX、_load 和 _dump 改變條目的文件格式。
+    """
+    SUFFIX = '.json'
+
+    def __init__(self, cache_dir, fingerprint, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.fingerprint = fingerprint
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+        self.hits = 0
+        self.misses = 0
+        # 寫入後是否按本進程統計的大小自動淘汰
+        self.auto_evict = True
+
+    def key_for_file(self, file_path, variant=''):
+        """計算文件的緩存鍵
+
+        variant 用於區分同一文件的不同分析方式（例如基本分析和完整分析）
+        """
+        digest = hashlib.sha256()
+        digest.update(self.fingerprint.encode('utf-8'))
+        digest.update(variant.encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _path_for_key(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}{self.SUFFIX}")
+
+    def _load(self, f):
+        """從文件中讀取條目，內容無效時拋出 ValueError"""
+        return json_serializer.load(f)
+
+    def _dump(self, value, f):
+        """把條目寫入以二進制模式打開的文件"""
+        json_serializer.dump(value, f)
+
+    def get(self, key):
+        """讀取緩存結果，不存在時返回 None"""
+        path = self._path_for_key(key)
+        try:
+            with open(path, 'rb') as f:
+                result = self._load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        # 更新修改時間，作為最近使用時間供淘汰時參考
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """寫入緩存結果，必要時淘汰舊條目"""
+        path = self._path_for_key(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+
+        # 先寫入臨時文件再替換，避免並行寫入或中斷時留下不完整的緩存
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            self._dump(result, f)
+        os.replace(tmp_path, path)
+
+        self._size += os.path.getsize(path) - old_size
+        if self.auto_evict and self._size > self.max_size:
+            self.evict()
+
+    def _entries(self):
+        """列出所有緩存條目 (path, mtime, size)"""
+        entries = []
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(self.SUFFIX):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def enforce_limit(self):
+        """重新統計磁盤上所有條目（包括其他進程寫入的）的大小，超過上限時淘汰舊條目
+
+        Returns:
+            int: 刪除的條目數
+        """
+        self._size = sum(size for _, _, size in self._entries())
+        if self._size > self.max_size:
+            return self.evict()
+        return 0
+
+    def evict(self, target_ratio=0.9):
+        """按最近使用時間從舊到新刪除條目，直到總大小降到上限的 target_ratio 以下"""
+        entries = sorted(self._entries(), key=lambda x: x[1])
+        self._size = sum(size for _, _, size in entries)
+        target = self.max_size * target_ratio
+        removed = 0
+        for path, _, size in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """清空緩存"""
+        for path, _, _ in self._entries():
+            os.remove(path)
+        self._size = 0
+
+    @property
+    def size(self):
+        """緩存當前佔用的字節數"""
+        return self._size
@@ -5,62 +5,35 @@
 Configure matplotlib to properly display Chinese characters
 """
 
-import os
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
 import numpy as np
+from font_cache import resolve_chinese_font, configure_matplotlib_font
 
-def find_chinese_font():
+def find_chinese_font(refresh=False):
     """
     Find an available Chinese font in the system.
     Returns font path or None if no suitable font found.
-    """
-    # Common Chinese font paths on macOS
-    mac_font_paths = [
-        "/System/Library/Fonts/PingFang.ttc",
-        "/System/Library/Fonts/STHeiti Light.ttc",
-        "/System/Library/Fonts/STHeiti Medium.ttc",
-        "/System/Library/Fonts/Hiragino Sans GB.ttc",
-        "/System/Library/Fonts/Songti.ttc",
-        "/Library/Fonts/Arial Unicode.ttf"
-    ]
-    
-    # Check which fonts exist
-    for font_path in mac_font_paths:
-        if os.path.exists(font_path):
-            print(f"Found Chinese font: {font_path}")
-            return font_path
     
-    # If none of the predefined paths work, try to find any Chinese font
-    print("Searching for other Chinese fonts...")
-    all_fonts = fm.findSystemFonts()
-    for font in all_fonts:
-        # Look for font files that might contain Chinese characters
-        font_lower = font.lower()
-        if any(name in font_lower for name in ['ping', 'hei', 'song', 'ming', 'kaiti', 'fangsong', 'yahei', 'simhei', 'simsun']):
-            print(f"Found potential Chinese font: {font}")
-            return font
-    
-    return None
+    Checks common macOS, Linux (Noto CJK, WenQuanYi) and Windows font paths
+    before scanning the system fonts. The result is cached on disk and shared
+    with visualization.py; pass refresh=True to search again.
+    """
+    font_path = resolve_chinese_font(refresh=refresh)
+    if font_path:
+        print(f"Found Chinese font: {font_path}")
+    return font_path
 
-def configure_matplotlib_chinese():
+def configure_matplotlib_chinese(refresh=False):
     """
     Configure matplotlib to use Chinese fonts and return the font path used.
     """
     # Find a suitable Chinese font
-    font_path = find_chinese_font()
+    font_path = find_chinese_font(refresh)
     
     if font_path:
-        # Create font properties object
-        font_prop = fm.FontProperties(fname=font_path)
-        
-        # Configure matplotlib global settings
-        plt.rcParams['font.family'] = font_prop.get_name()
-        plt.rcParams['axes.unicode_minus'] = False  # Correctly display minus sign
-        
-        # Add the font to matplotlib's font manager
-        font_list = fm.fontManager.ttflist
-        font_list.extend([fm.FontEntry(fname=font_path, name=font_prop.get_name())])
+        # Add the font to matplotlib's font manager and configure global settings
+        configure_matplotlib_font(font_path)
         
         print(f"Successfully configured matplotlib to use {font_path}")
         return font_path
@@ -102,8 +75,8 @@ def test_chinese_plot(font_path=None):
         print("No specific font was used.")
 
 if __name__ == "__main__":
-    # Configure matplotlib for Chinese display
-    font_path = configure_matplotlib_chinese()
+    # Configure matplotlib for Chinese display (search again and update the font cache)
+    font_path = configure_matplotlib_chinese(refresh=True)
     
     # Test the configuration
     test_chinese_plot(font_path)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+列式導出的測試：Parquet 和 Arrow IPC 長格式表的寫入和讀回
+
+用法:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from columnar_exporter import ColumnarExporter
+from file_utils import FileUtils
+
+try:
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+RESULTS = {
+    'a.txt': {
+        'word_frequency': {'香港': 3, '文化': 1},
+        'pos_frequency': {'ns': 3, 'n': 1},
+        'keywords': {'香港': 0.5, '文化': 0.25},
+        'entities': {'location': ['香港', '九龍'], 'person': []}
+    },
+    'b.txt': {
+        'word_frequency': {'美食': 2},
+        'pos_frequency': {'n': 2},
+        'keywords': {'美食': 1.0},
+        'entities': {'organization': ['聯合國']}
+    }
+}
+
+@unittest.skipIf(pq is None, '需要 pyarrow')
+class ColumnarExporterTest(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def read(self, format, table, prefix='corpus'):
+        path = os.path.join(self.output_dir, f'{prefix}_{table}.{format}')
+        if format == 'parquet':
+            return pq.read_table(path)
+        with ipc.open_file(path) as reader:
+            return reader.read_all()
+
+    def export(self, format, row_group_size=2):
+        with ColumnarExporter(self.output_dir, format=format, row_group_size=row_group_size) as exporter:
+            for doc_id, result in RESULTS.items():
+                exporter.write(doc_id, result)
+            exporter.write('broken.txt', {'error': '無法讀取文件'})
+        return exporter
+
+    def check_round_trip(self, format):
+        exporter = self.export(format)
+        self.assertEqual(exporter.count, 2)
+        self.assertEqual(self.read(format, 'words').to_pylist(), [
+            {'doc_id': 'a.txt', 'word': '香港', 'count': 3},
+            {'doc_id': 'a.txt', 'word': '文化', 'count': 1},
+            {'doc_id': 'b.txt', 'word': '美食', 'count': 2}
+        ])
+        self.assertEqual(self.read(format, 'pos').column('count').to_pylist(), [3, 1, 2])
+        keywords = self.read(format, 'keywords')
+        self.assertEqual(str(keywords.schema.field('weight').type), 'double')
+        self.assertEqual(keywords.column('weight').to_pylist(), [0.5, 0.25, 1.0])
+        self.assertEqual(
+            [(row['doc_id'], row['entity_type'], row['entity']) for row in self.read(format, 'entities').to_pylist()],
+            [('a.txt', 'location', '香港'), ('a.txt', 'location', '九龍'), ('b.txt', 'organization', '聯合國')]
+        )
+
+    def test_parquet_round_trip(self):
+        self.check_round_trip('parquet')
+        # 每 row_group_size 行寫出一個行組
+        metadata = pq.ParquetFile(os.path.join(self.output_dir, 'corpus_words.parquet')).metadata
+        self.assertEqual(metadata.num_row_groups, 2)
+
+    def test_arrow_round_trip(self):
+        self.check_round_trip('arrow')
+
+    def test_empty_tables_are_written(self):
+        with ColumnarExporter(self.output_dir, format='parquet'):
+            pass
+        table = self.read('parquet', 'words')
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(table.column_names, ['doc_id', 'word', 'count'])
+
+    def test_single_file_export(self):
+        output_path = os.path.join(self.output_dir, 'a')
+        success = FileUtils.export_results(RESULTS['a.txt'], output_path, ['parquet', 'arrow'])
+        self.assertEqual(success, {'parquet': True, 'arrow': True})
+        for format in ('parquet', 'arrow'):
+            self.assertEqual(self.read(format, 'words', prefix='a').column('doc_id').to_pylist(), ['a', 'a'])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            ColumnarExporter(self.output_dir, format='csv')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+語料庫統計匯總的測試：分片匯總合併後與一次性匯總相同、排序與同分、保存和讀回
+
+用法:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from corpus_aggregator import CorpusAggregator, CountTable
+
+RESULTS = [
+    {'word_frequency': {'香港': 3, '文化': 1}, 'pos_frequency': {'ns': 3, 'n': 1},
+     'ngrams': {'香港 文化': 1}, 'entities': {'location': ['香港', '香港', '九龍']}, 'total_words': 4},
+    {'word_frequency': {'美食': 2, '香港': 1}, 'pos_frequency': {'n': 2, 'ns': 1},
+     'entities': {'organization': ['聯合國']}, 'total_words': 3},
+    {'error': '無法讀取文件'},
+    {'word_frequency': {'文化': 4, '歷史': 1}, 'pos_frequency': {'n': 5},
+     'ngrams': {'香港 文化': 2}, 'entities': {'location': ['九龍']}, 'total_words': 5},
+    # 詞語數超過計數數組的初始容量，檢查擴容
+    {'word_frequency': {f'詞{i}': 1 for i in range(1500)}, 'total_words': 1500}
+]
+
+def aggregate(results):
+    aggregator = CorpusAggregator()
+    for result in results:
+        aggregator.add(result)
+    return aggregator
+
+class CorpusAggregatorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_add(self):
+        aggregator = aggregate(RESULTS)
+        # 出錯的結果不計入文件數
+        self.assertEqual(aggregator.documents, 4)
+        self.assertEqual(aggregator.total_words, 1512)
+        self.assertEqual(aggregator.words.get('香港'), (4, 2))
+        self.assertEqual(aggregator.words.get('文化'), (5, 2))
+        self.assertEqual(aggregator.words.get('詞1499'), (1, 1))
+        self.assertEqual(aggregator.words.get('不存在'), (0, 0))
+        self.assertEqual(aggregator.ngrams.get('香港 文化'), (3, 2))
+        # 實體按出現的文件數計數，同一文件中重複的實體只計一次
+        self.assertEqual(aggregator.entities['location'].to_dict(), {'九龍': 2, '香港': 1})
+
+    def test_merge_equals_single_aggregate(self):
+        expected = aggregate(RESULTS)
+        merged = aggregate(RESULTS[:2]).merge(aggregate(RESULTS[2:]))
+        self.assertEqual(merged.summary(top_n=None), expected.summary(top_n=None))
+        self.assertEqual(merged.words.get('香港'), (4, 2))
+
+        # 合併空匯總不改變結果
+        merged.merge(CorpusAggregator())
+        self.assertEqual(merged.summary(top_n=None), expected.summary(top_n=None))
+
+    def test_top(self):
+        table = CountTable()
+        table.add({'甲': 1, '乙': 3, '丙': 3, '丁': 2})
+        table.add({'丁': 5})
+        self.assertEqual(table.top(), [('丁', 7), ('乙', 3), ('丙', 3), ('甲', 1)])
+        # 同分時先出現的詞語優先
+        self.assertEqual(table.top(2), [('丁', 7), ('乙', 3)])
+        self.assertEqual(table.top(2, by='docs'), [('丁', 2), ('甲', 1)])
+        self.assertEqual(table.top(10), table.top())
+        self.assertEqual(table.top(0), [])
+        self.assertEqual(table.top(-1), [])
+        self.assertEqual(CountTable().top(3), [])
+
+    def test_save_and_load(self):
+        aggregator = aggregate(RESULTS)
+        path = os.path.join(self.tmp_dir, 'part.npz')
+        aggregator.save(path)
+        loaded = CorpusAggregator.load(path)
+        self.assertEqual(loaded.summary(top_n=None), aggregator.summary(top_n=None))
+
+        # 讀回的匯總可以繼續累加
+        loaded.add(RESULTS[0])
+        self.assertEqual(loaded.words.get('香港'), (7, 3))
+        self.assertEqual(loaded.entities['location'].get('香港'), (2, 2))
+
+    def test_summary(self):
+        summary = aggregate(RESULTS).summary(top_n=2)
+        self.assertEqual(summary['documents'], 4)
+        self.assertEqual(summary['vocabulary_size'], 1504)
+        self.assertEqual(summary['word_frequency'], {'文化': 5, '香港': 4})
+        self.assertEqual(summary['document_frequency'], {'香港': 2, '文化': 2})
+        self.assertEqual(summary['pos_frequency'], {'n': 8, 'ns': 4})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+語料庫 TF-IDF 的測試：IDF 表的保存和讀回、IDF 公式、CSR 矩陣的形狀和內容、關鍵詞排序
+
+用法:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import math
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import json_serializer
+from corpus_tfidf import CorpusTfidf, IdfTable
+
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
+DOCS = [
+    ('a.txt', {'香港': 3, '文化': 1}),
+    ('b.txt', {'香港': 1, '美食': 2}),
+    ('c.txt', {}),
+    ('d.txt', {'歷史': 4, '香港': 2, '文化': 2})
+]
+
+def build(docs=DOCS):
+    corpus = CorpusTfidf()
+    for doc_id, term_counts in docs:
+        corpus.add(doc_id, term_counts)
+    return corpus
+
+class CorpusTfidfTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def to_dense(self, corpus, docs, idf=None):
+        """逐個文檔直接按定義計算的 TF-IDF 矩陣"""
+        idf_values = dict(zip(corpus.vocab.words, corpus.idf_values().tolist()))
+        rows = np.zeros((len(docs), len(corpus.vocab)))
+        for row, (_, term_counts) in enumerate(docs):
+            total = sum(term_counts.values())
+            for word, count in term_counts.items():
+                word_idf = idf_values[word] if idf is None else idf.idf_freq.get(word, idf.median_idf)
+                rows[row, corpus.vocab.get(word)] = count / total * word_idf
+        return rows
+
+    def csr_to_dense(self, corpus, idf=None):
+        data, indices, indptr = corpus.weights(idf)
+        rows = np.zeros((corpus.documents, len(corpus.vocab)))
+        for row in range(corpus.documents):
+            rows[row, indices[indptr[row]:indptr[row + 1]]] = data[indptr[row]:indptr[row + 1]]
+        return rows
+
+    def test_idf_values(self):
+        corpus = build()
+        idf = corpus.idf()
+        self.assertEqual(len(idf), 4)
+        # ln((1 + N) / (1 + df)) + 1
+        self.assertAlmostEqual(idf.idf_freq['香港'], math.log(5 / 4) + 1)
+        self.assertAlmostEqual(idf.idf_freq['文化'], math.log(5 / 3) + 1)
+        self.assertAlmostEqual(idf.idf_freq['美食'], math.log(5 / 2) + 1)
+        self.assertAlmostEqual(idf.median_idf, (math.log(5 / 3) + math.log(5 / 2)) / 2 + 1)
+
+    def test_idf_table_round_trip(self):
+        idf = IdfTable({'香港': 1.25, '文化': 1.5, '含 空白': 2.0, '美食': 1.0 / 3})
+        path = os.path.join(self.tmp_dir, 'idf.txt')
+        idf.save(path)
+        loaded = IdfTable.load(path)
+        # 含空白字符的詞語無法用 jieba 格式表示，保存時被略過
+        self.assertEqual(list(loaded.idf_freq), ['香港', '文化', '美食'])
+        for word, value in loaded.idf_freq.items():
+            self.assertAlmostEqual(value, idf.idf_freq[word], places=9)
+        self.assertEqual(os.listdir(self.tmp_dir), ['idf.txt'])
+
+        # 保存和讀回後指紋不變，內容改變時指紋改變
+        again = os.path.join(self.tmp_dir, 'again.txt')
+        loaded.save(again)
+        self.assertEqual(IdfTable.load(again).fingerprint(), loaded.fingerprint())
+        self.assertNotEqual(IdfTable({'香港': 1.0}).fingerprint(), loaded.fingerprint())
+
+    def test_csr_shape_and_values(self):
+        corpus = build()
+        data, indices, indptr = corpus.weights()
+        self.assertEqual(indptr.tolist(), [0, 2, 4, 4, 7])
+        self.assertEqual(len(data), len(indices))
+        self.assertEqual(len(data), indptr[-1])
+        np.testing.assert_allclose(self.csr_to_dense(corpus), self.to_dense(corpus, DOCS))
+
+        # 使用外部 IDF 表時，不在表中的詞語使用 median_idf
+        idf = IdfTable({'香港': 0.5, '文化': 2.0})
+        np.testing.assert_allclose(self.csr_to_dense(corpus, idf), self.to_dense(corpus, DOCS, idf))
+
+    def test_many_documents(self):
+        # 文檔數超過 1024 時分塊合併，結果仍與逐個文檔計算相同
+        docs = [(f'doc{i}.txt', {f'詞{j}': j + 1 for j in range(i % 7, i % 7 + 3)}) for i in range(2600)]
+        corpus = build(docs)
+        # 每 1024 個文檔合併為一塊，已合併的塊不再重新合併
+        self.assertEqual(corpus._blocks, 2)
+        self.assertEqual([len(block) for block in corpus._indices[:2]], [3 * 1024, 3 * 1024])
+        self.assertEqual(len(corpus._indices), 2 + 2600 - 2 * 1024)
+        data, indices, indptr = corpus.weights()
+        self.assertEqual(indptr[-1], 3 * len(docs))
+        np.testing.assert_allclose(self.csr_to_dense(corpus), self.to_dense(corpus, docs))
+
+    def test_save_matrix(self):
+        corpus = build()
+        path = os.path.join(self.tmp_dir, 'tfidf.npz')
+        corpus.save_matrix(path)
+        with np.load(path, allow_pickle=False) as saved:
+            self.assertEqual(saved['shape'].tolist(), [4, 4])
+            self.assertEqual(json_serializer.loads(saved['doc_ids'].tobytes()), ['a.txt', 'b.txt', 'c.txt', 'd.txt'])
+            self.assertEqual(json_serializer.loads(saved['vocabulary'].tobytes()), corpus.vocab.words)
+            np.testing.assert_allclose(saved['data'], corpus.weights()[0])
+
+    @unittest.skipIf(scipy is None, '需要 scipy')
+    def test_scipy_matrix(self):
+        corpus = build()
+        path = os.path.join(self.tmp_dir, 'tfidf.npz')
+        corpus.save_matrix(path)
+        matrix = scipy.sparse.load_npz(path)
+        self.assertEqual(matrix.shape, (4, 4))
+        np.testing.assert_allclose(matrix.toarray(), corpus.matrix().toarray())
+        np.testing.assert_allclose(matrix.toarray(), self.to_dense(corpus, DOCS))
+
+    def test_keywords(self):
+        keywords = dict(build().keywords(top_k=2))
+        self.assertEqual(list(keywords), ['a.txt', 'b.txt', 'c.txt', 'd.txt'])
+        self.assertEqual(list(keywords['a.txt']), ['香港', '文化'])
+        self.assertEqual(list(keywords['b.txt']), ['美食', '香港'])
+        self.assertEqual(keywords['c.txt'], {})
+        self.assertEqual(list(keywords['d.txt']), ['歷史', '文化'])
+        weights = list(keywords['d.txt'].values())
+        self.assertEqual(weights, sorted(weights, reverse=True))
+
+    def test_empty_corpus(self):
+        corpus = CorpusTfidf()
+        data, indices, indptr = corpus.weights()
+        self.assertEqual((len(data), indptr.tolist()), (0, [0]))
+        self.assertEqual(len(corpus.idf()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
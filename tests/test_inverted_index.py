@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+倒排索引的測試：布爾查詢（AND、OR、排除、字段前綴）、Top-K、文檔頻率，以及替換、刪除和重新打開
+
+用法:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from inverted_index import InvertedIndex, parse_query, parse_term
+
+RESULTS = {
+    'a.txt': {'word_frequency': {'香港': 3, '美食': 2}, 'pos_frequency': {'ns': 3, 'n': 2},
+              'entities': {'person': ['張三'], 'location': ['香港']}, 'total_words': 5},
+    'b.txt': {'word_frequency': {'香港': 1, '上海': 4, '美食': 1}, 'pos_frequency': {'ns': 5, 'n': 1},
+              'entities': {'location': ['上海', '香港', '上海']}, 'total_words': 6},
+    'c.txt': {'word_frequency': {'美食': 5, '上海': 1}, 'pos_frequency': {'n': 5, 'ns': 1},
+              'entities': {'person': ['李四'], 'time': ['今天']}, 'total_words': 6},
+    'd.txt': {'word_frequency': {'歷史': 2}, 'pos_frequency': {'n': 2}, 'total_words': 2},
+    'broken.txt': {'error': '無法讀取文件'}
+}
+
+class InvertedIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'index', 'index.db')
+        self.index = InvertedIndex(self.path, commit_every=2)
+        for doc_id, result in RESULTS.items():
+            self.index.add(doc_id, result)
+        self.index.commit()
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parse_query(self):
+        self.assertEqual(parse_term('person:張三'), ('person', '張三'))
+        # 未知的字段前綴和空詞語按普通詞語處理
+        self.assertEqual(parse_term('http:x'), ('word', 'http:x'))
+        self.assertEqual(parse_term('pos:'), ('word', 'pos:'))
+        self.assertEqual(parse_query('香港 AND pos:n -上海 OR 美食 OR -歷史'), [
+            ([('word', '香港'), ('pos', 'n')], [('word', '上海')]),
+            ([('word', '美食')], [])
+        ])
+
+    def test_document_and_term_counts(self):
+        # 出錯的結果不加入索引
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.doc_freq('美食'), 3)
+        self.assertEqual(self.index.doc_freq('上海', 'location'), 1)
+        self.assertEqual(self.index.doc_freq('今天', 'time'), 0)
+        self.assertEqual(self.index.doc_freq('不存在'), 0)
+
+    def test_and(self):
+        self.assertEqual(self.index.search('香港 美食'), [('a.txt', 5), ('b.txt', 2)])
+        self.assertEqual(self.index.search('香港 AND 美食'), self.index.search('香港 美食'))
+        self.assertEqual(self.index.search('美食 person:張三'), [('a.txt', 3)])
+        self.assertEqual(self.index.search('location:香港'), [('a.txt', 1), ('b.txt', 1)])
+        self.assertEqual(self.index.search('香港 不存在'), [])
+
+    def test_or(self):
+        self.assertEqual(self.index.search('香港 OR 上海'), [('b.txt', 5), ('a.txt', 3), ('c.txt', 1)])
+        # 不存在的詞語只令所在的子句不匹配
+        self.assertEqual(self.index.search('美食 OR 不存在'), [('c.txt', 5), ('a.txt', 2), ('b.txt', 1)])
+        self.assertEqual(self.index.search('歷史 OR person:李四'), [('d.txt', 2), ('c.txt', 1)])
+
+    def test_exclude(self):
+        self.assertEqual(self.index.search('香港 -上海'), [('a.txt', 3)])
+        self.assertEqual(self.index.search('美食 -香港'), [('c.txt', 5)])
+        self.assertEqual(self.index.search('美食 -不存在'), self.index.search('美食'))
+        # 只有排除的詞語時不匹配任何文檔
+        self.assertEqual(self.index.search('-香港'), [])
+
+    def test_top_k(self):
+        self.assertEqual(self.index.search('美食', limit=1), [('c.txt', 5)])
+        self.assertEqual(self.index.postings('美食'), [('c.txt', 5), ('a.txt', 2), ('b.txt', 1)])
+        self.assertEqual(self.index.postings('美食', limit=2), [('c.txt', 5), ('a.txt', 2)])
+        self.assertEqual(self.index.postings('n', 'pos', limit=1), [('c.txt', 5)])
+        self.assertEqual(self.index.postings('不存在'), [])
+        self.assertEqual(self.index.top_terms(limit=1), [('美食', 3)])
+        self.assertEqual(self.index.top_terms('pos'), [('n', 4), ('ns', 3)])
+
+    def test_replace_and_remove(self):
+        self.index.add('a.txt', {'word_frequency': {'歷史': 1}, 'pos_frequency': {'n': 1}})
+        self.index.commit()
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.doc_freq('美食'), 2)
+        self.assertEqual(self.index.search('person:張三'), [])
+        self.assertEqual(self.index.search('歷史'), [('d.txt', 2), ('a.txt', 1)])
+
+        self.assertTrue(self.index.remove('c.txt'))
+        self.assertFalse(self.index.remove('c.txt'))
+        self.index.commit()
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.postings('美食'), [('b.txt', 1)])
+        # 文檔頻率降為 0 的詞語不出現在 Top-K 中
+        self.assertEqual(self.index.top_terms('person'), [])
+
+    def test_reopen(self):
+        self.index.close()
+        self.index = InvertedIndex(self.path)
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.search('香港 美食'), [('a.txt', 5), ('b.txt', 2)])
+
+        # 在原有索引上繼續加入文檔時沿用已有的詞語
+        self.index.add('e.txt', {'word_frequency': {'美食': 7, '新詞': 1}})
+        self.index.commit()
+        self.assertEqual(self.index.doc_freq('美食'), 4)
+        self.assertEqual(self.index.search('美食', limit=1), [('e.txt', 7)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 序列化後端的測試：orjson 與標準庫的輸出逐字節相同，以及解析的往返
+
+用法:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import json
+import math
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import json_serializer
+
+OBJECTS = [
+    {'word_frequency': {'香港': 3, '文化': 1}, 'total_words': 4},
+    {'keywords': {'香港': 0.5, '美食': 0.123456789, '文化': 1e-05, '歷史': 2.5e16, '零': 0.0, '負': -0.75}},
+    {'nested': {'a': [1, [2, {'b': None, 'c': True}], ()], 'empty': {}}, 'list': []},
+    {'pos_frequency': {'n': 2}, 1: 'int key', 2.5: 'float key', True: 'bool key', None: 'null key'},
+    {'escapes': '引號 " 反斜線 \\ 換行 \n 製表 \t 控制 \x01 表情 😀'},
+    {'big': 2 ** 70, 'small': -2 ** 63},
+    {'nan': float('nan'), 'inf': float('inf')},
+    [1.5, 'a', ['b', 3]],
+    '單個字符串',
+    42
+]
+
+def expected(obj, pretty):
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class JsonSerializerTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = json_serializer.get_backend()
+
+    def tearDown(self):
+        json_serializer.set_backend(self.backend)
+
+    def check_identical(self, backend):
+        for obj in OBJECTS:
+            for pretty in (False, True):
+                with self.subTest(obj=obj, pretty=pretty):
+                    self.assertEqual(json_serializer.dumps(obj, pretty=pretty, backend=backend),
+                                     expected(obj, pretty))
+
+    def test_stdlib_output(self):
+        self.check_identical('json')
+
+    @unittest.skipIf('orjson' not in json_serializer.available_backends(), '需要 orjson')
+    def test_orjson_output_is_byte_identical(self):
+        # 只含字符串、整數和普通浮點數的結果確實由 orjson 編碼，而不是全部退回標準庫
+        self.assertIsNotNone(json_serializer._orjson_options(OBJECTS[0]))
+        self.assertIsNotNone(json_serializer._orjson_options(OBJECTS[3]))
+        self.check_identical('orjson')
+
+    def test_round_trip(self):
+        obj = OBJECTS[0]
+        for backend in json_serializer.available_backends():
+            json_serializer.set_backend(backend)
+            with self.subTest(backend=backend):
+                self.assertEqual(json_serializer.loads(json_serializer.dumps(obj)), obj)
+                self.assertEqual(json_serializer.loads(json_serializer.dumps(obj).decode('utf-8')), obj)
+                # orjson 不接受的 NaN 交給標準庫解析
+                self.assertTrue(math.isnan(json_serializer.loads(b'{"a":NaN}')['a']))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            json_serializer.set_backend('ujson')
+
+if __name__ == '__main__':
+    unittest.main()
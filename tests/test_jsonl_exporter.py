@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+JSON Lines 導出的測試：分片、壓縮、重新運行時取代或追加，以及用 iter_jsonl 讀回
+
+用法:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from jsonl_exporter import JsonlExporter, iter_jsonl
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RESULT = {'word_frequency': {'香港': 3, '文化': 1}, 'total_words': 4}
+
+class JsonlExporterTest(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def export(self, count, **kwargs):
+        with JsonlExporter(self.output_dir, **kwargs) as exporter:
+            for i in range(count):
+                exporter.write(f'doc{i}.txt', dict(RESULT, total_words=i))
+        return exporter
+
+    def read_all(self, paths):
+        return [record for path in paths for record in iter_jsonl(path)]
+
+    def test_single_file_round_trip(self):
+        exporter = self.export(3)
+        self.assertEqual(exporter.paths, [os.path.join(self.output_dir, 'results.jsonl')])
+        records = self.read_all(exporter.paths)
+        self.assertEqual([r['doc_id'] for r in records], ['doc0.txt', 'doc1.txt', 'doc2.txt'])
+        self.assertEqual(records[2], dict(RESULT, doc_id='doc2.txt', total_words=2))
+        # 非 ASCII 字符直接以 UTF-8 寫出，不轉義
+        with open(exporter.paths[0], 'rb') as f:
+            self.assertIn('香港'.encode('utf-8'), f.read())
+
+    def test_shards(self):
+        exporter = self.export(5, shard_size=2)
+        self.assertEqual([os.path.basename(p) for p in exporter.paths],
+                         ['results-00000.jsonl', 'results-00001.jsonl', 'results-00002.jsonl'])
+        self.assertEqual([len(list(iter_jsonl(p))) for p in exporter.paths], [2, 2, 1])
+        self.assertEqual(exporter.count, 5)
+
+    def test_gzip(self):
+        exporter = self.export(3, shard_size=2, compression='gzip', fsync_every=1)
+        self.assertTrue(all(p.endswith('.jsonl.gz') for p in exporter.paths))
+        with open(exporter.paths[0], 'rb') as f:
+            self.assertEqual(f.read(2), b'\x1f\x8b')
+        self.assertEqual(len(self.read_all(exporter.paths)), 3)
+
+    @unittest.skipIf(zstandard is None, '需要 zstandard')
+    def test_zstd_append_reads_every_frame(self):
+        self.export(2, compression='zstd')
+        exporter = self.export(3, compression='zstd', append=True)
+        self.assertEqual(len(self.read_all(exporter.paths)), 5)
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            JsonlExporter(self.output_dir, compression='bz2')
+
+    def test_rerun_replaces_previous_output(self):
+        self.export(3)
+        exporter = self.export(3)
+        self.assertEqual(len(self.read_all(exporter.paths)), 3)
+        self.assertEqual([name for name in os.listdir(self.output_dir) if name.endswith('.tmp')], [])
+
+    def test_rerun_removes_stale_shards(self):
+        self.export(5, shard_size=2, compression='gzip')
+        exporter = self.export(3, shard_size=2, compression='gzip')
+        self.assertEqual(sorted(os.listdir(self.output_dir)),
+                         ['results-00000.jsonl.gz', 'results-00001.jsonl.gz'])
+        self.assertEqual(len(self.read_all(exporter.paths)), 3)
+
+    def test_append(self):
+        self.export(2, compression='gzip')
+        exporter = self.export(2, compression='gzip', append=True)
+        self.assertEqual([r['doc_id'] for r in self.read_all(exporter.paths)],
+                         ['doc0.txt', 'doc1.txt', 'doc0.txt', 'doc1.txt'])
+
+        self.export(3, prefix='part', shard_size=2, append=True)
+        exporter = self.export(1, prefix='part', shard_size=2, append=True)
+        self.assertEqual([os.path.basename(p) for p in exporter.paths], ['part-00002.jsonl'])
+
+if __name__ == '__main__':
+    unittest.main()
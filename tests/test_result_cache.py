@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+分析結果緩存的測試：命中、指紋改變後失效、按最近使用時間淘汰
+
+用法:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from result_cache import ResultCache
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.file_path = os.path.join(self.tmp_dir, 'doc.txt')
+        self.write_file('香港是一座國際大都會。')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_file(self, text):
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_hit_after_put(self):
+        cache = ResultCache(self.cache_dir, 'fp')
+        key = cache.key_for_file(self.file_path)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, {'total_words': 3, 'word_frequency': {'香港': 1}})
+
+        # 新的緩存實例（例如下一次運行）也能取回同一結果
+        reopened = ResultCache(self.cache_dir, 'fp')
+        self.assertEqual(reopened.get(reopened.key_for_file(self.file_path)),
+                         {'total_words': 3, 'word_frequency': {'香港': 1}})
+        self.assertEqual((reopened.hits, reopened.misses), (1, 0))
+        self.assertEqual(reopened.size, cache.size)
+
+    def test_key_changes_with_content_fingerprint_and_variant(self):
+        cache = ResultCache(self.cache_dir, 'fp')
+        key = cache.key_for_file(self.file_path)
+        self.assertNotEqual(key, cache.key_for_file(self.file_path, variant='full'))
+        self.assertNotEqual(key, ResultCache(self.cache_dir, 'other').key_for_file(self.file_path))
+        self.write_file('香港是一座國際大都會！')
+        self.assertNotEqual(key, cache.key_for_file(self.file_path))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ResultCache(self.cache_dir, 'fp')
+        key = cache.key_for_file(self.file_path)
+        cache.put(key, {'a': 1})
+        with open(cache._path_for_key(key), 'wb') as f:
+            f.write(b'{not json')
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.misses, 1)
+
+    def test_evicts_least_recently_used(self):
+        value = {'payload': 'x' * 1000}
+        cache = ResultCache(self.cache_dir, 'fp', max_size=10 ** 9)
+        keys = [f'{i:02d}' + 'a' * 62 for i in range(5)]
+        for i, key in enumerate(keys):
+            cache.put(key, value)
+            past = time.time() - 100 + i
+            os.utime(cache._path_for_key(key), (past, past))
+        entry_size = cache.size // len(keys)
+
+        # 讀取最舊的條目後它成為最近使用的條目，不會被淘汰
+        self.assertIsNotNone(cache.get(keys[0]))
+        cache.max_size = entry_size * 3
+        cache.put('ff' + 'b' * 62, value)
+
+        self.assertLessEqual(cache.size, cache.max_size)
+        remaining = [key for key in keys if os.path.exists(cache._path_for_key(key))]
+        self.assertIn(keys[0], remaining)
+        self.assertNotIn(keys[1], remaining)
+        self.assertEqual(cache.size, sum(size for _, _, size in cache._entries()))
+
+    def test_enforce_limit_counts_entries_written_by_other_processes(self):
+        value = {'payload': 'x' * 1000}
+        worker = ResultCache(self.cache_dir, 'fp', max_size=1)
+        worker.auto_evict = False
+        for i in range(4):
+            worker.put(f'{i:02d}' + 'a' * 62, value)
+        self.assertEqual(len(worker._entries()), 4)
+
+        parent = ResultCache(self.cache_dir, 'fp', max_size=worker.size // 2)
+        self.assertGreater(parent.enforce_limit(), 0)
+        self.assertLessEqual(parent.size, parent.max_size)
+
+    def test_clear(self):
+        cache = ResultCache(self.cache_dir, 'fp')
+        cache.put(cache.key_for_file(self.file_path), {'a': 1})
+        cache.clear()
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(cache._entries(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+情感分析的回歸測試
+
+單字情感詞（「好」、「差」等）只有在 jieba 把它切成獨立的詞時才計入，
+不能命中「好像」、「只好」、「差不多」、「差別」這類較長詞語中的同一個字。
+
+用法:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from analyzer import ChineseTextAnalyzer
+
+class SentimentBoundaryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = ChineseTextAnalyzer()
+
+    def assertScore(self, text, score):
+        result = self.analyzer.analyze_sentiment(text)
+        self.assertEqual(result['sentiment_score'], score, result)
+
+    def test_single_character_inside_longer_words(self):
+        # 「好像」、「只好」中的「好」不是正面詞
+        self.assertScore("他好像病了，只好回家。", 0)
+        # 「差不多」、「差別」中的「差」不是負面詞
+        self.assertScore("差不多就行，沒有差別。", 0)
+
+    def test_single_character_as_own_token(self):
+        self.assertScore("這部電影很好。", 1)
+        self.assertScore("服務很差。", -1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+分詞結果緩存的測試：只改了停用詞表時重用緩存的分詞結果，詞典改變時重新分詞
+
+用法:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from analyzer import ChineseTextAnalyzer
+from result_cache import ResultCache
+from token_cache import TokenCache
+
+TEXT = "香港是一座國際大都會，擁有獨特的歷史和文化。香港的美食很好，遊客很多！"
+
+class TokenCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'doc.txt')
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            f.write(TEXT)
+        self.stopwords_path = os.path.join(self.tmp_dir, 'stopwords.txt')
+        with open(self.stopwords_path, 'w', encoding='utf-8') as f:
+            f.write('美食\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def analyzer(self):
+        analyzer = ChineseTextAnalyzer()
+        analyzer.token_cache = TokenCache(
+            os.path.join(self.tmp_dir, 'tokens'), analyzer.segmentation_fingerprint()
+        )
+        return analyzer
+
+    def analyze(self, analyzer):
+        results_cache = ResultCache(os.path.join(self.tmp_dir, 'results'), analyzer.fingerprint())
+        return dict(analyzer.iter_files([self.file_path], full=True, cache=results_cache))[self.file_path]
+
+    def test_stopwords_change_reuses_cached_tokens(self):
+        first = self.analyze(self.analyzer())
+        self.assertIn('美食', first['word_frequency'])
+
+        analyzer = self.analyzer()
+        analyzer.load_stopwords(self.stopwords_path)
+
+        def fail(text):
+            raise AssertionError('只改了停用詞表時不應重新分詞')
+        analyzer._segment = fail
+        result = self.analyze(analyzer)
+
+        self.assertEqual(analyzer.token_cache.hits, 1)
+        self.assertNotIn('error', result)
+        self.assertNotIn('美食', result['word_frequency'])
+
+        # 與不使用緩存的分析結果相同
+        fresh = ChineseTextAnalyzer()
+        fresh.load_stopwords(self.stopwords_path)
+        self.assertEqual(result, fresh.full_analysis(TEXT))
+
+    def test_basic_entry_is_completed_for_full_analysis(self):
+        analyzer = self.analyzer()
+        analyzer.tokenize_file(self.file_path)
+        full = analyzer.tokenize_file(self.file_path, full=True)
+        self.assertEqual(analyzer.token_cache.hits, 1)
+
+        # 補算了原文分詞結果後，緩存條目包含兩種分詞結果
+        words, flags, streams = analyzer.token_cache.get(analyzer.token_cache.key_for_file(self.file_path))
+        self.assertEqual(set(streams), {'raw', 'clean'})
+        self.assertEqual(''.join(words[i] for i in streams['raw'][0].tolist()), TEXT)
+        self.assertEqual(full.raw_words, ChineseTextAnalyzer().tokenize(TEXT).raw_words)
+
+    def test_dictionary_change_invalidates_tokens(self):
+        analyzer = self.analyzer()
+        key = analyzer.token_cache.key_for_file(self.file_path)
+        analyzer.tokenize_file(self.file_path)
+
+        dict_path = os.path.join(self.tmp_dir, 'user_dict.txt')
+        with open(dict_path, 'w', encoding='utf-8') as f:
+            # 詞典是 jieba 的全局狀態，使用測試文本中沒有的詞語，避免影響其他測試
+            f.write('測試專用詞條 10 n\n')
+        analyzer.load_user_dict(dict_path)
+        self.assertNotEqual(key, analyzer.token_cache.key_for_file(self.file_path))
+        self.assertIsNone(analyzer.token_cache.get(analyzer.token_cache.key_for_file(self.file_path)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+分詞結果緩存
+
+以文件內容哈希和分詞指紋（jieba 版本、主詞典和自訂詞典）為鍵，保存每個文件未經過濾的
+分詞和詞性標注結果。停用詞表、情感詞典或 IDF 表改變時分析結果緩存會失效，
+但分詞結果不受影響：重新分析時從緩存中取回詞語序列，只需重新過濾和統計，無需再調用 jieba。
+只有自訂詞典改變時才需要重新分詞。
+
+每個條目是一個 .npz 文件（不使用 pickle），包含文檔自己的詞語表和詞性表（JSON 字節），
+以及已計算的每種分詞結果（原文分詞 raw 和去除標點後分詞 clean）以這兩張表下標表示的詞語序列和詞性序列。
+"""
+
+import zipfile
+import numpy as np
+import json_serializer
+from result_cache import ResultCache, DEFAULT_MAX_SIZE
+
+# 緩存條目格式的版本號，修改條目結構時遞增
+TOKEN_CACHE_VERSION = 2
+
+class TokenCache(ResultCache):
+    """分詞結果的磁盤緩存
+
+    條目為 TokenizedDocument.compact() 返回的 (words, flags, {名稱: (word_index, flag_index)})
+    """
+    SUFFIX = '.npz'
+
+    def __init__(self, cache_dir, fingerprint, max_size=DEFAULT_MAX_SIZE):
+        """
+        Args:
+            cache_dir: 緩存目錄
+            fingerprint: 分詞指紋（ChineseTextAnalyzer.segmentation_fingerprint()）
+            max_size: 緩存大小上限（字節）
+        """
+        super().__init__(cache_dir, fingerprint, max_size)
+        self.set_fingerprint(fingerprint)
+
+    def set_fingerprint(self, fingerprint):
+        """分詞指紋改變（例如追加了自訂詞典）後更新緩存鍵"""
+        self.fingerprint = f"{TOKEN_CACHE_VERSION}:{fingerprint}"
+
+    def _load(self, f):
+        try:
+            with np.load(f, allow_pickle=False) as data:
+                streams = {
+                    name[:-len('_word_index')]: (data[name], data[name.replace('_word_index', '_flag_index')])
+                    for name in data.files if name.endswith('_word_index')
+                }
+                if not streams:
+                    raise KeyError('沒有分詞結果')
+                return (
+                    json_serializer.loads(data['words'].tobytes()),
+                    json_serializer.loads(data['flags'].tobytes()),
+                    streams
+                )
+        except (KeyError, zipfile.BadZipFile) as e:
+            raise ValueError(f"無效的分詞緩存條目: {e}")
+
+    def _dump(self, value, f):
+        words, flags, streams = value
+        arrays = {}
+        for name, (word_index, flag_index) in streams.items():
+            arrays[f'{name}_word_index'] = word_index.astype(np.int32)
+            arrays[f'{name}_flag_index'] = flag_index.astype(np.int32)
+        np.savez_compressed(
+            f,
+            words=np.frombuffer(json_serializer.dumps(words), dtype=np.uint8),
+            flags=np.frombuffer(json_serializer.dumps(flags), dtype=np.uint8),
+            **arrays
+        )
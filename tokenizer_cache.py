@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+jieba 分詞器狀態緩存
+
+把 jieba 的前綴詞典和項目自訂詞典合併後序列化到緩存文件中，
+之後啟動時只需一次 marshal 載入即可得到完整的分詞器狀態，
+無需再由 jieba 初始化默認詞典並逐行載入自訂詞典。
+緩存鍵包含 jieba 版本、主詞典文件信息和自訂詞典內容，任何一項改變都會自動重建緩存。
+同一緩存目錄可以保存多個自訂詞典的緩存，只保留最近使用的 MAX_CACHE_ENTRIES 個。
+"""
+
+import os
+import gc
+import glob
+import hashlib
+import marshal
+import tempfile
+import jieba
+from file_utils import DEFAULT_CACHE_DIR
+
+CACHE_PREFIX = 'jieba_tokenizer_'
+
+# 緩存目錄中最多保留的分詞器緩存數（按最近使用時間淘汰）
+MAX_CACHE_ENTRIES = 8
+
+def tokenizer_cache_key(custom_dict_path=None):
+    """計算分詞器緩存鍵"""
+    digest = hashlib.sha256()
+    digest.update(jieba.__version__.encode('utf-8'))
+
+    dict_path = jieba.dt.dictionary
+    if dict_path is None:
+        dict_path = os.path.join(os.path.dirname(jieba.__file__), jieba.DEFAULT_DICT_NAME)
+    if os.path.exists(dict_path):
+        stat = os.stat(dict_path)
+        digest.update(f"{os.path.abspath(dict_path)}:{stat.st_size}:{stat.st_mtime}".encode('utf-8'))
+
+    if custom_dict_path:
+        with open(custom_dict_path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:32]
+
+def _cache_path(key, cache_dir):
+    return os.path.join(cache_dir, f"{CACHE_PREFIX}{key}.marshal")
+
+def _load_state(cache_file):
+    """載入緩存的分詞器狀態，失敗時返回 None"""
+    # 載入數十萬個詞條時暫停垃圾回收，避免反覆觸發無用的回收掃描
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(cache_file, 'rb') as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _dump_state(cache_file, cache_dir, max_entries=MAX_CACHE_ENTRIES):
+    """把當前分詞器狀態寫入緩存文件，並淘汰最久未使用的緩存
+
+    使用不同自訂詞典的分析器可以共用同一緩存目錄，不會在每次啟動時互相刪除對方的緩存
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    state = (jieba.dt.FREQ, jieba.dt.total, jieba.dt.user_word_tag_tab)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        marshal.dump(state, f)
+    os.replace(tmp_path, cache_file)
+
+    entries = []
+    for path in glob.glob(os.path.join(cache_dir, f"{CACHE_PREFIX}*.marshal")):
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    entries.sort(reverse=True)
+    for _, stale in entries[max_entries:]:
+        if stale != cache_file:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+def load_tokenizer(custom_dict_path=None, cache_dir=None):
+    """初始化 jieba 並載入自訂詞典，優先使用合併後的緩存
+
+    Args:
+        custom_dict_path: 自訂詞典路徑
+        cache_dir: 緩存目錄，默認為 DEFAULT_CACHE_DIR
+
+    Returns:
+        bool: 是否從緩存載入
+    """
+    # 分詞器已經初始化（例如在同一進程中再次建立分析器），只需追加自訂詞典
+    if jieba.dt.initialized:
+        if custom_dict_path:
+            jieba.load_userdict(custom_dict_path)
+        return False
+
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    key = tokenizer_cache_key(custom_dict_path)
+    cache_file = _cache_path(key, cache_dir)
+
+    state = _load_state(cache_file) if os.path.exists(cache_file) else None
+    if state is not None:
+        # 更新修改時間，作為最近使用時間供淘汰時參考
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+        with jieba.dt.lock:
+            jieba.dt.FREQ, jieba.dt.total, jieba.dt.user_word_tag_tab = state
+            jieba.dt.initialized = True
+        return True
+
+    jieba.initialize()
+    if custom_dict_path:
+        jieba.load_userdict(custom_dict_path)
+    try:
+        _dump_state(cache_file, cache_dir)
+    except OSError as e:
+        print(f"無法寫入分詞器緩存 {cache_file}: {e}")
+    return False
@@ -1,37 +1,22 @@
 # -*- coding: utf-8 -*-
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
+import matplotlib
 from wordcloud import WordCloud
-import seaborn as sns
 import os
 import numpy as np
 import json
+import functools
+from collections import deque
+import multiprocessing as mp
+from figure_pool import FigurePool, save_figure, use_fast_style
+from output_profiles import resolve_profile
+from wordcloud_cache import WordcloudLayoutCache
+from font_cache import resolve_chinese_font, configure_matplotlib_font
+from corpus_aggregator import CountTable
 
 # Configure matplotlib to use Chinese font
-CHINESE_FONT_PATH = '/System/Library/Fonts/STHeiti Light.ttc'
-if os.path.exists(CHINESE_FONT_PATH):
-    plt.rcParams['font.family'] = fm.FontProperties(fname=CHINESE_FONT_PATH).get_name()
-    plt.rcParams['axes.unicode_minus'] = False  # Correctly display minus sign
-    DEFAULT_CHINESE_FONT = CHINESE_FONT_PATH
-else:
-    # Fallback to other Chinese fonts on macOS
-    mac_font_paths = [
-        "/System/Library/Fonts/PingFang.ttc",
-        "/System/Library/Fonts/Hiragino Sans GB.ttc",
-        "/System/Library/Fonts/Songti.ttc",
-        "/Library/Fonts/Arial Unicode.ttf"
-    ]
-    
-    DEFAULT_CHINESE_FONT = None
-    for font_path in mac_font_paths:
-        if os.path.exists(font_path):
-            plt.rcParams['font.family'] = fm.FontProperties(fname=font_path).get_name()
-            plt.rcParams['axes.unicode_minus'] = False
-            DEFAULT_CHINESE_FONT = font_path
-            break
-    
-    if DEFAULT_CHINESE_FONT is None:
-        pass
+# 字體查找結果緩存在磁盤上，每台機器只需查找一次
+DEFAULT_CHINESE_FONT = resolve_chinese_font()
+configure_matplotlib_font(DEFAULT_CHINESE_FONT)
 
 # 定義資源文件的基礎路徑
 RESOURCES_PATH = os.path.join(
@@ -73,146 +58,251 @@ def load_mapping_from_json(filename):
             print(f"映射文件不存在: {filepath} 或 {root_filepath}")
             return {}
 
-# 載入詞性、實體和情感標籤映射
-POS_MAPPING = load_mapping_from_json('pos_mapping.json')
-ENTITY_MAPPING = load_mapping_from_json('entity_mapping.json')
-SENTIMENT_MAPPING = load_mapping_from_json('sentiment_mapping.json')
+# 詞性、實體和情感標籤映射在首次使用時才載入
+_MAPPINGS = {}
+
+def get_mapping(filename):
+    """返回標籤映射（例如 'pos_mapping.json'），首次調用時從資源文件載入"""
+    if filename not in _MAPPINGS:
+        _MAPPINGS[filename] = load_mapping_from_json(filename)
+    return _MAPPINGS[filename]
+
+# 報告中的圖表類型（即圖表文件名的後綴）
+REPORT_CHARTS = {
+    'plot_word_frequency': 'word_frequency',
+    'generate_wordcloud': 'wordcloud',
+    'plot_pos_distribution': 'pos_distribution',
+    'plot_sentiment_analysis': 'sentiment',
+    'plot_ngrams': 'ngrams',
+    'plot_entities': 'entities',
+    'plot_keyword_weights': 'keywords'
+}
+
+# 所有圖表共用的 Figure 重用池；圖表直接通過 Agg 畫布繪製，不使用 pyplot
+FIGURE_POOL = FigurePool()
+use_fast_style()
+
+@functools.lru_cache(maxsize=None)
+def _wordcloud_font(font_path=None):
+    """確定詞雲使用的字體文件：指定的字體不存在時使用與 matplotlib 相同的默認中文字體"""
+    if font_path is not None and os.path.exists(font_path):
+        return font_path
+    return DEFAULT_CHINESE_FONT
+
+# 詞雲畫布大小（像素），預覽模式使用較小的畫布和較少的詞語
+WORDCLOUD_SIZE = (800, 600)
+WORDCLOUD_PREVIEW_SIZE = (400, 300)
+WORDCLOUD_PREVIEW_MAX_WORDS = 100
+
+# 詞雲佈局緩存
+WORDCLOUD_LAYOUTS = WordcloudLayoutCache()
+
+def _wordcloud_with_layout(word_freq, wc_kwargs, font_path=None):
+    """建立 WordCloud，佈局優先從緩存中取得，否則計算後寫入緩存"""
+    if font_path:
+        wc_kwargs = dict(wc_kwargs, font_path=font_path)
+    wc = WordCloud(**wc_kwargs)
+    
+    key = WORDCLOUD_LAYOUTS.key(word_freq, wc_kwargs)
+    layout = WORDCLOUD_LAYOUTS.get(key)
+    if layout is None:
+        wc.generate_from_frequencies(word_freq)
+        WORDCLOUD_LAYOUTS.put(key, wc.layout_)
+    else:
+        wc.layout_ = layout
+    return wc
+
+def _bar_palette(color_map, n):
+    """在顏色映射上均勻取樣 n 種顏色（去掉兩端，與 seaborn.color_palette 相同）"""
+    cmap = matplotlib.colormaps[color_map]
+    return [cmap(x) for x in np.linspace(0, 1, n + 2)[1:-1]]
+
+def _barh_with_values(ax, labels, values, color='C0', offset=0.1, fmt=str):
+    """繪製水平條形圖（第一項在最上方），並在每個條形末端顯示數值"""
+    positions = range(len(values))
+    ax.barh(positions, values, color=color)
+    ax.set_yticks(positions, labels=labels)
+    ax.invert_yaxis()
+    for i, v in enumerate(values):
+        ax.text(v + offset, i, fmt(v), va='center')
+
+def _render_job(job):
+    """在渲染進程中執行一個圖表任務 (method_name, kwargs)
+    
+    返回 (method_name, success)，success 為繪圖方法的返回值：
+    只有實際生成了圖表才為 True，沒有可繪製的數據或繪製失敗時為 False
+    """
+    method_name, kwargs = job
+    try:
+        return method_name, bool(getattr(Visualizer, method_name)(**kwargs))
+    except Exception as e:
+        print(f"生成圖表 {kwargs.get('save_path', method_name)} 時出錯: {e}")
+        return method_name, False
+
+class ChartRenderPool:
+    """圖表渲染進程池
+    
+    報告中的各個圖表互不依賴，可以分發到多個進程同時渲染。
+    進程池可在批量處理中跨文件重用；render_async 提交任務後立即返回，
+    分析主循環不必等待圖表完成。未完成的圖表數達到 max_pending 時，
+    render_async 會先等待較早提交的任務完成，避免排隊的任務和結果在整個批次中無限增長。
+    """
+    def __init__(self, processes=None, max_pending=None):
+        self.processes = processes or mp.cpu_count()
+        self.max_pending = max_pending or self.processes * 4
+        self._pool = None
+        # 已提交但尚未收回的 (AsyncResult, 圖表數)，按提交順序排列
+        self._pending = deque()
+        self._pending_jobs = 0
+        # 已收回的異步任務中成功和失敗的圖表數
+        self.rendered = 0
+        self.failed = 0
+    
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = mp.Pool(processes=self.processes)
+        return self._pool
+    
+    def render(self, jobs):
+        """並行渲染一組圖表並等待完成，返回 [(method_name, success), ...]"""
+        if not jobs:
+            return []
+        return self._get_pool().map(_render_job, jobs, chunksize=1)
+    
+    def render_async(self, jobs):
+        """提交一組圖表任務後立即返回 AsyncResult
+        
+        未完成的圖表數超過 max_pending 時先等待最早提交的任務完成
+        """
+        self._collect(len(jobs))
+        result = self._get_pool().map_async(_render_job, jobs, chunksize=1)
+        self._pending.append((result, len(jobs)))
+        self._pending_jobs += len(jobs)
+        return result
+    
+    def _collect(self, incoming=0, wait_all=False):
+        """收回已完成的異步任務，並等待到可以再提交 incoming 個圖表為止（wait_all 為 True 時等待全部任務）"""
+        while self._pending:
+            result, count = self._pending[0]
+            if not (wait_all or result.ready() or self._pending_jobs + incoming > self.max_pending):
+                break
+            self._pending.popleft()
+            self._pending_jobs -= count
+            for _, success in result.get():
+                if success:
+                    self.rendered += 1
+                else:
+                    self.failed += 1
+    
+    def wait(self):
+        """等待所有已提交的圖表完成，進程池保持可用"""
+        self._collect(wait_all=True)
+    
+    def close(self):
+        """等待所有已提交的圖表完成並關閉進程池"""
+        self.wait()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
 class Visualizer:
     @staticmethod
-    def plot_word_frequency(word_freq, top_n=20, title='詞頻統計', save_path=None, figsize=(12, 6)):
+    def plot_word_frequency(word_freq, top_n=20, title='詞頻統計', save_path=None, figsize=(12, 6), dpi=300):
         """繪製詞頻條形圖"""
         top_words = dict(sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:top_n])
         
-        plt.figure(figsize=figsize)
-        # 使用更高效的繪圖設置
-        with plt.style.context('fast'):
-            ax = sns.barplot(x=list(top_words.values()), y=list(top_words.keys()))
-        
-        # 在每個條形上顯示數值
-        for i, v in enumerate(list(top_words.values())):
-            ax.text(v + 0.1, i, str(v), va='center')
+        with FIGURE_POOL.axes(figsize) as (fig, ax):
+            # 在每個條形上顯示數值
+            _barh_with_values(ax, list(top_words.keys()), list(top_words.values()))
             
-        plt.title(title)
-        plt.xlabel('頻率')
-        plt.ylabel('詞語')
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            ax.set_title(title)
+            ax.set_xlabel('頻率')
+            ax.set_ylabel('詞語')
+            
+            if save_path:
+                save_figure(fig, save_path, dpi=dpi)
         
-        plt.close()
+        return True
     
     @staticmethod
     def generate_wordcloud(word_freq, title='詞雲圖', save_path=None, figsize=(10, 8), 
-                          font_path=None, background_color='white', max_words=200):
-        """生成詞雲"""
-        # 使用全局中文字體設置，除非指定了其他字體
-        if font_path is None:
-            # 首先嘗試使用我們已確認的全局中文字體
-            if 'DEFAULT_CHINESE_FONT' in globals() and DEFAULT_CHINESE_FONT:
-                font_path = DEFAULT_CHINESE_FONT
-            else:
-                # 嘗試其他常見的中文字體路徑
-                possible_fonts = [
-                    '/System/Library/Fonts/STHeiti Light.ttc',
-                    '/System/Library/Fonts/PingFang.ttc',
-                    '/System/Library/Fonts/Hiragino Sans GB.ttc',
-                    '/System/Library/Fonts/Songti.ttc',
-                    '/Library/Fonts/Arial Unicode.ttf',
-                    None
-                ]
-                
-                for font in possible_fonts:
-                    if font is None or os.path.exists(font):
-                        font_path = font
-                        break
-        else:
-            if not os.path.exists(font_path):
-                if 'DEFAULT_CHINESE_FONT' in globals() and DEFAULT_CHINESE_FONT:
-                    font_path = DEFAULT_CHINESE_FONT
-                else:
-                    font_path = None
+                          font_path=None, background_color='white', max_words=200, dpi=300, preview=False):
+        """生成詞雲
         
-        # 生成詞雲的核心代碼
+        佈局通過 WORDCLOUD_LAYOUTS 緩存，詞語和相對詞頻相近的文檔重用已計算的佈局；
+        preview 為 True 時使用低解析度畫布和較少的詞語，用於快速預覽
+        """
+        font_path = _wordcloud_font(font_path)
+        
+        # 設置詞雲參數
+        if preview:
+            width, height = WORDCLOUD_PREVIEW_SIZE
+            max_words = min(max_words, WORDCLOUD_PREVIEW_MAX_WORDS)
+        else:
+            width, height = WORDCLOUD_SIZE
+        wc_kwargs = {
+            'background_color': background_color,
+            'width': width,
+            'height': height,
+            'max_words': max_words,
+            'collocations': False,
+            'mode': 'RGBA'  # 使用RGBA模式，支持透明背景
+        }
+        
+        # 佈局只計算一次：字體無法使用時改用不帶字體的簡化版詞雲
         try:
-            # 設置詞雲參數
-            wc_kwargs = {
-                'background_color': background_color,
-                'width': 800,
-                'height': 600,
-                'max_words': max_words,
-                'collocations': False,
-                'mode': 'RGBA'  # 使用RGBA模式，支持透明背景
-            }
-            
-            # 如果確實有字體存在，則使用它
-            if font_path and os.path.exists(font_path):
-                wc_kwargs['font_path'] = font_path
-                
-            wc = WordCloud(**wc_kwargs).generate_from_frequencies(word_freq)
-            
-            plt.figure(figsize=figsize)
-            plt.imshow(wc, interpolation='bilinear')
-            plt.axis('off')
-            plt.title(title)
-            
-            if save_path:
-                os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
-                plt.savefig(save_path, dpi=300, bbox_inches='tight')
-                
-            plt.close()
-            return True
-            
+            wc = _wordcloud_with_layout(word_freq, wc_kwargs, font_path)
         except Exception as e:
+            if not font_path:
+                return False
             try:
-                # 備用方法：創建一個非常簡單的詞雲，不使用任何字體
-                wc = WordCloud(background_color=background_color, width=800, height=600, 
-                               max_words=max_words, collocations=False).generate_from_frequencies(word_freq)
-                
-                plt.figure(figsize=figsize)
-                plt.imshow(wc, interpolation='bilinear')
-                plt.axis('off')
-                plt.title("詞雲圖 (簡化版)")
-                
-                if save_path:
-                    plt.savefig(save_path, dpi=300, bbox_inches='tight')
-                
-                plt.close()
-                return True
-                
+                wc = _wordcloud_with_layout(word_freq, wc_kwargs, None)
+                title = "詞雲圖 (簡化版)"
             except Exception as e2:
                 return False
+        
+        with FIGURE_POOL.axes(figsize) as (fig, ax):
+            ax.imshow(wc, interpolation='bilinear')
+            ax.axis('off')
+            ax.set_title(title)
+            
+            if save_path:
+                save_figure(fig, save_path, dpi=dpi)
+        
+        return True
     
     @staticmethod
-    def plot_pos_distribution(pos_freq, title='詞性分布', save_path=None, figsize=(10, 6)):
+    def plot_pos_distribution(pos_freq, title='詞性分布', save_path=None, figsize=(10, 6), dpi=300):
         """繪製詞性分布圖"""
         # 將詞性標籤轉換為繁體中文
+        pos_mapping = get_mapping('pos_mapping.json')
         pos_freq_translated = {}
         for pos, freq in pos_freq.items():
-            translated_pos = POS_MAPPING.get(pos, pos)  # 如果找不到映射，保留原始標籤
+            translated_pos = pos_mapping.get(pos, pos)  # 如果找不到映射，保留原始標籤
             pos_freq_translated[translated_pos] = freq
         
-        plt.figure(figsize=figsize)
-        with plt.style.context('fast'):
-            ax = sns.barplot(x=list(pos_freq_translated.values()), y=list(pos_freq_translated.keys()))
-        
-        # 在每個條形上顯示數值
-        for i, v in enumerate(list(pos_freq_translated.values())):
-            ax.text(v + 0.1, i, str(v), va='center')
+        with FIGURE_POOL.axes(figsize) as (fig, ax):
+            # 在每個條形上顯示數值
+            _barh_with_values(ax, list(pos_freq_translated.keys()), list(pos_freq_translated.values()))
             
-        plt.title(title)
-        plt.xlabel('頻率')
-        plt.ylabel('詞性')
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            ax.set_title(title)
+            ax.set_xlabel('頻率')
+            ax.set_ylabel('詞性')
             
-        plt.close()
+            if save_path:
+                save_figure(fig, save_path, dpi=dpi)
+        
+        return True
     
     @staticmethod
-    def plot_sentiment_analysis(sentiment_data, title='情感分析', save_path=None, figsize=(8, 5)):
+    def plot_sentiment_analysis(sentiment_data, title='情感分析', save_path=None, figsize=(8, 5), dpi=300):
         """繪製情感分析結果圖表"""
         # 從情感分析結果中提取數據
         positive = sentiment_data.get('positive_count', 0)
@@ -224,179 +314,196 @@ class Visualizer:
             neutral = 1
         
         # 繪製條形圖 - 移除情感得分
-        plt.figure(figsize=figsize)
-        categories = [SENTIMENT_MAPPING.get('positive', '正面情感'), 
-                     SENTIMENT_MAPPING.get('negative', '負面情感'), 
-                     SENTIMENT_MAPPING.get('neutral', '中性情感')]
+        sentiment_mapping = get_mapping('sentiment_mapping.json')
+        categories = [sentiment_mapping.get('positive', '正面情感'), 
+                     sentiment_mapping.get('negative', '負面情感'), 
+                     sentiment_mapping.get('neutral', '中性情感')]
         values = [positive, negative, neutral]
         colors = ['green', 'red', 'blue']
         
-        with plt.style.context('fast'):
-            bars = plt.bar(categories, values, color=colors)
-        
-        # 添加數值標籤
-        for bar in bars:
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{height}', ha='center', va='bottom')
-        
-        plt.title(title)
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        with FIGURE_POOL.axes(figsize) as (fig, ax):
+            bars = ax.bar(categories, values, color=colors)
+            
+            # 添加數值標籤
+            for bar in bars:
+                height = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+                        f'{height}', ha='center', va='bottom')
             
-        plt.close()
+            ax.set_title(title)
+            
+            if save_path:
+                save_figure(fig, save_path, dpi=dpi)
+        
+        return True
     
     @staticmethod
-    def plot_ngrams(ngrams, top_n=15, title='常見詞組', save_path=None, figsize=(12, 6)):
+    def plot_ngrams(ngrams, top_n=15, title='常見詞組', save_path=None, figsize=(12, 6), dpi=300):
         """繪製n-gram頻率圖"""
         top_ngrams = dict(sorted(ngrams.items(), key=lambda x: x[1], reverse=True)[:top_n])
         
-        plt.figure(figsize=figsize)
-        with plt.style.context('fast'):
-            ax = sns.barplot(x=list(top_ngrams.values()), y=list(top_ngrams.keys()))
-        
-        # 在每個條形上顯示數值
-        for i, v in enumerate(list(top_ngrams.values())):
-            ax.text(v + 0.1, i, str(v), va='center')
+        with FIGURE_POOL.axes(figsize) as (fig, ax):
+            # 在每個條形上顯示數值
+            _barh_with_values(ax, list(top_ngrams.keys()), list(top_ngrams.values()))
             
-        plt.title(title)
-        plt.xlabel('頻率')
-        plt.ylabel('詞組')
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            ax.set_title(title)
+            ax.set_xlabel('頻率')
+            ax.set_ylabel('詞組')
             
-        plt.close()
+            if save_path:
+                save_figure(fig, save_path, dpi=dpi)
+        
+        return True
     
     @staticmethod
-    def plot_entities(entities, title='命名實體統計', save_path=None, figsize=(12, 8)):
+    def plot_entities(entities, title='命名實體統計', save_path=None, figsize=(12, 8), dpi=300):
         """繪製命名實體統計圖"""
         # 轉換實體類型名稱為繁體中文
+        entity_mapping = get_mapping('entity_mapping.json')
         entity_counts = {}
         for entity_type, entity_list in entities.items():
             if entity_list:  # 只處理非空列表
                 # 將英文實體類型轉換為繁體中文
-                translated_type = ENTITY_MAPPING.get(entity_type, entity_type)
+                translated_type = entity_mapping.get(entity_type, entity_type)
                 entity_counts[translated_type] = len(entity_list)
         
         if not entity_counts:
-            return
+            return False
         
         # 繪製餅圖
-        plt.figure(figsize=figsize)
-        with plt.style.context('fast'):
-            plt.pie(entity_counts.values(), labels=entity_counts.keys(), autopct='%1.1f%%')
-        
-        plt.title(title)
-        plt.axis('equal')  # 使餅圖為正圓形
-        
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        with FIGURE_POOL.axes(figsize) as (fig, ax):
+            ax.pie(list(entity_counts.values()), labels=list(entity_counts.keys()), autopct='%1.1f%%')
             
-        plt.close()
+            ax.set_title(title)
+            ax.axis('equal')  # 使餅圖為正圓形
+            
+            if save_path:
+                save_figure(fig, save_path, dpi=dpi)
+        
+        return True
     
     @staticmethod
-    def plot_keyword_weights(keywords, top_n=15, title='關鍵詞權重', save_path=None, figsize=(12, 6)):
+    def plot_keyword_weights(keywords, top_n=15, title='關鍵詞權重', save_path=None, figsize=(12, 6), dpi=300):
         """繪製關鍵詞權重圖"""
         top_keywords = dict(sorted(keywords.items(), key=lambda x: x[1], reverse=True)[:top_n])
         
-        plt.figure(figsize=figsize)
-        with plt.style.context('fast'):
-            ax = sns.barplot(x=list(top_keywords.values()), y=list(top_keywords.keys()))
-        
-        # 在每個條形上顯示數值
-        for i, v in enumerate(list(top_keywords.values())):
-            ax.text(v + 0.01, i, f'{v:.3f}', va='center')
+        with FIGURE_POOL.axes(figsize) as (fig, ax):
+            # 在每個條形上顯示數值
+            _barh_with_values(ax, list(top_keywords.keys()), list(top_keywords.values()),
+                              offset=0.01, fmt=lambda v: f'{v:.3f}')
             
-        plt.title(title)
-        plt.xlabel('權重')
-        plt.ylabel('關鍵詞')
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            ax.set_title(title)
+            ax.set_xlabel('權重')
+            ax.set_ylabel('關鍵詞')
             
-        plt.close()
+            if save_path:
+                save_figure(fig, save_path, dpi=dpi)
+        
+        return True
     
     @staticmethod
-    def create_visualization_report(results, output_dir='visualization', prefix='', font_path=None, dpi=300):
-        """創建完整的可視化報告
+    def report_jobs(results, output_dir='visualization', prefix='', font_path=None, charts=None,
+                    profile=None, dpi=None):
+        """列出可視化報告中需要生成的圖表任務 [(method_name, kwargs), ...]
         
-        將所有分析結果圖表保存到指定目錄
+        charts 為圖表類型列表（見 REPORT_CHARTS），只生成其中列出的圖表；None 表示全部。
+        profile 為輸出配置名稱（見 OUTPUT_PROFILES），決定圖表的解析度和文件格式；指定 dpi 時覆蓋配置中的解析度
         """
-        # 創建輸出目錄
-        os.makedirs(output_dir, exist_ok=True)
-        
         # 為避免文件名衝突，添加前綴（例如，文件名）
         if prefix and not prefix.endswith('_'):
             prefix = prefix + '_'
         
-        # 詞頻分析
-        if 'word_frequency' in results:
-            word_freq_path = os.path.join(output_dir, f"{prefix}word_frequency.png")
-            Visualizer.plot_word_frequency(
-                results['word_frequency'], 
-                title='詞頻統計', 
-                save_path=word_freq_path
-            )
-        
-        # 詞雲
+        output = resolve_profile(profile, dpi)
+        ext = output['format']
+        
+        jobs = []
+        
+        # 詞頻分析和詞雲
         if 'word_frequency' in results:
-            wordcloud_path = os.path.join(output_dir, f"{prefix}wordcloud.png")
-            Visualizer.generate_wordcloud(
-                results['word_frequency'], 
-                title='詞雲圖', 
-                save_path=wordcloud_path,
-                font_path=font_path
-            )
+            jobs.append(('plot_word_frequency', {
+                'word_freq': results['word_frequency'],
+                'title': '詞頻統計',
+                'save_path': os.path.join(output_dir, f"{prefix}word_frequency.{ext}")
+            }))
+            jobs.append(('generate_wordcloud', {
+                'word_freq': results['word_frequency'],
+                'title': '詞雲圖',
+                'save_path': os.path.join(output_dir, f"{prefix}wordcloud.{ext}"),
+                'font_path': font_path,
+                'preview': output.get('wordcloud_preview', False)
+            }))
         
         # 詞性分布
         if 'pos_frequency' in results:
-            pos_path = os.path.join(output_dir, f"{prefix}pos_distribution.png")
-            Visualizer.plot_pos_distribution(
-                results['pos_frequency'], 
-                title='詞性分布', 
-                save_path=pos_path
-            )
+            jobs.append(('plot_pos_distribution', {
+                'pos_freq': results['pos_frequency'],
+                'title': '詞性分布',
+                'save_path': os.path.join(output_dir, f"{prefix}pos_distribution.{ext}")
+            }))
         
         # 情感分析
         if 'sentiment' in results:
-            sentiment_path = os.path.join(output_dir, f"{prefix}sentiment.png")
-            Visualizer.plot_sentiment_analysis(
-                results['sentiment'], 
-                title='情感分析結果', 
-                save_path=sentiment_path
-            )
+            jobs.append(('plot_sentiment_analysis', {
+                'sentiment_data': results['sentiment'],
+                'title': '情感分析結果',
+                'save_path': os.path.join(output_dir, f"{prefix}sentiment.{ext}")
+            }))
         
         # N-gram分析
         if 'ngrams' in results:
-            ngrams_path = os.path.join(output_dir, f"{prefix}ngrams.png")
-            Visualizer.plot_ngrams(
-                results['ngrams'], 
-                title='常見詞組', 
-                save_path=ngrams_path
-            )
+            jobs.append(('plot_ngrams', {
+                'ngrams': results['ngrams'],
+                'title': '常見詞組',
+                'save_path': os.path.join(output_dir, f"{prefix}ngrams.{ext}")
+            }))
         
         # 命名實體分析
         if 'entities' in results:
-            entities_path = os.path.join(output_dir, f"{prefix}entities.png")
-            Visualizer.plot_entities(
-                results['entities'], 
-                title='命名實體統計', 
-                save_path=entities_path
-            )
+            jobs.append(('plot_entities', {
+                'entities': results['entities'],
+                'title': '命名實體統計',
+                'save_path': os.path.join(output_dir, f"{prefix}entities.{ext}")
+            }))
         
         # 關鍵詞分析
         if 'keywords' in results:
-            keywords_path = os.path.join(output_dir, f"{prefix}keywords.png")
-            Visualizer.plot_keyword_weights(
-                results['keywords'], 
-                title='關鍵詞權重', 
-                save_path=keywords_path
-            )
+            jobs.append(('plot_keyword_weights', {
+                'keywords': results['keywords'],
+                'title': '關鍵詞權重',
+                'save_path': os.path.join(output_dir, f"{prefix}keywords.{ext}")
+            }))
+        
+        for _, kwargs in jobs:
+            kwargs['dpi'] = output['dpi']
+        
+        if charts is not None:
+            jobs = [job for job in jobs if REPORT_CHARTS[job[0]] in charts]
+        
+        return jobs
+    
+    @staticmethod
+    def create_visualization_report(results, output_dir='visualization', prefix='', font_path=None, dpi=None,
+                                    pool=None, wait=True, profile=None):
+        """創建完整的可視化報告
+        
+        將所有分析結果圖表保存到指定目錄。
+        profile 為輸出配置名稱（thumbnail、web、print、svg、webp，默認 print），指定 dpi 時覆蓋配置中的解析度；
+        指定 pool（ChartRenderPool）時各圖表在進程池中並行渲染；
+        wait 為 False 時提交任務後立即返回，圖表在背景中繼續生成。
+        """
+        # 創建輸出目錄
+        os.makedirs(output_dir, exist_ok=True)
+        
+        jobs = Visualizer.report_jobs(results, output_dir=output_dir, prefix=prefix, font_path=font_path,
+                                      profile=profile, dpi=dpi)
+        
+        if pool is None:
+            for job in jobs:
+                _render_job(job)
+        elif wait:
+            pool.render(jobs)
+        else:
+            pool.render_async(jobs)
         
         return output_dir
     
@@ -455,117 +562,109 @@ class Visualizer:
         top_words = dict(sorted_words[:top_n])
         
         # 設置顏色
-        cmap = plt.get_cmap(color_map)
-        
-        plt.figure(figsize=figsize)
-        
-        # 基於分類繪圖
-        if categories and plot_type != 'pie':
-            # 初始化分類數據
-            category_data = {}
-            uncategorized_words = []
-            
-            # 將詞語按分類組織
-            for word, freq in top_words.items():
-                categorized = False
-                for category_name, word_list in categories.items():
-                    if word in word_list:
-                        if category_name not in category_data:
-                            category_data[category_name] = []
-                        category_data[category_name].append((word, freq))
-                        categorized = True
-                        break
+        cmap = matplotlib.colormaps[color_map]
+        
+        with FIGURE_POOL.figure(figsize) as fig:
+            # 基於分類繪圖
+            if categories and plot_type != 'pie':
+                # 初始化分類數據
+                category_data = {}
+                uncategorized_words = []
                 
-                if not categorized:
-                    uncategorized_words.append((word, freq))
-            
-            # 添加未分類詞語
-            if uncategorized_words:
-                category_data['其他'] = uncategorized_words
-            
-            # 為每個分類創建子圖
-            fig, axes = plt.subplots(len(category_data), 1, figsize=figsize)
-            fig.suptitle(title, fontsize=16)
-            
-            for idx, (category_name, word_data) in enumerate(category_data.items()):
-                ax = axes[idx] if len(category_data) > 1 else axes
+                # 將詞語按分類組織
+                for word, freq in top_words.items():
+                    categorized = False
+                    for category_name, word_list in categories.items():
+                        if word in word_list:
+                            if category_name not in category_data:
+                                category_data[category_name] = []
+                            category_data[category_name].append((word, freq))
+                            categorized = True
+                            break
+                    
+                    if not categorized:
+                        uncategorized_words.append((word, freq))
                 
-                words = [w[0] for w in word_data]
-                freqs = [w[1] for w in word_data]
+                # 添加未分類詞語
+                if uncategorized_words:
+                    category_data['其他'] = uncategorized_words
                 
-                if plot_type == 'horizontal':
-                    bars = ax.barh(words, freqs, color=cmap(idx/len(category_data)))
-                else:  # vertical
-                    bars = ax.bar(words, freqs, color=cmap(idx/len(category_data)))
-                    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+                # 為每個分類創建子圖
+                axes = fig.subplots(len(category_data), 1, squeeze=False)[:, 0]
+                fig.suptitle(title, fontsize=16)
                 
-                # 添加數值標籤
-                for bar in bars:
+                for idx, (category_name, word_data) in enumerate(category_data.items()):
+                    ax = axes[idx]
+                    
+                    words = [w[0] for w in word_data]
+                    freqs = [w[1] for w in word_data]
+                    
                     if plot_type == 'horizontal':
-                        ax.text(bar.get_width() + 0.1, bar.get_y() + bar.get_height()/2, 
-                                f'{bar.get_width()}', va='center')
+                        bars = ax.barh(words, freqs, color=cmap(idx/len(category_data)))
+                    else:  # vertical
+                        bars = ax.bar(words, freqs, color=cmap(idx/len(category_data)))
+                        ax.tick_params(axis='x', labelrotation=45)
+                        for label in ax.get_xticklabels():
+                            label.set_horizontalalignment('right')
+                    
+                    # 添加數值標籤
+                    for bar in bars:
+                        if plot_type == 'horizontal':
+                            ax.text(bar.get_width() + 0.1, bar.get_y() + bar.get_height()/2, 
+                                    f'{bar.get_width()}', va='center')
+                        else:
+                            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
+                                    f'{bar.get_height()}', ha='center')
+                    
+                    ax.set_title(f"{category_name} ({len(word_data)}詞)")
+                    
+                    if plot_type == 'horizontal':
+                        ax.set_xlabel('頻率')
                     else:
-                        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
-                                f'{bar.get_height()}', ha='center')
+                        ax.set_ylabel('頻率')
+                
+            else:  # 不分類或餅圖
+                ax = fig.add_subplot()
                 
-                ax.set_title(f"{category_name} ({len(word_data)}詞)")
+                if plot_type == 'pie':
+                    # 繪製餅圖
+                    ax.pie(list(top_words.values()), labels=list(top_words.keys()),
+                           autopct='%1.1f%%', colors=[cmap(i/len(top_words)) for i in range(len(top_words))])
+                    ax.axis('equal')  # 確保餅圖為圓形
+                    ax.set_title(title)
                 
-                if plot_type == 'horizontal':
+                elif plot_type == 'horizontal':
+                    # 繪製水平條形圖，並添加數值標籤
+                    _barh_with_values(ax, list(top_words.keys()), list(top_words.values()),
+                                      color=_bar_palette(color_map, len(top_words)))
+                    
+                    ax.set_title(title)
                     ax.set_xlabel('頻率')
-                else:
+                    ax.set_ylabel('詞語')
+                    
+                else:  # vertical
+                    # 繪製垂直條形圖
+                    values = list(top_words.values())
+                    positions = range(len(values))
+                    ax.bar(positions, values, color=_bar_palette(color_map, len(values)))
+                    ax.set_xticks(positions, labels=list(top_words.keys()), rotation=45, ha='right')
+                    
+                    # 添加數值標籤
+                    for i, v in enumerate(values):
+                        ax.text(i, v + 0.1, str(v), ha='center')
+                    
+                    ax.set_title(title)
                     ax.set_ylabel('頻率')
+                    ax.set_xlabel('詞語')
             
-            plt.tight_layout(rect=[0, 0, 1, 0.95])  # 修正標題和圖表的間距
-            
-        else:  # 不分類或餅圖
-            if plot_type == 'pie':
-                # 繪製餅圖
-                plt.pie(list(top_words.values()), labels=list(top_words.keys()),
-                       autopct='%1.1f%%', colors=[cmap(i/len(top_words)) for i in range(len(top_words))])
-                plt.axis('equal')  # 確保餅圖為圓形
-                plt.title(title)
-            
-            elif plot_type == 'horizontal':
-                # 繪製水平條形圖
-                with plt.style.context('fast'):
-                    ax = sns.barplot(x=list(top_words.values()), y=list(top_words.keys()), 
-                                    palette=color_map)
-                
-                # 添加數值標籤
-                for i, v in enumerate(list(top_words.values())):
-                    ax.text(v + 0.1, i, str(v), va='center')
-                
-                plt.title(title)
-                plt.xlabel('頻率')
-                plt.ylabel('詞語')
-                
-            else:  # vertical
-                # 繪製垂直條形圖
-                with plt.style.context('fast'):
-                    ax = sns.barplot(x=list(top_words.keys()), y=list(top_words.values()),
-                                    palette=color_map)
-                
-                # 添加數值標籤
-                for i, v in enumerate(list(top_words.values())):
-                    ax.text(i, v + 0.1, str(v), ha='center')
-                
-                plt.title(title)
-                plt.ylabel('頻率')
-                plt.xlabel('詞語')
-                plt.xticks(rotation=45, ha='right')
-            
-            plt.tight_layout()
-        
-        # 保存圖表
-        if save_path:
-            os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
-            plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
+            # 保存圖表
+            if save_path:
+                save_figure(fig, save_path, dpi=dpi)
             
-        plt.close()
         return True
     
     @staticmethod
-    def compare_word_frequencies(freq_data_dict, top_n=15, title='詞頻比較', save_path=None, figsize=(14, 8)):
+    def compare_word_frequencies(freq_data_dict, top_n=15, title='詞頻比較', save_path=None, figsize=(14, 8), dpi=300):
         """
         比較多個文本或時期的詞頻
         
@@ -581,24 +680,19 @@ class Visualizer:
             保存路徑
         figsize : tuple
             圖表尺寸
+        dpi : int
+            圖像解析度，默認為300
             
         Returns:
         --------
         bool
             是否成功生成圖表
         """
-        # 合併所有詞語
-        all_words = set()
+        # 在整數 ID 的計數數組上累加所有數據的詞頻，選取總頻率最高的詞
+        totals = CountTable()
         for data in freq_data_dict.values():
-            all_words.update(data.keys())
-        
-        # 找出在所有數據中出現頻率最高的詞
-        word_total_freq = {}
-        for word in all_words:
-            word_total_freq[word] = sum(data.get(word, 0) for data in freq_data_dict.values())
-        
-        # 選取頻率最高的詞
-        top_words = dict(sorted(word_total_freq.items(), key=lambda x: x[1], reverse=True)[:top_n])
+            totals.add(data)
+        top_words = totals.to_dict(top_n)
         
         # 準備繪圖數據
         data_names = list(freq_data_dict.keys())
@@ -615,22 +709,20 @@ class Visualizer:
         df = pd.DataFrame(data_matrix, index=words, columns=data_names)
         
         # 繪製熱圖
-        plt.figure(figsize=figsize)
-        ax = sns.heatmap(df, annot=True, fmt='d', cmap='YlGnBu')
-        
-        plt.title(title)
-        plt.tight_layout()
-        
-        # 保存圖表
-        if save_path:
-            os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        import seaborn as sns
+        with FIGURE_POOL.axes(figsize) as (fig, ax):
+            sns.heatmap(df, annot=True, fmt='d', cmap='YlGnBu', ax=ax)
+            
+            ax.set_title(title)
+            
+            # 保存圖表
+            if save_path:
+                save_figure(fig, save_path, dpi=dpi)
             
-        plt.close()
         return True
     
     @staticmethod
-    def plot_word_frequency_trends(time_series_data, words, title='詞頻趨勢', save_path=None, figsize=(14, 6)):
+    def plot_word_frequency_trends(time_series_data, words, title='詞頻趨勢', save_path=None, figsize=(14, 6), dpi=300):
         """
         繪製詞頻隨時間變化的趨勢圖
         
@@ -646,6 +738,8 @@ class Visualizer:
             保存路徑
         figsize : tuple
             圖表尺寸
+        dpi : int
+            圖像解析度，默認為300
             
         Returns:
         --------
@@ -655,23 +749,20 @@ class Visualizer:
         # 整理數據
         time_points = sorted(time_series_data.keys())
         
-        plt.figure(figsize=figsize)
-        
-        # 為每個詞繪製一條線
-        for word in words:
-            freq_over_time = [time_series_data[t].get(word, 0) for t in time_points]
-            plt.plot(time_points, freq_over_time, marker='o', linewidth=2, label=word)
-        
-        plt.title(title)
-        plt.xlabel('時間點')
-        plt.ylabel('詞頻')
-        plt.legend()
-        plt.grid(True, linestyle='--', alpha=0.7)
-        
-        # 保存圖表
-        if save_path:
-            os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        with FIGURE_POOL.axes(figsize) as (fig, ax):
+            # 為每個詞繪製一條線
+            for word in words:
+                freq_over_time = [time_series_data[t].get(word, 0) for t in time_points]
+                ax.plot(time_points, freq_over_time, marker='o', linewidth=2, label=word)
+            
+            ax.set_title(title)
+            ax.set_xlabel('時間點')
+            ax.set_ylabel('詞頻')
+            ax.legend()
+            ax.grid(True, linestyle='--', alpha=0.7)
+            
+            # 保存圖表
+            if save_path:
+                save_figure(fig, save_path, dpi=dpi)
             
-        plt.close()
         return True
\ No newline at end of file
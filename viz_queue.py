@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+延遲可視化任務隊列
+
+批量分析時只把「結果文件 + 圖表類型」追加到隊列文件（JSON Lines），不在分析循環中繪圖；
+之後再單獨執行渲染階段，一次性批量生成隊列中的所有圖表。
+隊列中的路徑相對於隊列文件所在目錄保存，整個輸出目錄可以複製到其他機器上再渲染。
+渲染時逐個讀取任務並提交圖表，內存佔用不隨隊列長度增長。
+
+用法:
+    python viz_queue.py results/viz_queue.jsonl --workers 4
+"""
+
+import os
+import glob
+import argparse
+import json_serializer
+
+# 默認隊列文件名（位於輸出目錄下）
+DEFAULT_QUEUE_NAME = 'viz_queue.jsonl'
+
+class VizQueue:
+    """可視化任務隊列，每行一個任務：
+    {"result": 結果JSON路徑, "output_dir": 圖表目錄, "prefix": 文件名前綴,
+     "font_path": 字體路徑, "charts": 圖表類型列表（null 表示全部）,
+     "profile": 輸出配置, "dpi": 解析度（null 表示使用配置中的解析度）}
+    """
+    def __init__(self, queue_path):
+        self.queue_path = queue_path
+        self.base_dir = os.path.dirname(os.path.abspath(queue_path))
+        self.recover()
+
+    def recover(self):
+        """把中斷的渲染留下的 .draining 文件中的任務放回隊列
+
+        drain() 渲染前會把隊列文件改名為「隊列文件.進程號.draining」，渲染完成後刪除；
+        如果進程在渲染期間崩潰，該文件會一直保留。對應進程已不存在時，其中的任務重新追加到隊列。
+
+        Returns:
+            int: 放回隊列的任務數
+        """
+        recovered = 0
+        for draining_path in glob.glob(f"{glob.escape(self.queue_path)}.*.draining"):
+            pid = draining_path[len(self.queue_path) + 1:-len('.draining')]
+            if pid.isdigit() and _process_alive(int(pid)):
+                continue
+            jobs = _read_jobs(draining_path)
+            _append_jobs(self.queue_path, jobs)
+            os.remove(draining_path)
+            recovered += len(jobs)
+        if recovered:
+            print(f"已把中斷的渲染中的 {recovered} 個任務放回隊列 {self.queue_path}")
+        return recovered
+
+    def _relative(self, path):
+        return os.path.relpath(os.path.abspath(path), self.base_dir)
+
+    def _resolve(self, path):
+        return path if os.path.isabs(path) else os.path.join(self.base_dir, path)
+
+    def enqueue(self, result_path, output_dir, prefix='', font_path=None, charts=None, profile=None, dpi=None):
+        """追加一個圖表任務"""
+        job = {
+            'result': self._relative(result_path),
+            'output_dir': self._relative(output_dir),
+            'prefix': prefix,
+            'font_path': font_path,
+            'charts': list(charts) if charts else None,
+            'profile': profile,
+            'dpi': dpi
+        }
+        os.makedirs(self.base_dir, exist_ok=True)
+        _append_jobs(self.queue_path, [job])
+
+    def pending(self):
+        """讀取隊列中所有待處理的任務"""
+        return _read_jobs(self.queue_path)
+
+    def __len__(self):
+        return len(self.pending())
+
+    def drain(self, pool=None):
+        """批量渲染隊列中的全部任務並清空隊列
+
+        任務逐個讀取，每個結果文件的圖表生成後立即渲染（指定 pool（ChartRenderPool）時並行渲染，
+        未完成的圖表數受 pool.max_pending 限制），內存中只保留正在渲染的結果。
+        結果文件無法讀取的任務保留在隊列中，下次渲染時重試。
+
+        Returns:
+            tuple: (已渲染的圖表數, 失敗的任務數)
+        """
+        from visualization import Visualizer, _render_job
+
+        self.recover()
+        if not os.path.exists(self.queue_path):
+            return 0, 0
+
+        # 先把隊列文件改名，渲染期間新追加的任務寫入新的隊列文件，不會丟失
+        draining_path = f"{self.queue_path}.{os.getpid()}.draining"
+        os.replace(self.queue_path, draining_path)
+
+        rendered = 0
+        rendered_before = pool.rendered if pool is not None else 0
+        failed = []
+        for job in _iter_jobs(draining_path):
+            try:
+                with open(self._resolve(job['result']), 'rb') as f:
+                    results = json_serializer.load(f)
+            except (OSError, ValueError) as e:
+                print(f"無法讀取分析結果 {job['result']}: {e}")
+                failed.append(job)
+                continue
+
+            output_dir = self._resolve(job['output_dir'])
+            os.makedirs(output_dir, exist_ok=True)
+            chart_jobs = Visualizer.report_jobs(
+                results,
+                output_dir=output_dir,
+                prefix=job.get('prefix', ''),
+                font_path=job.get('font_path'),
+                charts=job.get('charts'),
+                profile=job.get('profile'),
+                dpi=job.get('dpi')
+            )
+            if pool is None:
+                rendered += sum(success for _, success in map(_render_job, chart_jobs))
+            else:
+                pool.render_async(chart_jobs)
+
+        if pool is not None:
+            pool.wait()
+            rendered = pool.rendered - rendered_before
+
+        # 把失敗的任務放回隊列
+        _append_jobs(self.queue_path, failed)
+        os.remove(draining_path)
+
+        return rendered, len(failed)
+
+def _iter_jobs(path):
+    """逐個讀取隊列文件中的任務，文件不存在時不產出任何任務"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield json_serializer.loads(line)
+
+def _read_jobs(path):
+    """讀取隊列文件中的全部任務，文件不存在時返回空列表"""
+    return list(_iter_jobs(path))
+
+def _append_jobs(path, jobs):
+    """把任務逐行追加到隊列文件"""
+    if not jobs:
+        return
+    with open(path, 'ab') as f:
+        for job in jobs:
+            f.write(json_serializer.dumps(job) + b'\n')
+
+def _process_alive(pid):
+    """進程是否仍在運行（無法判斷時視為仍在運行）"""
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        # Windows 上 os.kill 會終止進程，改用 OpenProcess 查詢
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='批量渲染延遲可視化隊列中的圖表')
+    parser.add_argument('queue', help=f'隊列文件路徑（例如 results/{DEFAULT_QUEUE_NAME}）')
+    parser.add_argument('--workers', '-w', type=int, default=1, help='並行渲染圖表的進程數（大於1時啟用）')
+
+    args = parser.parse_args()
+
+    queue = VizQueue(args.queue)
+    total = len(queue)
+    if not total:
+        print(f"隊列 {args.queue} 中沒有待渲染的任務")
+        return
+
+    print(f"開始渲染 {total} 個文件的圖表")
+    if args.workers > 1:
+        from visualization import ChartRenderPool
+        with ChartRenderPool(processes=args.workers) as pool:
+            rendered, failed = queue.drain(pool=pool)
+    else:
+        rendered, failed = queue.drain()
+    print(f"已生成 {rendered} 張圖表，{failed} 個任務失敗（已保留在隊列中）")
+
+if __name__ == "__main__":
+    main()
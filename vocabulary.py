@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+詞彙表：詞語與整數 ID 的雙向映射
+
+ID 按詞語首次出現的順序從 0 開始連續分配，因此可以直接作為計數數組的下標。
+同一個詞語只保存一份字符串，以 ID 表示的詞語序列不再持有各自的字符串對象。
+"""
+
+class Vocabulary:
+    """詞語 <-> 整數 ID"""
+    def __init__(self, words=()):
+        self._index = {}
+        self._words = []
+        self.ids(words)
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        return word in self._index
+
+    def __iter__(self):
+        return iter(self._words)
+
+    def id(self, word):
+        """返回詞語的 ID，新詞語會被加入詞彙表"""
+        word_id = self._index.get(word)
+        if word_id is None:
+            word_id = self._index[word] = len(self._words)
+            self._words.append(word)
+        return word_id
+
+    def ids(self, words):
+        """返回一組詞語的 ID 列表，新詞語會被加入詞彙表"""
+        if not isinstance(words, (list, tuple)):
+            words = list(words)
+        index = self._index
+        size = len(index)
+        setdefault = index.setdefault
+        # len(index) 在插入前求值，恰好是新詞語的 ID
+        result = [setdefault(word, len(index)) for word in words]
+        if len(index) != size:
+            # 新詞語的 ID 按首次出現的順序遞增，依次追加到詞語列表
+            append = self._words.append
+            for word, word_id in zip(words, result):
+                if word_id == len(self._words):
+                    append(word)
+        return result
+
+    def get(self, word, default=None):
+        """返回詞語的 ID，不在詞彙表中時返回 default（不會加入詞彙表）"""
+        return self._index.get(word, default)
+
+    @property
+    def words(self):
+        """按 ID 排列的詞語列表（不應修改）"""
+        return self._words
+
+    def word(self, word_id):
+        """返回 ID 對應的詞語"""
+        return self._words[word_id]
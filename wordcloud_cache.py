@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+詞雲佈局緩存
+
+WordCloud 的佈局計算（逐個詞語尋找擺放位置）是最耗時的一步，而繪製已有佈局只需要幾毫秒。
+緩存鍵由量化後的前 max_words 個詞頻和全部 WordCloud 參數（字體、畫布大小、背景色、顏色模式等）決定：
+詞語相同且相對詞頻相近的文檔得到相同的鍵，直接重用之前計算的佈局。
+佈局保存在內存中，同時寫入磁盤，供之後的進程和渲染任務使用。
+"""
+
+import os
+import json
+import hashlib
+from collections import OrderedDict
+from PIL import Image
+from file_utils import DEFAULT_CACHE_DIR
+
+# 相對詞頻（相對最高詞頻）量化的級數，級數越少，越多相近文檔共用同一佈局
+DEFAULT_LEVELS = 20
+
+def layout_signature(word_freq, max_words, levels=DEFAULT_LEVELS):
+    """計算詞頻的量化簽名：前 max_words 個詞及其量化後的相對詞頻"""
+    top = sorted(word_freq.items(), key=lambda x: (-x[1], x[0]))[:max_words]
+    if not top or top[0][1] <= 0:
+        return ()
+    max_freq = top[0][1]
+    return tuple((word, round(freq / max_freq * levels)) for word, freq in top)
+
+class WordcloudLayoutCache:
+    """詞雲佈局的內存和磁盤兩級緩存"""
+    def __init__(self, cache_dir=None, max_memory=256, max_entries=10000, levels=DEFAULT_LEVELS):
+        self.cache_dir = cache_dir or os.path.join(DEFAULT_CACHE_DIR, 'wordcloud_layouts')
+        self.max_memory = max_memory
+        self.max_entries = max_entries
+        self.levels = levels
+        self._memory = OrderedDict()
+        self._disk_count = None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, word_freq, wc_kwargs):
+        """計算佈局緩存鍵
+
+        wc_kwargs 為建立 WordCloud 的全部參數，任何一個參數不同都會得到不同的鍵
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps(
+            [layout_signature(word_freq, wc_kwargs['max_words'], self.levels), sorted(wc_kwargs.items())],
+            ensure_ascii=False
+        ).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path_for_key(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """返回緩存的佈局（WordCloud.layout_ 格式），不存在時返回 None"""
+        layout = self._memory.get(key)
+        if layout is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return layout
+
+        try:
+            with open(self._path_for_key(key), 'r', encoding='utf-8') as f:
+                layout = _decode_layout(json.load(f))
+        except (OSError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        self._remember(key, layout)
+        self.hits += 1
+        return layout
+
+    def put(self, key, layout):
+        """緩存一個佈局"""
+        self._remember(key, layout)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path_for_key(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(_encode_layout(layout), f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"無法寫入詞雲佈局緩存: {e}")
+            return
+
+        if self._disk_count is None:
+            self._disk_count = len(self._entries())
+        else:
+            self._disk_count += 1
+        if self._disk_count > self.max_entries:
+            self.evict()
+
+    def _remember(self, key, layout):
+        self._memory[key] = layout
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def _entries(self):
+        """列出磁盤上的緩存條目 (path, mtime)"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return [(entry.path, entry.stat().st_mtime) for entry in os.scandir(self.cache_dir)
+                if entry.name.endswith('.json')]
+
+    def evict(self, target_ratio=0.9):
+        """刪除最舊的磁盤條目，直到條目數降到上限的 target_ratio 以下"""
+        entries = sorted(self._entries(), key=lambda x: x[1])
+        excess = len(entries) - int(self.max_entries * target_ratio)
+        for path, _ in entries[:max(excess, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._disk_count = len(entries) - max(excess, 0)
+
+    def clear(self):
+        """清空緩存"""
+        self._memory.clear()
+        for path, _ in self._entries():
+            os.remove(path)
+        self._disk_count = 0
+
+def _encode_layout(layout):
+    """把 WordCloud.layout_ 轉換為可 JSON 序列化的列表"""
+    return [
+        [word, float(freq), int(font_size), [int(position[0]), int(position[1])],
+         None if orientation is None else int(orientation), color]
+        for (word, freq), font_size, position, orientation, color in layout
+    ]
+
+def _decode_layout(data):
+    """把 JSON 數據還原為 WordCloud.layout_ 格式"""
+    return [
+        ((word, freq), font_size, tuple(position),
+         None if orientation is None else Image.Transpose(orientation), color)
+        for word, freq, font_size, position, orientation, color in data
+    ]